@@ -0,0 +1,83 @@
+"""
+Factorised evaluation of :mod:`pitot.raw.factorization` on large arrays of
+quantised values, as in ADS-B data.
+
+Trajectories climb to a cruise altitude and descend, with barometric
+altitudes in steps of 25 ft and integer calibrated air speeds. Each function
+is timed directly, then within ``factorized()``, on the whole arrays and on
+a stream of batches (with a cache across batches).
+
+Usage::
+
+    python benchmarks/factorization.py [--size 10000000] [--batch 1000000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+from typing import Any, Callable
+
+import numpy as np
+from pitot import aero, factorized, isa
+
+
+def per_call(fun: Callable[[], Any], number: int = 1) -> float:
+    """Best per-call time over a few repeats, in milliseconds."""
+    timer = timeit.Timer(fun)
+    return min(timer.repeat(repeat=3, number=number)) / number * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=10_000_000)
+    parser.add_argument("--batch", type=int, default=1_000_000)
+    options = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    points = 1000
+    flights = options.size // points
+    t = np.linspace(0, 1, points)
+    profile = np.minimum(1, 4 * np.minimum(t, 1 - t))
+    cruise = rng.integers(200, 400, (flights, 1)) * 100
+    h = (np.round(cruise * profile / 25) * 25).reshape(-1)
+    noise = rng.normal(0, 2, (flights, points))
+    cas = np.round(150 + 150 * profile + noise).reshape(-1)
+    cases: dict[str, Callable[[slice], Any]] = {
+        "atmosphere": lambda s: isa.atmosphere(h[s]),
+        "density": lambda s: isa.density(h[s]),
+        "cas2tas": lambda s: aero.cas2tas(cas[s], h[s]),
+        "cas2mach": lambda s: aero.cas2mach(cas[s], h[s]),
+    }
+    batches = [
+        slice(i, i + options.batch) for i in range(0, h.size, options.batch)
+    ]
+
+    def stream(fun: Callable[[slice], Any]) -> Callable[[], None]:
+        def run() -> None:
+            for batch in batches:
+                fun(batch)
+
+        return run
+
+    print(f"{h.size} elements, batches of {options.batch}")
+    print(
+        f"{'function':>10} {'direct':>8} {'factorized':>11} "
+        f"{'stream':>8} {'factorized':>11} {'cached':>8}  (ms)"
+    )
+    for name, fun in cases.items():
+        whole = per_call(lambda: fun(slice(None)))
+        streamed = per_call(stream(fun))
+        with factorized():
+            whole_factorized = per_call(lambda: fun(slice(None)))
+            streamed_factorized = per_call(stream(fun))
+        with factorized(cache_size=1 << 20):
+            cached = per_call(stream(fun))
+        print(
+            f"{name:>10} {whole:8.1f} {whole_factorized:11.1f} "
+            f"{streamed:8.1f} {streamed_factorized:11.1f} {cached:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Per-call overhead of the geodesy functions, before and after sharing the
+geodesic engine.
+
+"before" builds a fresh ``Geod(ellps="WGS84")`` on every call, as pitot used
+to do; "after" goes through :func:`pitot.geodesy.get_geod`.
+
+Usage::
+
+    python benchmarks/geod_engine.py
+"""
+
+from __future__ import annotations
+
+import timeit
+from typing import Any, Callable
+
+import numpy as np
+from pitot import geodesy
+from pyproj import Geod
+
+
+def before(lat1: Any, lon1: Any, lat2: Any, lon2: Any) -> Any:
+    geod = Geod(ellps="WGS84")
+    _, _, dist = geod.inv(lon1, lat1, lon2, lat2)
+    return dist
+
+
+def after(lat1: Any, lon1: Any, lat2: Any, lon2: Any) -> Any:
+    _, _, dist = geodesy.get_geod().inv(lon1, lat1, lon2, lat2)
+    return dist
+
+
+def per_call(fun: Callable[..., Any], *args: Any, number: int = 2000) -> float:
+    """Best per-call time over a few repeats, in microseconds."""
+    timer = timeit.Timer(lambda: fun(*args))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e6
+
+
+def main() -> None:
+    rng = np.random.default_rng(42)
+    print(f"{'input':>10} {'before':>10} {'after':>10} {'distance':>10}  (µs)")
+    for size in [None, 1, 10, 100]:
+        if size is None:
+            args: tuple[Any, ...] = (43.6, 1.4, 48.9, 2.3)
+            label = "scalar"
+        else:
+            args = tuple(rng.uniform(-60, 60, size) for _ in range(4))
+            label = f"array[{size}]"
+        print(
+            f"{label:>10} "
+            f"{per_call(before, *args):10.2f} "
+            f"{per_call(after, *args):10.2f} "
+            f"{per_call(geodesy.distance, *args):10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Scaling of the parallel evaluation of :mod:`pitot.raw.executor` with the
+number of threads, on large arrays.
+
+Each function is timed sequentially, then within ``parallel(n_jobs)`` for
+powers of two up to 32 threads (or the ``--max-jobs`` option); the speed-up
+is relative to the sequential time. Thread counts above the number of cores
+are still run, but cannot be expected to scale.
+
+Usage::
+
+    python benchmarks/parallel.py [--size 10000000] [--max-jobs 32]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import timeit
+from typing import Any, Callable
+
+import numpy as np
+from pitot import aero, geodesy, isa, parallel
+
+
+def per_call(fun: Callable[[], Any], number: int = 1) -> float:
+    """Best per-call time over a few repeats, in milliseconds."""
+    timer = timeit.Timer(fun)
+    return min(timer.repeat(repeat=3, number=number)) / number * 1e3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=10_000_000)
+    parser.add_argument("--max-jobs", type=int, default=32)
+    options = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    size = options.size
+    h = rng.uniform(0, 40_000, size)
+    cas = rng.uniform(100, 350, size)
+    lat1, lat2 = rng.uniform(-80, 80, (2, size))
+    lon1, lon2 = rng.uniform(-180, 180, (2, size))
+    cases: dict[str, Callable[[], Any]] = {
+        "density": lambda: isa.density(h),
+        "cas2tas": lambda: aero.cas2tas(cas, h),
+        "cas2mach": lambda: aero.cas2mach(cas, h),
+        "distance": lambda: geodesy.distance(lat1, lon1, lat2, lon2),
+    }
+    jobs = [n for n in (2, 4, 8, 16, 32) if n <= options.max_jobs]
+
+    print(f"{os.cpu_count()} cores, {size} elements")
+    print(
+        f"{'function':>10} {'sequential':>11} "
+        + " ".join(f"{f'x{n}':>7}" for n in jobs)
+        + "  (ms, speed-up)"
+    )
+    for name, fun in cases.items():
+        reference = per_call(fun)
+        speedups = []
+        for n_jobs in jobs:
+            with parallel(n_jobs):
+                speedups.append(reference / per_call(fun))
+        print(
+            f"{name:>10} {reference:11.1f} "
+            + " ".join(f"{s:7.2f}" for s in speedups)
+        )
+
+
+if __name__ == "__main__":
+    main()
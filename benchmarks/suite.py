@@ -0,0 +1,771 @@
+"""
+Benchmark suite for the public functions of :mod:`pitot.isa`,
+:mod:`pitot.aero`, :mod:`pitot.geodesy` and :mod:`pitot.airac`.
+
+Each function is timed on a scalar and on arrays of 1e3, 1e6 (and, on
+demand, 1e8) elements, in two settings:
+
+- "plain": called directly, with arguments in the default units of the
+  function, so that impunity has nothing to convert;
+- "converted": called from a function decorated with impunity, with
+  arguments (and results) in other units (e.g. m and m/s instead of ft and
+  kts), so that impunity inserts conversions at the call site.
+
+Functions without physical units (e.g. in :mod:`pitot.airac`) only run
+"plain". Functions of a single point (e.g. :func:`pitot.airac.airac_cycle`)
+only run as "scalar"; functions of matrices, routes or trajectories run on as
+many elements (or points) as the array sizes.
+
+Results are written as JSON (one record per function, size and setting,
+with the best time per call, in seconds) and serve as baselines for later
+runs: ``compare`` prints the ratios of two runs and exits with an error if
+any function got slower than the threshold.
+
+Usage::
+
+    python benchmarks/suite.py run -o baseline.json
+    python benchmarks/suite.py run --sizes scalar,1e3 --filter aero. -o new.json
+    python benchmarks/suite.py compare baseline.json new.json --threshold 0.2
+
+    # or both at once, on the sizes of the baseline
+    python benchmarks/suite.py run --compare baseline.json
+
+Arrays of 1e8 elements (``--sizes scalar,1e3,1e6,1e8``) need several GB of
+memory, and several minutes for the geodesic functions.
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime
+import fnmatch
+import functools
+import importlib.metadata
+import json
+import math
+import platform
+import sys
+import time
+import timeit
+import zlib
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from impunity import impunity
+from typing_extensions import Annotated
+
+import numpy as np
+from pitot import aero, airac, geodesy, isa
+
+SIZES = {"scalar": None, "1e3": 1_000, "1e6": 1_000_000, "1e8": 100_000_000}
+DEFAULT_SIZES = "scalar,1e3,1e6"
+
+#: A benchmark returns a function without arguments to time, or None when it
+#: does not apply to the size (None for a scalar) and setting (True when
+#: units are converted)
+Benchmark = Callable[[Optional[int], bool], Optional[Callable[[], Any]]]
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str) -> Callable[[Benchmark], Benchmark]:
+    def register(func: Benchmark) -> Benchmark:
+        BENCHMARKS[name] = func
+        return func
+
+    return register
+
+
+# Inputs, generated once per size
+
+
+@functools.lru_cache(maxsize=None)
+def sample(kind: str, size: Optional[int]) -> Any:
+    """Random values of a given kind, a float for scalars."""
+    rng = np.random.default_rng(zlib.crc32(kind.encode()))
+    low, high = {
+        "h": (0, 40_000),  # ft
+        "cas": (100, 350),  # kts
+        "mach": (0.2, 0.85),
+        "lat": (-80, 80),  # degrees
+        "lon": (-180, 180),  # degrees
+        "bearing": (0, 360),  # degrees
+        "wind": (-80, 80),  # kts
+        "distance": (0, 500_000),  # m
+    }[kind.rstrip("12")]
+    values = rng.uniform(low, high, 1 if size is None else size)
+    return float(values[0]) if size is None else values
+
+
+def timestamps(size: int) -> Any:
+    start = np.datetime64("2010-01-01", "s").astype(np.int64)
+    seconds = np.random.default_rng(0).integers(0, 20 * 365 * 86400, size)
+    return (start + seconds).astype("datetime64[s]")
+
+
+def scalar_only(size: Optional[int], converted: bool) -> bool:
+    return size is None and not converted
+
+
+# Callers in other units: impunity converts arguments and results at each
+# call site (the source of decorated functions must be available, so they
+# cannot be generated)
+
+FT = 0.3048
+KTS = 1852 / 3600
+
+
+@impunity
+def _temperature(h: Annotated[Any, "ft"]) -> Annotated[Any, "degC"]:
+    return isa.temperature(h)
+
+
+@impunity
+def _density(h: Annotated[Any, "ft"]) -> Annotated[Any, "g/m^3"]:
+    return isa.density(h)
+
+
+@impunity
+def _density_table(h: Annotated[Any, "ft"]) -> Annotated[Any, "g/m^3"]:
+    return isa.density(h, method="table")
+
+
+@impunity
+def _pressure(h: Annotated[Any, "ft"]) -> Annotated[Any, "hPa"]:
+    return isa.pressure(h)
+
+
+@impunity
+def _sound_speed(h: Annotated[Any, "ft"]) -> Annotated[Any, "kts"]:
+    return isa.sound_speed(h)
+
+
+@impunity
+def _tas2mach(
+    tas: Annotated[Any, "m/s"], h: Annotated[Any, "m"]
+) -> Annotated[Any, "dimensionless"]:
+    return aero.tas2mach(tas, h)
+
+
+@impunity
+def _mach2tas(
+    mach: Annotated[Any, "dimensionless"], h: Annotated[Any, "m"]
+) -> Annotated[Any, "m/s"]:
+    return aero.mach2tas(mach, h)
+
+
+@impunity
+def _eas2tas(
+    eas: Annotated[Any, "m/s"], h: Annotated[Any, "m"]
+) -> Annotated[Any, "m/s"]:
+    return aero.eas2tas(eas, h)
+
+
+@impunity
+def _tas2eas(
+    tas: Annotated[Any, "m/s"], h: Annotated[Any, "m"]
+) -> Annotated[Any, "m/s"]:
+    return aero.tas2eas(tas, h)
+
+
+@impunity
+def _cas2tas(
+    cas: Annotated[Any, "m/s"], h: Annotated[Any, "m"]
+) -> Annotated[Any, "m/s"]:
+    return aero.cas2tas(cas, h)
+
+
+@impunity
+def _tas2cas(
+    tas: Annotated[Any, "m/s"], h: Annotated[Any, "m"]
+) -> Annotated[Any, "m/s"]:
+    return aero.tas2cas(tas, h)
+
+
+@impunity
+def _mach2cas(
+    mach: Annotated[Any, "dimensionless"], h: Annotated[Any, "m"]
+) -> Annotated[Any, "m/s"]:
+    return aero.mach2cas(mach, h)
+
+
+@impunity
+def _cas2mach(
+    cas: Annotated[Any, "m/s"], h: Annotated[Any, "m"]
+) -> Annotated[Any, "dimensionless"]:
+    return aero.cas2mach(cas, h)
+
+
+@impunity
+def _wind_triangle(
+    gs: Annotated[Any, "m/s"],
+    track: Annotated[Any, "rad"],
+    wind_u: Annotated[Any, "m/s"],
+    wind_v: Annotated[Any, "m/s"],
+    h: Annotated[Any, "m"],
+) -> Any:
+    return aero.wind_triangle(gs, track, wind_u, wind_v, h)
+
+
+@impunity
+def _distance(
+    lat1: Annotated[Any, "rad"],
+    lon1: Annotated[Any, "rad"],
+    lat2: Annotated[Any, "rad"],
+    lon2: Annotated[Any, "rad"],
+    method: str,
+) -> Annotated[Any, "km"]:
+    return geodesy.distance(lat1, lon1, lat2, lon2, method=method)
+
+
+@impunity
+def _bearing(
+    lat1: Annotated[Any, "rad"],
+    lon1: Annotated[Any, "rad"],
+    lat2: Annotated[Any, "rad"],
+    lon2: Annotated[Any, "rad"],
+    method: str,
+) -> Annotated[Any, "rad"]:
+    return geodesy.bearing(lat1, lon1, lat2, lon2, method=method)
+
+
+@impunity
+def _destination(
+    lat: Annotated[Any, "rad"],
+    lon: Annotated[Any, "rad"],
+    bearing: Annotated[Any, "rad"],
+    distance: Annotated[Any, "km"],
+) -> Any:
+    return geodesy.destination(lat, lon, bearing, distance)
+
+
+@impunity
+def _greatcircle(
+    lat1: Annotated[Any, "rad"],
+    lon1: Annotated[Any, "rad"],
+    lat2: Annotated[Any, "rad"],
+    lon2: Annotated[Any, "rad"],
+    npts: Annotated[Any, "dimensionless"],
+) -> Any:
+    return geodesy.greatcircle(lat1, lon1, lat2, lon2, npts)
+
+
+@impunity
+def _greatcircle_batch(
+    lat1: Annotated[Any, "rad"],
+    lon1: Annotated[Any, "rad"],
+    lat2: Annotated[Any, "rad"],
+    lon2: Annotated[Any, "rad"],
+    npts: int,
+) -> Any:
+    return geodesy.greatcircle_batch(lat1, lon1, lat2, lon2, npts=npts)
+
+
+@impunity
+def _cross_track(
+    lat: Annotated[Any, "rad"],
+    lon: Annotated[Any, "rad"],
+    lat1: Annotated[Any, "rad"],
+    lon1: Annotated[Any, "rad"],
+    lat2: Annotated[Any, "rad"],
+    lon2: Annotated[Any, "rad"],
+    route: Any,
+) -> Any:
+    return geodesy.cross_track(lat, lon, lat1, lon1, lat2, lon2, route=route)
+
+
+@impunity
+def _distance_matrix(
+    lat1: Annotated[Any, "rad"],
+    lon1: Annotated[Any, "rad"],
+    lat2: Annotated[Any, "rad"],
+    lon2: Annotated[Any, "rad"],
+) -> Annotated[Any, "km"]:
+    return geodesy.distance_matrix(lat1, lon1, lat2, lon2)
+
+
+@impunity
+def _bearing_matrix(
+    lat1: Annotated[Any, "rad"],
+    lon1: Annotated[Any, "rad"],
+    lat2: Annotated[Any, "rad"],
+    lon2: Annotated[Any, "rad"],
+) -> Annotated[Any, "rad"]:
+    return geodesy.bearing_matrix(lat1, lon1, lat2, lon2)
+
+
+@impunity
+def _kinematics(
+    lat: Annotated[Any, "rad"],
+    lon: Annotated[Any, "rad"],
+    timestamp: Any,
+    offsets: Any,
+) -> Any:
+    return geodesy.kinematics(lat, lon, timestamp=timestamp, offsets=offsets)
+
+
+# pitot.isa: altitudes in m, or in ft when converted
+
+
+def _isa(
+    function: Callable[..., Any], caller: Callable[..., Any], **kwargs: Any
+) -> Benchmark:
+    def bench(size: Optional[int], converted: bool) -> Callable[[], Any]:
+        h = sample("h", size)
+        if converted:
+            return lambda: caller(h)
+        h = h * FT
+        return lambda: function(h, **kwargs)
+
+    return bench
+
+
+benchmark("isa.temperature")(_isa(isa.temperature, _temperature))
+benchmark("isa.density")(_isa(isa.density, _density))
+benchmark("isa.density[table]")(
+    _isa(isa.density, _density_table, method="table")
+)
+benchmark("isa.pressure")(_isa(isa.pressure, _pressure))
+benchmark("isa.sound_speed")(_isa(isa.sound_speed, _sound_speed))
+
+
+@benchmark("isa.get_table")
+def _bench_get_table(size: Optional[int], converted: bool) -> Any:
+    if not scalar_only(size, converted):
+        return None
+    return lambda: isa.get_table()
+
+
+@benchmark("isa.AtmosphereTable")
+def _bench_atmosphere_table(size: Optional[int], converted: bool) -> Any:
+    if not scalar_only(size, converted):
+        return None
+    return lambda: isa.AtmosphereTable()
+
+
+# pitot.aero: speeds in kts and altitudes in ft, or in m/s and m when
+# converted
+
+
+def _aero(
+    function: Callable[..., Any], caller: Callable[..., Any]
+) -> Benchmark:
+    source = function.__name__.split("2")[0]
+
+    def bench(size: Optional[int], converted: bool) -> Callable[[], Any]:
+        h = sample("h", size)
+        v = sample("mach" if source == "mach" else "cas", size)
+        if not converted:
+            return lambda: function(v, h)
+        h = h * FT
+        if source != "mach":
+            v = v * KTS
+        return lambda: caller(v, h)
+
+    return bench
+
+
+benchmark("aero.tas2mach")(_aero(aero.tas2mach, _tas2mach))
+benchmark("aero.mach2tas")(_aero(aero.mach2tas, _mach2tas))
+benchmark("aero.eas2tas")(_aero(aero.eas2tas, _eas2tas))
+benchmark("aero.tas2eas")(_aero(aero.tas2eas, _tas2eas))
+benchmark("aero.cas2tas")(_aero(aero.cas2tas, _cas2tas))
+benchmark("aero.tas2cas")(_aero(aero.tas2cas, _tas2cas))
+benchmark("aero.mach2cas")(_aero(aero.mach2cas, _mach2cas))
+benchmark("aero.cas2mach")(_aero(aero.cas2mach, _cas2mach))
+
+
+@benchmark("aero.airspeeds")
+def _bench_airspeeds(size: Optional[int], converted: bool) -> Any:
+    # impunity does not convert keyword arguments, such as cas=
+    if converted:
+        return None
+    h, cas = sample("h", size), sample("cas", size)
+    return lambda: aero.airspeeds(h, cas=cas)
+
+
+@benchmark("aero.wind_triangle")
+def _bench_wind_triangle(size: Optional[int], converted: bool) -> Any:
+    h, gs = sample("h", size), sample("cas", size)
+    track = sample("bearing", size)
+    wind_u, wind_v = sample("wind1", size), sample("wind2", size)
+    if not converted:
+        return lambda: aero.wind_triangle(gs, track, wind_u, wind_v, h)
+    h, gs, track = h * FT, gs * KTS, np.radians(track)
+    wind_u, wind_v = wind_u * KTS, wind_v * KTS
+    return lambda: _wind_triangle(gs, track, wind_u, wind_v, h)
+
+
+# pitot.geodesy: angles in degrees and distances in m, or in radians and km
+# when converted
+
+
+def _points(size: Optional[int], converted: bool) -> Tuple[Any, Any, Any, Any]:
+    lat1, lon1 = sample("lat1", size), sample("lon1", size)
+    lat2, lon2 = sample("lat2", size), sample("lon2", size)
+    if converted:
+        return (
+            np.radians(lat1),
+            np.radians(lon1),
+            np.radians(lat2),
+            np.radians(lon2),
+        )
+    return lat1, lon1, lat2, lon2
+
+
+def _geodesy(
+    function: Callable[..., Any], caller: Callable[..., Any], method: str
+) -> Benchmark:
+    def bench(size: Optional[int], converted: bool) -> Callable[[], Any]:
+        points = _points(size, converted)
+        if converted:
+            return lambda: caller(*points, method)
+        return lambda: function(*points, method=method)
+
+    return bench
+
+
+for _method in geodesy.METHODS:
+    _suffix = "" if _method == "geodesic" else f"[{_method}]"
+    benchmark(f"geodesy.distance{_suffix}")(
+        _geodesy(geodesy.distance, _distance, _method)
+    )
+    benchmark(f"geodesy.bearing{_suffix}")(
+        _geodesy(geodesy.bearing, _bearing, _method)
+    )
+
+
+@benchmark("geodesy.destination")
+def _bench_destination(size: Optional[int], converted: bool) -> Any:
+    lat, lon, bearing = (sample(k, size) for k in ["lat", "lon", "bearing"])
+    distance = sample("distance", size)
+    if not converted:
+        return lambda: geodesy.destination(lat, lon, bearing, distance)
+    lat, lon, bearing = np.radians(lat), np.radians(lon), np.radians(bearing)
+    distance = distance / 1000
+    return lambda: _destination(lat, lon, bearing, distance)
+
+
+@benchmark("geodesy.get_geod")
+def _bench_get_geod(size: Optional[int], converted: bool) -> Any:
+    if not scalar_only(size, converted):
+        return None
+    return lambda: geodesy.get_geod()
+
+
+@benchmark("geodesy.greatcircle")
+def _bench_greatcircle(size: Optional[int], converted: bool) -> Any:
+    # a list of tuples: one pair of points, with as many points in between
+    if size is not None and size > 1_000_000:
+        return None
+    points = _points(None, converted)
+    npts = 10 if size is None else size
+    if converted:
+        return lambda: _greatcircle(*points, npts)
+    return lambda: geodesy.greatcircle(*points, npts)
+
+
+@benchmark("geodesy.greatcircle_batch")
+def _bench_greatcircle_batch(size: Optional[int], converted: bool) -> Any:
+    # routes of 100 points
+    points = _points(None if size is None else max(1, size // 100), converted)
+    if converted:
+        return lambda: _greatcircle_batch(*points, 100)
+    return lambda: geodesy.greatcircle_batch(*points, 100)
+
+
+@benchmark("geodesy.cross_track")
+def _bench_cross_track(size: Optional[int], converted: bool) -> Any:
+    # each point relative to its own segment
+    lat, lon = sample("lat", size), sample("lon", size)
+    points = _points(size, converted)
+    route = np.arange(1 if size is None else size)
+    if converted:
+        lat, lon = np.radians(lat), np.radians(lon)
+        return lambda: _cross_track(lat, lon, *points, route)
+    return lambda: geodesy.cross_track(lat, lon, *points, route=route)
+
+
+def _matrix(
+    function: Callable[..., Any], caller: Callable[..., Any]
+) -> Benchmark:
+    def bench(size: Optional[int], converted: bool) -> Any:
+        # size elements in the matrix
+        if size is None:
+            return None
+        points = _points(math.isqrt(size), converted)
+        return lambda: (caller if converted else function)(*points)
+
+    return bench
+
+
+benchmark("geodesy.distance_matrix")(
+    _matrix(geodesy.distance_matrix, _distance_matrix)
+)
+benchmark("geodesy.bearing_matrix")(
+    _matrix(geodesy.bearing_matrix, _bearing_matrix)
+)
+
+
+@benchmark("geodesy.kinematics")
+def _bench_kinematics(size: Optional[int], converted: bool) -> Any:
+    # flights of 1000 points, one point every 4 seconds
+    if size is None:
+        return None
+    lat, lon = sample("lat", size), sample("lon", size)
+    seconds = np.arange(size, dtype=np.float64) * 4
+    offsets = np.arange(0, size, 1000)
+    if converted:
+        lat, lon = np.radians(lat), np.radians(lon)
+        return lambda: _kinematics(lat, lon, seconds, offsets)
+    return lambda: geodesy.kinematics(lat, lon, seconds, offsets=offsets)
+
+
+# pitot.airac (no physical units)
+
+
+@benchmark("airac.airac_cycle")
+def _bench_airac_cycle(size: Optional[int], converted: bool) -> Any:
+    if not scalar_only(size, converted):
+        return None
+    moment = datetime.datetime(2023, 1, 26, tzinfo=datetime.timezone.utc)
+    return lambda: airac.airac_cycle(moment)
+
+
+@benchmark("airac.airac_year_epoch")
+def _bench_airac_year_epoch(size: Optional[int], converted: bool) -> Any:
+    if not scalar_only(size, converted):
+        return None
+    return lambda: airac.airac_year_epoch(2023)
+
+
+@benchmark("airac.airac_interval")
+def _bench_airac_interval(size: Optional[int], converted: bool) -> Any:
+    if not scalar_only(size, converted):
+        return None
+    return lambda: airac.airac_interval("2301")
+
+
+@benchmark("airac.airac_table")
+def _bench_airac_table(size: Optional[int], converted: bool) -> Any:
+    if not scalar_only(size, converted):
+        return None
+    return lambda: airac.airac_table()
+
+
+def _airac(function: Callable[..., Any], **kwargs: Any) -> Benchmark:
+    def bench(size: Optional[int], converted: bool) -> Any:
+        if size is None or converted:
+            return None
+        values = timestamps(size)
+        return lambda: function(values, **kwargs)
+
+    return bench
+
+
+benchmark("airac.airac_cycles")(_airac(airac.airac_cycles))
+benchmark("airac.airac_cycles[categorical]")(
+    _airac(airac.airac_cycles, categorical=True)
+)
+benchmark("airac.airac_bucket")(_airac(airac.airac_bucket))
+
+
+# Running and comparing
+
+
+class Record(NamedTuple):
+    function: str
+    size: str
+    units: str
+    seconds: float  # best time per call
+    number: int  # calls per repeat
+    repeat: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.function} [{self.size}, {self.units}]"
+
+
+def measure(func: Callable[[], Any], budget: float) -> tuple[float, int, int]:
+    """Best time per call, with as many calls as fit in the time budget."""
+    func()  # warm-up: lazy imports, caches
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    if first * 3 > budget:
+        return first, 1, 1
+    timer = timeit.Timer(func)
+    repeat = 5
+    number = max(1, int(budget / repeat / first))
+    return min(timer.repeat(repeat, number)) / number, number, repeat
+
+
+def cases(
+    sizes: List[str], patterns: List[str]
+) -> Iterator[tuple[str, str, str, Callable[[], Any]]]:
+    for size in sizes:
+        sample.cache_clear()  # frees the inputs of the previous size
+        for name, bench in BENCHMARKS.items():
+            if patterns and not any(
+                fnmatch.fnmatch(name, f"*{p}*") for p in patterns
+            ):
+                continue
+            for units, converted in [("plain", False), ("converted", True)]:
+                func = bench(SIZES[size], converted)
+                if func is not None:
+                    yield name, size, units, func
+
+
+def run(sizes: List[str], patterns: List[str], budget: float) -> List[Record]:
+    records = []
+    for name, size, units, func in cases(sizes, patterns):
+        seconds, number, repeat = measure(func, budget)
+        record = Record(name, size, units, seconds, number, repeat)
+        print(f"{record.key:<56} {format_time(seconds):>10}", flush=True)
+        records.append(record)
+    return records
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in [("s", 1), ("ms", 1e-3), ("µs", 1e-6)]:
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def save(records: List[Record], path: str) -> None:
+    content = {
+        "metadata": {
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(
+                timespec="seconds"
+            ),
+            "pitot": importlib.metadata.version("pitot"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "system": platform.system(),
+        },
+        "results": [record._asdict() for record in records],
+    }
+    with open(path, "w") as file:
+        json.dump(content, file, indent=2)
+        file.write("\n")
+
+
+def load(path: str) -> Dict[str, Record]:
+    with open(path) as file:
+        content = json.load(file)
+    records = (Record(**result) for result in content["results"])
+    return {record.key: record for record in records}
+
+
+def compare(
+    baseline: Dict[str, Record], results: Dict[str, Record], threshold: float
+) -> int:
+    """Prints the ratios of new over baseline times, and returns the number
+    of regressions (ratios above 1 + threshold)."""
+    regressions = 0
+    print(f"{'':<56} {'baseline':>10} {'new':>10} {'ratio':>7}")
+    for key, new in results.items():
+        old = baseline.get(key)
+        if old is None:
+            continue
+        ratio = new.seconds / old.seconds
+        flag = ""
+        if ratio > 1 + threshold:
+            regressions += 1
+            flag = "  slower"
+        elif ratio < 1 / (1 + threshold):
+            flag = "  faster"
+        print(
+            f"{key:<56} {format_time(old.seconds):>10} "
+            f"{format_time(new.seconds):>10} {ratio:7.2f}{flag}"
+        )
+    missing = baseline.keys() - results.keys()
+    if missing:
+        print(f"{len(missing)} baseline cases were not run")
+    print(f"{regressions} regression(s) above {threshold:.0%}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[0] if __doc__ else None
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument(
+        "--sizes",
+        default=None,
+        help=f"among {','.join(SIZES)} (default: {DEFAULT_SIZES}, or the "
+        "sizes of the --compare baseline)",
+    )
+    run_parser.add_argument(
+        "--filter",
+        action="append",
+        default=[],
+        help="only run benchmarks matching this pattern, e.g. aero.cas*",
+    )
+    run_parser.add_argument(
+        "--budget",
+        type=float,
+        default=1.0,
+        help="the time spent per benchmark, in seconds (default: 1)",
+    )
+    run_parser.add_argument("-o", "--output", help="a JSON file for results")
+    run_parser.add_argument(
+        "--compare", metavar="BASELINE", help="compare with a baseline"
+    )
+    run_parser.add_argument("--threshold", type=float, default=0.2)
+
+    compare_parser = commands.add_parser(
+        "compare", help="compare results with a baseline"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="the relative slowdown reported as a regression (default: 0.2)",
+    )
+
+    options = parser.parse_args()
+    if options.command == "compare":
+        regressions = compare(
+            load(options.baseline), load(options.results), options.threshold
+        )
+        sys.exit(1 if regressions else 0)
+
+    baseline = load(options.compare) if options.compare else {}
+    sizes = options.sizes
+    if sizes is None and baseline:
+        sizes = ",".join(
+            s for s in SIZES if any(r.size == s for r in baseline.values())
+        )
+    sizes = (sizes or DEFAULT_SIZES).split(",")
+    unknown = set(sizes) - SIZES.keys()
+    if unknown:
+        parser.error(f"unknown sizes {', '.join(sorted(unknown))}")
+
+    records = run(sizes, options.filter, options.budget)
+    if options.output:
+        save(records, options.output)
+    if options.compare:
+        results = {record.key: record for record in records}
+        regressions = compare(baseline, results, options.threshold)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Speed-up of the ufuncs in :mod:`pitot.raw.ufuncs` over the NumPy expressions
+of the decorated functions.
+
+"expressions" calls :mod:`pitot.isa` and :mod:`pitot.aero`, which allocate
+several full-size temporary arrays per call; "ufunc" and "ufunc out=" use the
+ufuncs of the available backend (Numba if installed, else NumPy in chunks),
+the latter writing into a preallocated array.
+
+Usage::
+
+    python benchmarks/ufuncs.py
+"""
+
+from __future__ import annotations
+
+import timeit
+from typing import Any, Callable
+
+import numpy as np
+from pitot import aero, isa
+from pitot.raw import ufuncs
+
+
+def per_call(fun: Callable[[], Any], number: int = 5) -> float:
+    """Best per-call time over a few repeats, in milliseconds."""
+    timer = timeit.Timer(fun)
+    return min(timer.repeat(repeat=3, number=number)) / number * 1e3
+
+
+def main() -> None:
+    rng = np.random.default_rng(42)
+    print(f"backend: {ufuncs.BACKEND}")
+    print(
+        f"{'function':>12} {'size':>9} {'expressions':>12} "
+        f"{'ufunc':>9} {'ufunc out=':>11}  (ms)"
+    )
+    for size in [10_000, 1_000_000, 10_000_000]:
+        h = rng.uniform(0, 40_000, size)
+        cas = rng.uniform(100, 350, size)
+        out = np.empty(size)
+        cases = {
+            "density": (
+                lambda: isa.density(h * 0.3048),
+                lambda: ufuncs.density(h * 0.3048),
+                lambda: ufuncs.density(h * 0.3048, out=out),
+            ),
+            "cas2tas": (
+                lambda: aero.cas2tas(cas, h),
+                lambda: ufuncs.cas2tas(cas, h),
+                lambda: ufuncs.cas2tas(cas, h, out=out),
+            ),
+            "cas2mach": (
+                lambda: aero.cas2mach(cas, h),
+                lambda: ufuncs.cas2mach(cas, h),
+                lambda: ufuncs.cas2mach(cas, h, out=out),
+            ),
+        }
+        for name, (expressions, ufunc, ufunc_out) in cases.items():
+            print(
+                f"{name:>12} {size:>9} "
+                f"{per_call(expressions):12.2f} "
+                f"{per_call(ufunc):9.2f} "
+                f"{per_call(ufunc_out):11.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
+import importlib
 import warnings
-
-from pint import UnitRegistry
+from typing import Any
 
 ##from pint_pandas import PintType
 
@@ -10,8 +10,39 @@ from pint import UnitRegistry
 
 warnings.filterwarnings("ignore", message=".*unit of the quantity is strip.*")
 
-ureg = UnitRegistry()
-Q_ = ureg.Quantity
+# Submodules and heavy dependencies (pint, pandas, pyproj) are only imported
+# on first access, so that `import pitot` remains cheap.
+_SUBMODULES = {"accessor", "aero", "airac", "geodesy", "isa", "raw"}
+
+
+def __getattr__(name: str) -> Any:
+    if name in _SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    if name in ("factorized", "parallel", "precision", "profile"):
+        from . import raw
+
+        return getattr(raw, name)
+    if name in ("ureg", "Q_"):
+        from pint import UnitRegistry
+
+        ureg = UnitRegistry()
+        # PintType.ureg = ureg
+        # PintType.ureg.default_format = "~P"
+        globals().update(ureg=ureg, Q_=ureg.Quantity)
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
-# PintType.ureg = ureg
-# PintType.ureg.default_format = "~P"
+def __dir__() -> list[str]:
+    return sorted(
+        {
+            *globals(),
+            *_SUBMODULES,
+            "factorized",
+            "parallel",
+            "precision",
+            "profile",
+            "ureg",
+            "Q_",
+        }
+    )
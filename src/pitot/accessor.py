@@ -0,0 +1,374 @@
+"""
+A ``pitot`` accessor for pandas DataFrames, registered when this module is
+imported.
+
+Functions of :mod:`pitot.isa` and :mod:`pitot.aero` are applied to columns
+(passed by name), in chunks of rows: each chunk is evaluated by the kernels
+of :mod:`pitot.raw` with a shared :class:`~pitot.raw.Workspace`, and written
+straight into a result array, allocated once. With pandas 3 (and its
+copy-on-write), the result array backs the new column without a copy, and
+peak memory is then the size of the result columns plus a few chunks,
+whatever the size of the frame; pandas 2 copies each result array once when
+assigning the column.
+
+Units of the input columns are read from ``df.attrs["units"]``, a dictionary
+mapping column names to units (as understood by pint). Columns without units
+are assumed in the default units of each function: m for altitudes in ISA
+functions, ft for altitudes in air speed conversions, kts for air speeds.
+Results are stored in these default units, which are recorded in
+``df.attrs["units"]`` as well.
+
+Methods modify the DataFrame in place and return it, so calls can be
+chained:
+
+>>> import pandas as pd
+>>> import pitot.accessor
+>>> df = pd.DataFrame({"cas": [250.0, 280.0], "alt": [3048.0, 9144.0]})
+>>> df.attrs["units"] = {"alt": "m"}
+>>> df.pitot.cas2tas("cas", "alt").pitot.tas2mach("tas", "alt")
+     cas     alt         tas      mach
+0  250.0  3048.0  288.712271  0.452291
+1  280.0  9144.0  437.421783  0.742245
+>>> df.attrs["units"]
+{'alt': 'm', 'tas': 'kts', 'mach': 'dimensionless'}
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from .raw import aero, isa
+from .raw.isa import Workspace, _precision
+
+__all__ = ["CHUNK_SIZE", "PitotAccessor"]
+
+#: Default number of rows evaluated at once
+CHUNK_SIZE = 1 << 16
+
+
+@functools.lru_cache()
+def _factor(unit: str, target: str) -> float:
+    """Multiplicative factor from a unit to another."""
+    if unit == target:
+        return 1.0
+    from . import ureg
+
+    return float(ureg.Quantity(1.0, unit).to(target).magnitude)
+
+
+def _values(series: pd.Series) -> Any:
+    """A NumPy view of the column if possible, its pandas array otherwise
+    (e.g. nullable types, converted chunk by chunk)."""
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biuf":
+        return series.to_numpy()
+    return series.array
+
+
+def _chunk(values: Any, start: int, stop: int, factor: float) -> Any:
+    chunk = values[start:stop]
+    if not isinstance(chunk, np.ndarray):
+        chunk = chunk.to_numpy(dtype=np.float64, na_value=np.nan)
+    if factor != 1.0:
+        chunk = chunk * factor
+    return chunk
+
+
+@pd.api.extensions.register_dataframe_accessor("pitot")
+class PitotAccessor:
+    """ISA and air speed conversions on DataFrame columns, see
+    :mod:`pitot.accessor`.
+
+    All methods take the names of the input columns and the name(s) of the
+    result column(s), and accept a ``chunk_size`` keyword argument (the
+    number of rows evaluated at once, :data:`CHUNK_SIZE` by default).
+    """
+
+    def __init__(self, frame: pd.DataFrame) -> None:
+        self._obj = frame
+
+    def _apply(
+        self,
+        kernel: Callable[..., Any],
+        inputs: Sequence[Tuple[str, str]],
+        outputs: Sequence[Tuple[str, str]],
+        chunk_size: Optional[int],
+    ) -> pd.DataFrame:
+        """Evaluates the kernel chunk by chunk.
+
+        :param kernel: a function of :mod:`pitot.raw`
+        :param inputs: pairs of (column name, unit expected by the kernel)
+        :param outputs: pairs of (column name, unit returned by the kernel)
+        :param chunk_size: the number of rows evaluated at once
+        """
+        frame = self._obj
+        units: Dict[str, str] = frame.attrs.get("units", {})
+        if chunk_size is None:
+            chunk_size = CHUNK_SIZE
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be positive")
+
+        columns = [_values(frame[name]) for name, _ in inputs]
+        factors = [
+            _factor(units.get(name, unit), unit) for name, unit in inputs
+        ]
+        dtype = _precision.get()
+        if dtype is None:
+            # integers are computed as float64, float32 stays float32
+            dtype = np.result_type(
+                *(
+                    c.dtype if isinstance(c, np.ndarray) else 0.0
+                    for c in columns
+                ),
+                0.0,
+            )
+        results: list[npt.NDArray[Any]] = [
+            np.empty(len(frame), dtype) for _ in outputs
+        ]
+
+        work = Workspace()
+        for start in range(0, len(frame), chunk_size):
+            stop = min(start + chunk_size, len(frame))
+            args = [
+                _chunk(column, start, stop, factor)
+                for column, factor in zip(columns, factors)
+            ]
+            out = tuple(result[start:stop] for result in results)
+            kernel(*args, out=out if len(out) > 1 else out[0], work=work)
+
+        for (name, unit), result in zip(outputs, results):
+            # no copy with copy-on-write (pandas 3): the column is backed by
+            # the result array
+            frame[name] = pd.Series(result, index=frame.index, copy=False)
+            units = {**units, name: unit}
+        frame.attrs["units"] = units
+        return frame
+
+    # ISA functions, altitudes in m by default
+
+    def temperature(
+        self,
+        h: str,
+        name: str = "temperature",
+        *,
+        chunk_size: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Temperature (in K), see :func:`pitot.isa.temperature`.
+
+        :param h: the name of the altitude column (by default in m)
+        :param name: the name of the result column
+        """
+        return self._apply(
+            isa.temperature, [(h, "m")], [(name, "K")], chunk_size
+        )
+
+    def density(
+        self, h: str, name: str = "density", *, chunk_size: Optional[int] = None
+    ) -> pd.DataFrame:
+        """Density (in kg/m3), see :func:`pitot.isa.density`.
+
+        :param h: the name of the altitude column (by default in m)
+        :param name: the name of the result column
+        """
+        return self._apply(
+            isa.density, [(h, "m")], [(name, "kg/m^3")], chunk_size
+        )
+
+    def pressure(
+        self,
+        h: str,
+        name: str = "pressure",
+        *,
+        chunk_size: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Pressure (in Pa), see :func:`pitot.isa.pressure`.
+
+        :param h: the name of the altitude column (by default in m)
+        :param name: the name of the result column
+        """
+        return self._apply(isa.pressure, [(h, "m")], [(name, "Pa")], chunk_size)
+
+    def sound_speed(
+        self,
+        h: str,
+        name: str = "sound_speed",
+        *,
+        chunk_size: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Speed of sound (in m/s), see :func:`pitot.isa.sound_speed`.
+
+        :param h: the name of the altitude column (by default in m)
+        :param name: the name of the result column
+        """
+        return self._apply(
+            isa.sound_speed, [(h, "m")], [(name, "m/s")], chunk_size
+        )
+
+    def atmosphere(
+        self,
+        h: str,
+        names: Tuple[str, str, str] = ("pressure", "density", "temperature"),
+        *,
+        chunk_size: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Pressure (in Pa), density (in kg/m3) and temperature (in K), see
+        :func:`pitot.isa.atmosphere`.
+
+        :param h: the name of the altitude column (by default in m)
+        :param names: the names of the three result columns
+        """
+        units = ("Pa", "kg/m^3", "K")
+        return self._apply(
+            isa.atmosphere, [(h, "m")], list(zip(names, units)), chunk_size
+        )
+
+    # Air speed conversions, altitudes in ft and speeds in kts by default
+
+    def _convert(
+        self,
+        kernel: Callable[..., Any],
+        speed: str,
+        h: str,
+        name: str,
+        chunk_size: Optional[int],
+    ) -> pd.DataFrame:
+        source, target = kernel.__name__.split("2")
+        units = {"mach": "dimensionless"}
+        return self._apply(
+            kernel,
+            [(speed, units.get(source, "kts")), (h, "ft")],
+            [(name, units.get(target, "kts"))],
+            chunk_size,
+        )
+
+    def tas2mach(
+        self,
+        tas: str,
+        h: str,
+        name: str = "mach",
+        *,
+        chunk_size: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Mach number from TAS, see :func:`pitot.aero.tas2mach`.
+
+        :param tas: the name of the TAS column (by default in kts)
+        :param h: the name of the altitude column (by default in ft)
+        :param name: the name of the result column
+        """
+        return self._convert(aero.tas2mach, tas, h, name, chunk_size)
+
+    def mach2tas(
+        self,
+        mach: str,
+        h: str,
+        name: str = "tas",
+        *,
+        chunk_size: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """TAS (in kts) from Mach number, see :func:`pitot.aero.mach2tas`.
+
+        :param mach: the name of the Mach number column
+        :param h: the name of the altitude column (by default in ft)
+        :param name: the name of the result column
+        """
+        return self._convert(aero.mach2tas, mach, h, name, chunk_size)
+
+    def eas2tas(
+        self,
+        eas: str,
+        h: str,
+        name: str = "tas",
+        *,
+        chunk_size: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """TAS (in kts) from EAS, see :func:`pitot.aero.eas2tas`.
+
+        :param eas: the name of the EAS column (by default in kts)
+        :param h: the name of the altitude column (by default in ft)
+        :param name: the name of the result column
+        """
+        return self._convert(aero.eas2tas, eas, h, name, chunk_size)
+
+    def tas2eas(
+        self,
+        tas: str,
+        h: str,
+        name: str = "eas",
+        *,
+        chunk_size: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """EAS (in kts) from TAS, see :func:`pitot.aero.tas2eas`.
+
+        :param tas: the name of the TAS column (by default in kts)
+        :param h: the name of the altitude column (by default in ft)
+        :param name: the name of the result column
+        """
+        return self._convert(aero.tas2eas, tas, h, name, chunk_size)
+
+    def cas2tas(
+        self,
+        cas: str,
+        h: str,
+        name: str = "tas",
+        *,
+        chunk_size: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """TAS (in kts) from CAS, see :func:`pitot.aero.cas2tas`.
+
+        :param cas: the name of the CAS column (by default in kts)
+        :param h: the name of the altitude column (by default in ft)
+        :param name: the name of the result column
+        """
+        return self._convert(aero.cas2tas, cas, h, name, chunk_size)
+
+    def tas2cas(
+        self,
+        tas: str,
+        h: str,
+        name: str = "cas",
+        *,
+        chunk_size: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """CAS (in kts) from TAS, see :func:`pitot.aero.tas2cas`.
+
+        :param tas: the name of the TAS column (by default in kts)
+        :param h: the name of the altitude column (by default in ft)
+        :param name: the name of the result column
+        """
+        return self._convert(aero.tas2cas, tas, h, name, chunk_size)
+
+    def mach2cas(
+        self,
+        mach: str,
+        h: str,
+        name: str = "cas",
+        *,
+        chunk_size: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """CAS (in kts) from Mach number, see :func:`pitot.aero.mach2cas`.
+
+        :param mach: the name of the Mach number column
+        :param h: the name of the altitude column (by default in ft)
+        :param name: the name of the result column
+        """
+        return self._convert(aero.mach2cas, mach, h, name, chunk_size)
+
+    def cas2mach(
+        self,
+        cas: str,
+        h: str,
+        name: str = "mach",
+        *,
+        chunk_size: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """Mach number from CAS, see :func:`pitot.aero.cas2mach`.
+
+        :param cas: the name of the CAS column (by default in kts)
+        :param h: the name of the altitude column (by default in ft)
+        :param name: the name of the result column
+        """
+        return self._convert(aero.cas2mach, cas, h, name, chunk_size)
@@ -1,4 +1,5 @@
-from typing import Any
+import math
+from typing import Any, NamedTuple, Optional, Sequence
 
 from impunity import impunity
 from typing_extensions import Annotated
@@ -6,8 +7,14 @@ from typing_extensions import Annotated
 import numpy as np
 
 from . import isa
+from .raw import aero as raw
+from .raw.isa import Workspace, _cast, _precision
+from .raw.profiling import profiled
 
 __all__ = [
+    "Airspeeds",
+    "WindTriangle",
+    "airspeeds",
     "cas2mach",
     "cas2tas",
     "eas2tas",
@@ -16,137 +23,559 @@ __all__ = [
     "tas2cas",
     "tas2eas",
     "tas2mach",
+    "wind_triangle",
 ]
 
 
+# (impunity only parses subscripted annotations with a unit)
+_Workspace = Optional[Workspace]
+
+
 @impunity
 def tas2mach(
-    tas: Annotated[Any, "kts"], h: Annotated[Any, "ft"]
+    tas: Annotated[Any, "kts"],
+    h: Annotated[Any, "ft"],
+    out: Any = None,
+    work: _Workspace = None,
 ) -> Annotated[Any, "dimensionless"]:
     """
     :param tas: True Air Speed, (by default in kts)
     :param h: altitude, (by default in ft)
+    :param out: an optional array, where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
 
     :return: Mach number (dimensionless)
     """
-    a = isa.sound_speed(h)
-    M: Annotated[Any, "dimensionless"] = tas / a
-    return M
+    return raw.tas2mach(tas, h, out=out, work=work)
+
+
+# (not as a decorator, impunity rewrites the source of decorated functions)
+tas2mach = profiled(tas2mach, kernel=False)
 
 
 @impunity
 def mach2tas(
-    M: Annotated[Any, "dimensionless"], h: Annotated[Any, "ft"]
+    M: Annotated[Any, "dimensionless"],
+    h: Annotated[Any, "ft"],
+    out: Any = None,
+    work: _Workspace = None,
 ) -> Annotated[Any, "kts"]:
     """
     :param M: Mach number (dimensionless)
     :param h: altitude, (by default in ft)
+    :param out: an optional array, where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
 
     :param tas: True Air Speed, (in kts)
     """
-    a = isa.sound_speed(h)
-    tas: Annotated[Any, "kts"] = M * a
-    return tas
+    return raw.mach2tas(M, h, out=out, work=work)
+
+
+mach2tas = profiled(mach2tas, kernel=False)
 
 
 @impunity
 def eas2tas(
-    eas: Annotated[Any, "kts"], h: Annotated[Any, "ft"]
+    eas: Annotated[Any, "kts"],
+    h: Annotated[Any, "ft"],
+    out: Any = None,
+    work: _Workspace = None,
 ) -> Annotated[Any, "kts"]:
     """
     :param eas: Equivalent Air Speed, (by default in kts)
     :param h: altitude, (by default in ft)
+    :param out: an optional array, where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
 
     :return: True Air Speed, (in kts)
     """
-    rho = isa.density(h)
-    tas: Annotated[Any, "kts"] = eas * np.sqrt(isa.RHO_0 / rho)
-    return tas
+    return raw.eas2tas(eas, h, out=out, work=work)
+
+
+eas2tas = profiled(eas2tas, kernel=False)
 
 
 @impunity
 def tas2eas(
-    tas: Annotated[Any, "kts"], h: Annotated[Any, "ft"]
+    tas: Annotated[Any, "kts"],
+    h: Annotated[Any, "ft"],
+    out: Any = None,
+    work: _Workspace = None,
 ) -> Annotated[Any, "kts"]:
     """
     :param tas: True Air Speed, (by default in kts)
     :param h: altitude, (by default in ft)
+    :param out: an optional array, where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
 
     :return: Equivalent Air Speed, (in kts)
     """
-    rho = isa.density(h)
-    eas: Annotated[Any, "kts"] = tas * np.sqrt(rho / isa.RHO_0)
-    return eas
+    return raw.tas2eas(tas, h, out=out, work=work)
+
+
+tas2eas = profiled(tas2eas, kernel=False)
 
 
 @impunity
 def cas2tas(
-    cas: Annotated[Any, "kts"], h: Annotated[Any, "ft"]
+    cas: Annotated[Any, "kts"],
+    h: Annotated[Any, "ft"],
+    out: Any = None,
+    work: _Workspace = None,
 ) -> Annotated[Any, "kts"]:
     """
     :param cas: Computed Air Speed, (by default in kts)
     :param h: altitude, (by default in ft)
+    :param out: an optional array, where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
 
     :return: True Air Speed, (in kts)
     """
-    p, rho, _temp = isa.atmosphere(h)
-    qdyn: Annotated[Any, "Pa"] = isa.P_0 * (
-        (1.0 + isa.RHO_0 * cas * cas / (7.0 * isa.P_0)) ** 3.5 - 1.0
-    )
-    tas: Annotated[Any, "m/s"] = np.sqrt(
-        7.0 * p / rho * ((1.0 + qdyn / p) ** (2.0 / 7.0) - 1.0)
-    )
-    tas = np.where(cas < 0, -1 * tas, tas)
-    return tas
+    return raw.cas2tas(cas, h, out=out, work=work)
+
+
+cas2tas = profiled(cas2tas, kernel=False)
 
 
 @impunity
 def tas2cas(
-    tas: Annotated[Any, "kts"], h: Annotated[Any, "ft"]
+    tas: Annotated[Any, "kts"],
+    h: Annotated[Any, "ft"],
+    out: Any = None,
+    work: _Workspace = None,
 ) -> Annotated[Any, "kts"]:
     """
     :param tas: True Air Speed, (by default in kts)
     :param h: altitude, (by default in ft)
+    :param out: an optional array, where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
 
     :return: Computed Air Speed, (in kts)
     """
-    p, rho, _temp = isa.atmosphere(h)
-    qdyn = p * ((1.0 + rho * tas * tas / (7.0 * p)) ** 3.5 - 1.0)
-    cas: Annotated[Any, "m/s"] = np.sqrt(
-        7.0
-        * isa.P_0
-        / isa.RHO_0
-        * ((qdyn / isa.P_0 + 1.0) ** (2.0 / 7.0) - 1.0)
-    )
-    cas = np.where(tas < 0, -1 * cas, cas)
-    return cas
+    return raw.tas2cas(tas, h, out=out, work=work)
+
+
+tas2cas = profiled(tas2cas, kernel=False)
 
 
 @impunity
 def mach2cas(
-    M: Annotated[Any, "dimensionless"], h: Annotated[Any, "ft"]
+    M: Annotated[Any, "dimensionless"],
+    h: Annotated[Any, "ft"],
+    out: Any = None,
+    work: _Workspace = None,
 ) -> Annotated[Any, "kts"]:
     """
     :param M: Mach number
     :param h: altitude, (by default in ft)
+    :param out: an optional array, where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
 
     :return: Computed Air Speed, (in kts)
     """
-    tas = mach2tas(M, h)
-    cas = tas2cas(tas, h)
-    return cas
+    return raw.mach2cas(M, h, out=out, work=work)
+
+
+mach2cas = profiled(mach2cas, kernel=False)
 
 
 @impunity
 def cas2mach(
-    cas: Annotated[Any, "kts"], h: Annotated[Any, "ft"]
+    cas: Annotated[Any, "kts"],
+    h: Annotated[Any, "ft"],
+    out: Any = None,
+    work: _Workspace = None,
 ) -> Annotated[Any, "dimensionless"]:
     """
     :param cas: Computed Air Speed, (by default in kts)
     :param h: altitude, (by default in ft)
+    :param out: an optional array, where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
 
     :return: Mach number (dimensionless)
     """
-    tas = cas2tas(cas, h)
-    M = tas2mach(tas, h)
-    return M
+    return raw.cas2mach(cas, h, out=out, work=work)
+
+
+cas2mach = profiled(cas2mach, kernel=False)
+
+
+# one knot and one foot, in SI units
+KTS: Annotated[float, "m/s"] = raw.KTS
+FT: Annotated[float, "m"] = raw.FT
+
+SPEEDS = ("tas", "cas", "eas", "mach")
+
+
+class Airspeeds(NamedTuple):
+    """Air speeds returned by :func:`airspeeds`, None if not requested."""
+
+    #: True Air Speed (in kts)
+    tas: Annotated[Any, "kts"] = None
+    #: Computed Air Speed (in kts)
+    cas: Annotated[Any, "kts"] = None
+    #: Equivalent Air Speed (in kts)
+    eas: Annotated[Any, "kts"] = None
+    #: Mach number (dimensionless)
+    mach: Annotated[Any, "dimensionless"] = None
+
+
+def _inplace(x: Any) -> Any:
+    """Ensures in-place operations are possible, also on scalars."""
+    return np.array(x, ndmin=1) if np.ndim(x) == 0 else x
+
+
+def _divide(x: Any, y: Any) -> Any:
+    """Divides in place unless broadcasting is necessary."""
+    if np.shape(x) == np.broadcast_shapes(np.shape(x), np.shape(y)):
+        return np.divide(x, y, out=x)
+    return np.divide(x, y)
+
+
+def _multiply(x: Any, y: Any) -> Any:
+    """Multiplies in place unless broadcasting is necessary."""
+    if np.shape(x) == np.broadcast_shapes(np.shape(x), np.shape(y)):
+        return np.multiply(x, y, out=x)
+    return np.multiply(x, y)
+
+
+def _sound_speed(h: Any) -> Any:
+    """Speed of sound (in m/s) at altitude h (in ft), in a single array.
+
+    It is only evaluated when needed, after other temporary arrays are
+    released.
+    """
+    a = _inplace(np.multiply(h, FT))
+    np.multiply(a, isa.BETA_T, out=a)
+    a += 288.15
+    np.maximum(a, isa.STRATOSPHERE_TEMP, out=a)
+    a *= isa.GAMMA * isa.R
+    return np.sqrt(a, out=a)
+
+
+def _airspeeds(
+    h: Any, source: str, value: Any, outputs: Sequence[str]
+) -> Airspeeds:
+    """Single pass over the atmosphere: h in ft, speeds in kts."""
+    if unknown := set(outputs) - set(SPEEDS):
+        raise ValueError(f"Unknown outputs {unknown}, expected {SPEEDS}")
+    needed = {source, *outputs}
+    h, value = _cast(h), _cast(value)
+
+    # Only the quantities of the atmosphere which are actually needed are
+    # evaluated, and temporary arrays are reused in place when possible.
+    shape = np.broadcast_shapes(np.shape(h), np.shape(value))
+    alt = _inplace(np.multiply(h, FT))
+    temp = np.multiply(alt, isa.BETA_T)
+    temp += 288.15
+    np.maximum(temp, isa.STRATOSPHERE_TEMP, out=temp)
+
+    p: Any = None
+    rho: Any = None
+    if needed & {"cas", "eas"}:
+        # height above the tropopause
+        delta = np.subtract(alt, isa.H_TROP, out=alt)
+        np.maximum(delta, 0, out=delta)
+        ratio = np.divide(temp, 288.15, out=temp)
+        rho = np.power(ratio, 4.256848)
+        factor = np.multiply(delta, -1 / 6341.5522)
+        rho *= np.exp(factor, out=factor)
+        rho *= isa.RHO_0
+        if "cas" in needed:
+            exponent = -isa.G_0 / (isa.BETA_T * isa.R)
+            p = np.power(ratio, exponent, out=ratio)
+            factor = np.multiply(
+                delta, -isa.G_0 / (isa.R * isa.STRATOSPHERE_TEMP), out=delta
+            )
+            p *= np.exp(factor, out=factor)
+            p *= isa.P_0
+        del delta, ratio, factor
+    del alt, temp
+
+    dtype = _precision.get()
+    if dtype is None:
+        dtype = np.dtype(np.float64)
+    value = _inplace(np.asarray(value, dtype=dtype))
+    if source == "tas":
+        tas = value * KTS
+    elif source == "mach":
+        tas = value * _sound_speed(h)
+    elif source == "eas":
+        tas = np.divide(isa.RHO_0, rho)
+        np.sqrt(tas, out=tas)
+        tas = _multiply(tas, value)
+        tas *= KTS
+    else:  # "cas"
+        qdyn = np.square(value)
+        qdyn *= isa.RHO_0 * KTS * KTS / (7.0 * isa.P_0)
+        qdyn += 1.0
+        qdyn **= 3.5
+        qdyn -= 1.0
+        qdyn *= isa.P_0
+        qdyn = _divide(qdyn, p)
+        qdyn += 1.0
+        qdyn **= 2.0 / 7.0
+        qdyn -= 1.0
+        qdyn *= 7.0
+        qdyn *= p
+        qdyn /= rho
+        tas = np.sqrt(qdyn, out=qdyn)
+        np.copysign(tas, value, out=tas)
+    if tas.size < math.prod(shape):  # e.g. a scalar speed at several altitudes
+        tas = np.broadcast_to(tas, shape).copy()
+
+    result: dict[str, Any] = dict(tas=None, cas=None, eas=None, mach=None)
+    if source in outputs:
+        result[source] = value.copy()
+    if "cas" in outputs and source != "cas":
+        qdyn = np.square(tas)
+        qdyn *= rho
+        qdyn /= p
+        qdyn *= 1 / 7.0
+        qdyn += 1.0
+        qdyn **= 3.5
+        qdyn -= 1.0
+        qdyn *= p
+        qdyn *= 1 / isa.P_0
+        qdyn += 1.0
+        qdyn **= 2.0 / 7.0
+        qdyn -= 1.0
+        qdyn *= 7.0 * isa.P_0 / isa.RHO_0
+        cas = np.sqrt(qdyn, out=qdyn)
+        cas *= 1 / KTS
+        result["cas"] = np.copysign(cas, tas, out=cas)
+    del p
+    if "eas" in outputs and source != "eas":
+        eas = np.divide(rho, isa.RHO_0, out=rho)
+        np.sqrt(eas, out=eas)
+        eas = _multiply(eas, tas)
+        eas *= 1 / KTS
+        result["eas"] = eas
+    del rho
+    if "mach" in outputs and source != "mach":
+        a = _sound_speed(h)
+        if a.shape == tas.shape:
+            result["mach"] = np.divide(tas, a, out=a)
+        else:  # e.g. several speeds at a scalar altitude
+            result["mach"] = np.divide(tas, a)
+        del a
+    if "tas" in outputs and source != "tas":
+        tas *= 1 / KTS
+        result["tas"] = tas
+
+    for key, array in result.items():
+        if array is not None:
+            if array.size == math.prod(shape):
+                array = array.reshape(shape)
+            else:  # e.g. a scalar speed at several altitudes
+                array = np.broadcast_to(array, shape).copy()
+            result[key] = array[()]
+    return Airspeeds(**result)
+
+
+@impunity
+def airspeeds(
+    h: Annotated[Any, "ft"],
+    *,
+    tas: Annotated[Any, "kts"] = None,
+    cas: Annotated[Any, "kts"] = None,
+    eas: Annotated[Any, "kts"] = None,
+    mach: Annotated[Any, "dimensionless"] = None,
+    outputs: Sequence[str] = SPEEDS,
+) -> Airspeeds:
+    """Converts one air speed into several others in a single pass.
+
+    The atmosphere is only evaluated once for all the requested conversions,
+    and temporary arrays are reused, which is much lighter than chaining the
+    individual conversion functions.
+
+    Exactly one of tas, cas, eas or mach must be passed.
+
+    :param h: altitude, (by default in ft)
+    :param tas: True Air Speed, (by default in kts)
+    :param cas: Computed Air Speed, (by default in kts)
+    :param eas: Equivalent Air Speed, (by default in kts)
+    :param mach: Mach number (dimensionless)
+    :param outputs: the names of the requested air speeds, among "tas",
+        "cas", "eas" and "mach"
+
+    :return: an :class:`Airspeeds` tuple, speeds in kts
+
+    >>> airspeeds(15_000, cas=100, outputs=("tas", "mach"))
+    Airspeeds(tas=np.float64(125.79...), cas=None, eas=None, \
+mach=np.float64(0.200...))
+    """
+    given = {
+        key: value
+        for key, value in zip(SPEEDS, (tas, cas, eas, mach))
+        if value is not None
+    }
+    if len(given) != 1:
+        raise ValueError("Exactly one of tas, cas, eas or mach must be set")
+    ((source, value),) = given.items()
+    return _airspeeds(h, source, value, outputs)
+
+
+airspeeds = profiled(airspeeds)
+
+
+class WindTriangle(NamedTuple):
+    """Ground and air vectors returned by :func:`wind_triangle`, with the
+    air speeds computed from the TAS (None if not requested)."""
+
+    #: Ground speed (in kts)
+    gs: Annotated[Any, "kts"]
+    #: Track angle (in degrees, within [0, 360))
+    track: Annotated[Any, "degree"]
+    #: True Air Speed (in kts)
+    tas: Annotated[Any, "kts"]
+    #: Heading (in degrees, within [0, 360))
+    heading: Annotated[Any, "degree"]
+    #: Drift angle, from heading to track (in degrees, within [-180, 180))
+    drift: Annotated[Any, "degree"]
+    #: Computed Air Speed (in kts)
+    cas: Annotated[Any, "kts"] = None
+    #: Equivalent Air Speed (in kts)
+    eas: Annotated[Any, "kts"] = None
+    #: Mach number (dimensionless)
+    mach: Annotated[Any, "dimensionless"] = None
+
+
+def _wrap(angle: Any, low: float) -> Any:
+    """Wraps angles (in degrees) in place to [low, low + 360)."""
+    turns = np.subtract(angle, low)
+    turns *= 1 / 360
+    np.floor(turns, out=turns)
+    turns *= 360
+    angle -= turns
+    return angle
+
+
+def _wind_triangle(
+    speed: Any,
+    angle: Any,
+    wind_u: Any,
+    wind_v: Any,
+    h: Any,
+    inverse: bool,
+    outputs: Sequence[str],
+) -> WindTriangle:
+    """Single pass over the vectors: speeds in kts, angles in degrees."""
+    outputs = [name for name in outputs if name != "tas"]
+    if outputs and h is None:
+        raise ValueError("h is needed for air speeds (or pass outputs=())")
+    dtype = _precision.get()
+    if dtype is None:
+        dtype = np.dtype(np.float64)
+    speed = np.asarray(_cast(speed), dtype=dtype)
+    angle = np.asarray(_cast(angle), dtype=dtype)
+    shape = np.broadcast_shapes(
+        speed.shape,
+        angle.shape,
+        np.shape(wind_u),
+        np.shape(wind_v),
+        np.shape(h) if outputs else (),
+    )
+
+    # sine and cosine from the tangent of the half angle, which is much
+    # cheaper to evaluate on large arrays
+    t = _inplace(np.multiply(np.broadcast_to(angle, shape), math.pi / 360))
+    np.tan(t, out=t)
+    t2 = np.square(t)
+    x = np.multiply(t, 2.0, out=t)
+    y = np.subtract(1.0, t2)
+    t2 += 1.0
+    x /= t2
+    y /= t2
+    del t2
+
+    # east (x) and north (y) components of the other vector: the air vector
+    # is the ground vector minus the wind vector
+    x *= speed
+    y *= speed
+    if inverse:
+        x += _cast(wind_u)
+        y += _cast(wind_v)
+    else:
+        x -= _cast(wind_u)
+        y -= _cast(wind_v)
+    other = np.multiply(x, x)
+    other += np.square(y)
+    np.sqrt(other, out=other)
+    other_angle = np.arctan2(x, y, out=x)
+    del y
+    np.degrees(other_angle, out=other_angle)
+    _wrap(other_angle, 0)
+
+    given = _inplace(np.broadcast_to(speed, shape).copy())
+    given_angle = _wrap(_inplace(np.broadcast_to(angle, shape).copy()), 0)
+    if inverse:
+        gs, track, tas, heading = other, other_angle, given, given_angle
+    else:
+        gs, track, tas, heading = given, given_angle, other, other_angle
+    drift = _wrap(np.subtract(track, heading), -180)
+
+    speeds = Airspeeds()
+    if outputs:
+        speeds = _airspeeds(h, "tas", tas.reshape(shape), outputs)
+
+    return WindTriangle(
+        gs=gs.reshape(shape)[()],
+        track=track.reshape(shape)[()],
+        tas=tas.reshape(shape)[()],
+        heading=heading.reshape(shape)[()],
+        drift=drift.reshape(shape)[()],
+        cas=speeds.cas,
+        eas=speeds.eas,
+        mach=speeds.mach,
+    )
+
+
+@impunity
+def wind_triangle(
+    speed: Annotated[Any, "kts"],
+    angle: Annotated[Any, "degree"],
+    wind_u: Annotated[Any, "kts"],
+    wind_v: Annotated[Any, "kts"],
+    h: Annotated[Any, "ft"] = None,
+    *,
+    inverse: bool = False,
+    outputs: Sequence[str] = ("cas", "mach"),
+) -> WindTriangle:
+    """Solves the wind triangle, and computes air speeds in a single pass.
+
+    By default, the ground speed and track (e.g. from ADS-B) give the TAS and
+    heading. With ``inverse=True``, the TAS and heading give the ground speed
+    and track. In both cases, the requested air speeds are computed from the
+    TAS with one evaluation of the atmosphere, as in :func:`airspeeds`.
+
+    :param speed: ground speed, or TAS if inverse, (by default in kts)
+    :param angle: track angle, or heading if inverse, (by default in degrees)
+    :param wind_u: eastward component of the wind, (by default in kts)
+    :param wind_v: northward component of the wind, (by default in kts)
+    :param h: altitude, (by default in ft), only needed for air speeds
+    :param inverse: if True, speed and angle are the TAS and heading
+    :param outputs: the names of the requested air speeds, among "cas",
+        "eas" and "mach"
+
+    :return: a :class:`WindTriangle` tuple, speeds in kts and angles in
+        degrees
+
+    >>> wind_triangle(450, 90, 0, -50, 35_000)
+    WindTriangle(gs=np.float64(450.0), track=np.float64(90.0), \
+tas=np.float64(452.76...), heading=np.float64(83.65...), \
+drift=np.float64(6.34...), cas=np.float64(266.43...), eas=None, \
+mach=np.float64(0.785...))
+    """
+    return _wind_triangle(speed, angle, wind_u, wind_v, h, inverse, outputs)
+
+
+wind_triangle = profiled(wind_triangle)
@@ -1,12 +1,28 @@
 from __future__ import annotations
 
+import functools
 from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Any, Dict, Tuple
 
-import pandas as pd
+import numpy as np
+import numpy.typing as npt
+
+from .raw.profiling import profiled
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 AIRAC_EPOCH = datetime(1998, 1, 29, tzinfo=timezone.utc)
 
+# the range of years covered by the precomputed table of cycles
+AIRAC_TABLE_YEARS = (1998, 2100)
+
+# the same epoch and cycle duration, for integer arithmetic
+_EPOCH_DAY = np.datetime64("1998-01-29", "D")
+_CYCLE_NS = 28 * 86400 * 10**9
 
+
+@profiled
 def airac_cycle(
     timestamp: None | str | datetime = None,
     template: str = "{year:02d}{ordinal:02d}",
@@ -20,6 +36,8 @@ def airac_cycle(
     >>> airac_cycle('2027-01-30')
     '2701'
     """
+    import pandas as pd
+
     if timestamp is None:
         timestamp = datetime.now(timezone.utc)
 
@@ -34,6 +52,7 @@ def airac_cycle(
     return template.format(year=effective.year % 100, ordinal=ordinal)
 
 
+@profiled
 def airac_year_epoch(year: int) -> datetime:
     """Returns the effective date of the first AIRAC for the given year.
 
@@ -45,9 +64,12 @@ def airac_year_epoch(year: int) -> datetime:
     return beg - timedelta(days=extra_days - 28)
 
 
+@profiled
 def airac_interval(airac: str) -> tuple[datetime, datetime]:
     """Returns the interval of dates for an (ICAO) AIRAC.
 
+    The interval is looked up in a precomputed table (see :func:`airac_table`).
+
     >>> airac_interval("2403")
     (datetime.datetime(2024, 3, 21, ...), datetime.datetime(2024, 4, 18, ...))
     """
@@ -60,18 +82,185 @@ def airac_interval(airac: str) -> tuple[datetime, datetime]:
     if not (1 <= cycle <= 14):
         raise ValueError("Cycle must be between 1 and 14.")
 
-    # Extract year from airac and find the year epoch
-    year = int(airac[:2])
-    # Assuming year is 2000 + last two digits (adjust if your logic differs)
-    full_year = 2000 + year
-    y_epoch = airac_year_epoch(full_year)
+    # Idents are looked up among years 2000 + last two digits
+    interval = _airac_idents().get(airac)
+    if interval is None:
+        raise ValueError(f"AIRAC {airac} does not exist.")
+    return interval
+
+
+def _serials(
+    timestamps: Any,
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.bool_]]:
+    """Number of cycles since AIRAC_EPOCH, and the mask of valid timestamps.
+
+    Timezone-naive timestamps are considered in UTC, as in
+    :func:`airac_cycle`.
+    """
+    import pandas as pd
+
+    index = pd.DatetimeIndex(pd.to_datetime(timestamps, utc=True))
+    valid = ~index.isna()
+    epoch = pd.Timestamp(AIRAC_EPOCH).as_unit("ns").value
+    ns = np.where(valid, index.as_unit("ns").asi8, epoch)
+    serials: npt.NDArray[np.int64] = (ns - epoch) // _CYCLE_NS
+    return serials, valid
+
+
+def _cycle_codes(serials: npt.NDArray[np.int64]) -> npt.NDArray[np.int64]:
+    """Integer codes (e.g. 2301) of the cycles with the given serials."""
+    effective = _EPOCH_DAY + 28 * serials
+    year = effective.astype("datetime64[Y]")
+    ordinal = (effective - year).astype(np.int64) // 28 + 1
+    codes: npt.NDArray[np.int64] = (year.astype(np.int64) + 1970) % 100 * 100
+    codes += ordinal
+    return codes
+
+
+@profiled
+def airac_cycles(
+    timestamps: Any,
+    *,
+    categorical: bool = False,
+    template: str = "{year:02d}{ordinal:02d}",
+) -> Any:
+    """Returns the AIRAC cycles for many timestamps at once.
+
+    This is the vectorised version of :func:`airac_cycle`: cycles are computed
+    with integer arithmetic, and each distinct cycle is only formatted once.
+
+    :param timestamps: an array of datetime64 values, a pandas Series or a
+        DatetimeIndex (or anything :func:`pandas.to_datetime` accepts)
+    :param categorical: if True, returns a pandas Categorical of cycle
+        strings, formatted with the template; otherwise integer codes
+        (e.g. 2301), and -1 for missing timestamps
+    :param template: the format of cycle strings, as in :func:`airac_cycle`
+
+    :return: a NumPy array or a Categorical, or a Series with the same index
+        if a Series is passed
+
+    >>> airac_cycles(np.array(["2023-01-19", "2023-01-26"], dtype="M8[ns]"))
+    array([2213, 2301])
+    >>> dates = ["2023-01-19", "2023-01-26", None]
+    >>> cycles = airac_cycles(dates, categorical=True)
+    >>> list(cycles), list(cycles.categories)
+    (['2213', '2301', nan], ['2213', '2301'])
+    """
+    import pandas as pd
+
+    serials, valid = _serials(timestamps)
+    first, last = 0, 0
+    if valid.any():
+        first, last = serials[valid].min(), serials[valid].max()
+
+    # only the (few) cycles in the range are computed, then broadcast
+    codes = _cycle_codes(np.arange(first, last + 1))
+    offsets = np.where(valid, serials - first, -1)
+    if categorical:
+        labels = [
+            template.format(year=code // 100, ordinal=code % 100)
+            for code in codes
+        ]
+        # two-digit years repeat every century
+        label_codes, categories = pd.factorize(np.array(labels))
+        offsets = np.where(valid, label_codes.take(offsets, mode="clip"), -1)
+        result: Any = pd.Categorical.from_codes(offsets, categories)
+        # skip the cycles which are not represented
+        result = result.remove_unused_categories()
+    else:
+        result = np.where(valid, codes.take(offsets, mode="clip"), -1)
+
+    if isinstance(timestamps, pd.Series):
+        return pd.Series(result, index=timestamps.index, name=timestamps.name)
+    return result
+
+
+@functools.lru_cache()
+def _airac_table() -> pd.DataFrame:
+    import pandas as pd
+
+    first_year, last_year = AIRAC_TABLE_YEARS
+    first, _ = _serials([datetime(first_year, 1, 1, tzinfo=timezone.utc)])
+    last, _ = _serials([datetime(last_year, 12, 31, tzinfo=timezone.utc)])
+    serials = np.arange(first[0], last[0] + 1)
+    start = pd.Timestamp(AIRAC_EPOCH).as_unit("ns") + pd.to_timedelta(
+        serials * _CYCLE_NS
+    )
+    return pd.DataFrame(
+        {
+            "serial": serials,
+            "ident": [f"{code:04d}" for code in _cycle_codes(serials)],
+            "start": start,
+            "end": start + pd.Timedelta(_CYCLE_NS),
+        }
+    )
+
+
+@profiled
+def airac_table() -> pd.DataFrame:
+    """Returns the table of all AIRAC cycles between 1998 and 2100.
+
+    The table is computed once, then cached. Rows are sorted in chronological
+    order, with the following columns:
+
+    - serial: the number of cycles since the AIRAC epoch (1998-01-29);
+    - ident: the cycle identifier, e.g. "2301";
+    - start, end: the (UTC) bounds of the cycle, end excluded.
+
+    Row positions match the output of :func:`airac_bucket`. An IntervalIndex
+    for pandas lookups is available with
+    ``pd.IntervalIndex.from_arrays(table.start, table.end, closed="left")``.
 
-    # Calculate the beginning and end of the AIRAC interval
-    a_beg = y_epoch + timedelta(days=(cycle - 1) * 28)
-    if airac_cycle(a_beg) != airac:
-        raise ValueError(f"AIRAC mismatch for calculated start date: {a_beg}")
+    >>> table = airac_table()
+    >>> table.query('ident == "2301"')
+         serial ident                     start                       end
+    327     326  2301 2023-01-26 00:00:00+00:00 2023-02-23 00:00:00+00:00
+    """
+    return _airac_table().copy()
+
+
+@functools.lru_cache()
+def _airac_idents() -> Dict[str, Tuple[datetime, datetime]]:
+    """Intervals for each ident, among years 2000 to 2099 (as ICAO idents
+    only have two digits for the year)."""
+    idents = {}
+    for serial, ident in zip(_airac_table().serial, _airac_table().ident):
+        start = AIRAC_EPOCH + timedelta(days=28 * int(serial))
+        if 2000 <= start.year < 2100:
+            idents[ident] = (start, start + timedelta(days=28))
+    return idents
+
+
+@profiled
+def airac_bucket(timestamps: Any) -> Any:
+    """Maps timestamps to their row in :func:`airac_table`.
+
+    Buckets are computed with integer arithmetic on cycle serials, which is
+    equivalent to a ``searchsorted`` over the start dates of the table, but in
+    constant time per timestamp. Results are suited for partitioning data by
+    cycle, or for joining with the table.
+
+    :param timestamps: an array of datetime64 values, a pandas Series or a
+        DatetimeIndex (or anything :func:`pandas.to_datetime` accepts)
+
+    :return: positions in the table, -1 for missing timestamps and timestamps
+        outside the table; a Series with the same index if a Series is passed
+
+    >>> table = airac_table()
+    >>> bucket = airac_bucket(["2023-01-25", "2023-02-01", None])
+    >>> bucket
+    array([326, 327,  -1])
+    >>> table.ident.take(bucket[bucket >= 0]).tolist()
+    ['2213', '2301']
+    """
+    import pandas as pd
 
-    a_end = a_beg + timedelta(days=28)
+    table = _airac_table()
+    serials, valid = _serials(timestamps)
+    positions = serials - table.serial.iloc[0]
+    valid &= (positions >= 0) & (positions < len(table))
+    result = np.where(valid, positions, -1)
 
-    # Return the interval
-    return a_beg, a_end
+    if isinstance(timestamps, pd.Series):
+        return pd.Series(result, index=timestamps.index, name=timestamps.name)
+    return result
@@ -6,12 +6,168 @@ All angles are in degrees, all distances are in meter.
 
 from __future__ import annotations
 
-from typing import Any, List, Tuple
+import math
+import threading
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Tuple
 
 from impunity import impunity
 from typing_extensions import Annotated
 
-from pyproj import Geod
+import numpy as np
+import numpy.typing as npt
+
+from .raw.arrow import arrow_io
+from .raw.executor import parallelizable
+from .raw.profiling import profiled
+
+if TYPE_CHECKING:
+    from pyproj import Geod
+
+_geod_lock = threading.Lock()
+_geod_cache: Dict[str, Geod] = {}
+
+
+def get_geod(ellps: str = "WGS84") -> Geod:
+    """Returns the geodesic engine associated to an ellipsoid.
+
+    Building a :class:`pyproj.Geod` object is much more expensive than solving
+    a geodesic problem on a few points, so engines are created once and shared
+    process-wide. Concurrent first calls from several threads return the same
+    instance.
+
+    :param ellps: the name of the ellipsoid, as known by pyproj (e.g. "WGS84",
+        "GRS80", "sphere")
+
+    :return: the (cached) :class:`pyproj.Geod` instance
+
+    >>> get_geod() is get_geod("WGS84")
+    True
+    """
+    geod = _geod_cache.get(ellps)
+    if geod is None:
+        with _geod_lock:
+            geod = _geod_cache.get(ellps)
+            if geod is None:
+                from pyproj import Geod
+
+                geod = _geod_cache[ellps] = Geod(ellps=ellps)
+    return geod
+
+
+#: Methods available to solve geodesic problems:
+#:
+#: - "geodesic": exact solution on the ellipsoid (pyproj);
+#: - "haversine": great circles on a sphere of same mean radius;
+#: - "equirectangular": equirectangular projection at the mean latitude of
+#:   each pair of points;
+#: - "flat": local flat-earth projection around a reference point, with the
+#:   radii of curvature of the ellipsoid at that point.
+METHODS = ("geodesic", "haversine", "equirectangular", "flat")
+
+
+def _radii(geod: Geod, phi: Any) -> Tuple[Any, Any]:
+    """Meridional and normal radii of curvature at a latitude (in radians)."""
+    w2 = 1 - geod.es * np.sin(phi) ** 2
+    return geod.a * (1 - geod.es) / w2**1.5, geod.a / np.sqrt(w2)
+
+
+def _wrap(angle: Any) -> Any:
+    """Wraps an angle in degrees to [-180, 180)."""
+    return (angle + 180) % 360 - 180
+
+
+def _inv_approx(
+    lat1: Any,
+    lon1: Any,
+    lat2: Any,
+    lon2: Any,
+    method: str,
+    reference: Tuple[Any, Any] | None,
+    geod: Geod,
+) -> Tuple[Any, Any]:
+    """Approximate inverse problem, returns (azimuth, distance)."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    dlambda = np.radians(_wrap(np.subtract(lon2, lon1)))
+
+    if method == "haversine":
+        radius = (2 * geod.a + geod.b) / 3
+        cos_phi1, cos_phi2 = np.cos(phi1), np.cos(phi2)
+        h = (
+            np.sin((phi2 - phi1) / 2) ** 2
+            + cos_phi1 * cos_phi2 * np.sin(dlambda / 2) ** 2
+        )
+        dist = 2 * radius * np.arcsin(np.sqrt(np.minimum(h, 1)))
+        az = np.arctan2(
+            np.sin(dlambda) * cos_phi2,
+            cos_phi1 * np.sin(phi2) - np.sin(phi1) * cos_phi2 * np.cos(dlambda),
+        )
+        return np.degrees(az), dist
+
+    if method == "equirectangular":
+        radius = (2 * geod.a + geod.b) / 3
+        x = dlambda * np.cos((phi1 + phi2) / 2)
+        y = phi2 - phi1
+        return np.degrees(np.arctan2(x, y)), radius * np.hypot(x, y)
+
+    if method == "flat":
+        phi0 = phi1 if reference is None else np.radians(reference[0])
+        m, n = _radii(geod, phi0)
+        x = n * np.cos(phi0) * dlambda
+        y = m * (phi2 - phi1)
+        return np.degrees(np.arctan2(x, y)), np.hypot(x, y)
+
+    raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}")
+
+
+def _fwd_approx(
+    lat: Any,
+    lon: Any,
+    az: Any,
+    dist: Any,
+    method: str,
+    reference: Tuple[Any, Any] | None,
+    geod: Geod,
+) -> Tuple[Any, Any, Any]:
+    """Approximate direct problem, returns (latitude, longitude, back
+    azimuth)."""
+    phi1, theta = np.radians(lat), np.radians(az)
+
+    if method == "haversine":
+        delta = np.divide(dist, (2 * geod.a + geod.b) / 3)
+        sin_phi2 = np.sin(phi1) * np.cos(delta) + np.cos(phi1) * np.sin(
+            delta
+        ) * np.cos(theta)
+        phi2 = np.arcsin(np.clip(sin_phi2, -1, 1))
+        dlambda = np.arctan2(
+            np.sin(theta) * np.sin(delta) * np.cos(phi1),
+            np.cos(delta) - np.sin(phi1) * sin_phi2,
+        )
+        back = np.arctan2(
+            -np.sin(dlambda) * np.cos(phi1),
+            np.cos(phi2) * np.sin(phi1)
+            - np.sin(phi2) * np.cos(phi1) * np.cos(dlambda),
+        )
+        lon2 = _wrap(np.add(lon, np.degrees(dlambda)))
+        return np.degrees(phi2), lon2, np.degrees(back)
+
+    if method == "equirectangular":
+        delta = np.divide(dist, (2 * geod.a + geod.b) / 3)
+        phi2 = phi1 + delta * np.cos(theta)
+        dlambda = delta * np.sin(theta) / np.cos((phi1 + phi2) / 2)
+
+    elif method == "flat":
+        phi0 = phi1 if reference is None else np.radians(reference[0])
+        m, n = _radii(geod, phi0)
+        phi2 = phi1 + np.multiply(dist, np.cos(theta)) / m
+        dlambda = np.multiply(dist, np.sin(theta)) / (n * np.cos(phi0))
+
+    else:
+        raise ValueError(
+            f"Unknown method {method!r}, expected one of {METHODS}"
+        )
+
+    lon2 = _wrap(np.add(lon, np.degrees(dlambda)))
+    return np.degrees(phi2), lon2, _wrap(np.add(az, 180))
 
 
 @impunity
@@ -21,24 +177,45 @@ def distance(
     lat2: Annotated[Any, "degree"],
     lon2: Annotated[Any, "degree"],
     *args: Annotated[Any, "dimensionless"],
+    method: str = "geodesic",
+    reference: Annotated[Any, "degree"] = None,
+    ellps: str = "WGS84",
     **kwargs: Annotated[Any, "dimensionless"],
 ) -> Annotated[Any, "m"]:
     """Computes the distance(s) between two points (or arrays of points).
 
+    Faster approximate methods trade accuracy for speed, see :data:`METHODS`.
+    Compared to the default "geodesic" method, the relative error on the
+    distance remains below 0.6% with "haversine". Below 100 km and 70° of
+    latitude, it remains below 0.6% with "equirectangular" and 0.9% with
+    "flat" (which is more accurate close to the reference point).
+
     :param lat1: latitude value(s)
     :param lon1: longitude value(s)
     :param lat2: latitude value(s)
     :param lon2: longitude value(s)
+    :param method: one of "geodesic" (default), "haversine",
+        "equirectangular" or "flat"
+    :param reference: the (lat, lon) of the reference point for the "flat"
+        method (default: the first point of each pair)
+    :param ellps: the name of the ellipsoid (default: WGS84)
 
     :return: the distance, in meters
 
     """
-    geod = Geod(ellps="WGS84")
+    geod = get_geod(ellps)
     dist1: Annotated[Any, "m"]
-    _, _, dist1 = geod.inv(lon1, lat1, lon2, lat2, *args, **kwargs)
+    if method == "geodesic":
+        _, _, dist1 = geod.inv(lon1, lat1, lon2, lat2, *args, **kwargs)
+    else:
+        _, dist1 = _inv_approx(lat1, lon1, lat2, lon2, method, reference, geod)
     return dist1
 
 
+# (not as a decorator, impunity rewrites the source of decorated functions)
+distance = profiled(arrow_io(parallelizable(distance)))
+
+
 @impunity
 def bearing(
     lat1: Annotated[Any, "degree"],
@@ -46,23 +223,39 @@ def bearing(
     lat2: Annotated[Any, "degree"],
     lon2: Annotated[Any, "degree"],
     *args: Annotated[Any, "dimensionless"],
+    method: str = "geodesic",
+    reference: Annotated[Any, "degree"] = None,
+    ellps: str = "WGS84",
     **kwargs: Annotated[Any, "dimensionless"],
 ) -> Annotated[Any, "degree"]:
     """Computes the distance(s) between two points (or arrays of points).
 
+    Faster approximate methods trade accuracy for speed, see :data:`METHODS`.
+
     :param lat1: latitude value(s)
     :param lon1: longitude value(s)
     :param lat2: latitude value(s)
     :param lon2: longitude value(s)
+    :param method: one of "geodesic" (default), "haversine",
+        "equirectangular" or "flat"
+    :param reference: the (lat, lon) of the reference point for the "flat"
+        method (default: the first point of each pair)
+    :param ellps: the name of the ellipsoid (default: WGS84)
 
     :return: the bearing angle, in degrees, from the first point to the second
     """
-    geod = Geod(ellps="WGS84")
+    geod = get_geod(ellps)
     angle1: Annotated[Any, "degree"]
-    angle1, _, _ = geod.inv(lon1, lat1, lon2, lat2, *args, **kwargs)
+    if method == "geodesic":
+        angle1, _, _ = geod.inv(lon1, lat1, lon2, lat2, *args, **kwargs)
+    else:
+        angle1, _ = _inv_approx(lat1, lon1, lat2, lon2, method, reference, geod)
     return angle1
 
 
+bearing = profiled(arrow_io(parallelizable(bearing)))
+
+
 @impunity
 def destination(
     lat: Annotated[Any, "degree"],
@@ -70,6 +263,9 @@ def destination(
     bearing: Annotated[Any, "degree"],
     distance: Annotated[Any, "m"],
     *args: Annotated[Any, "dimensionless"],
+    method: str = "geodesic",
+    reference: Annotated[Any, "degree"] = None,
+    ellps: str = "WGS84",
     **kwargs: Annotated[Any, "dimensionless"],
 ) -> Tuple[
     Annotated[Any, "degree"],
@@ -79,22 +275,39 @@ def destination(
     """Computes the point you reach from a set of coordinates, moving in a
     given direction for a given distance.
 
+    Faster approximate methods trade accuracy for speed, see :data:`METHODS`.
+
     :param lat: latitude value(s)
     :param lon: longitude value(s)
     :param bearing: bearing value(s)
     :param distance: distance value(s)
+    :param method: one of "geodesic" (default), "haversine",
+        "equirectangular" or "flat"
+    :param reference: the (lat, lon) of the reference point for the "flat"
+        method (default: the origin point)
+    :param ellps: the name of the ellipsoid (default: WGS84)
 
     :return: a tuple with latitude value(s), longitude value(s) and bearing
         from the destination point back to the origin, all in degrees.
     """
-    geod = Geod(ellps="WGS84")
+    geod = get_geod(ellps)
     lon_: Annotated[Any, "degree"]
     lat_: Annotated[Any, "degree"]
     back_: Annotated[Any, "degree"]
-    lon_, lat_, back_ = geod.fwd(lon, lat, bearing, distance, *args, **kwargs)
+    if method == "geodesic":
+        lon_, lat_, back_ = geod.fwd(
+            lon, lat, bearing, distance, *args, **kwargs
+        )
+    else:
+        lat_, lon_, back_ = _fwd_approx(
+            lat, lon, bearing, distance, method, reference, geod
+        )
     return lat_, lon_, back_
 
 
+destination = profiled(arrow_io(parallelizable(destination)))
+
+
 @impunity
 def greatcircle(
     lat1: Annotated[Any, "degree"],
@@ -102,6 +315,7 @@ def greatcircle(
     lat2: Annotated[Any, "degree"],
     lon2: Annotated[Any, "degree"],
     *args: Annotated[Any, "dimensionless"],
+    ellps: str = "WGS84",
     **kwargs: Annotated[Any, "dimensionless"],
 ) -> List[Annotated[Any, "degree"]]:
     """Computes a list of points making the great circle between two points.
@@ -110,13 +324,1174 @@ def greatcircle(
     :param lon1: longitude value
     :param lat2: latitude value
     :param lon2: longitude value
+    :param ellps: the name of the ellipsoid (default: WGS84)
 
     :return: a tuple with latitude values, longitude values, all in degrees.
     """
 
-    geod = Geod(ellps="WGS84")
-
+    geod = get_geod(ellps)
     return [
         (lat, lon)
         for (lon, lat) in geod.npts(lon1, lat1, lon2, lat2, *args, **kwargs)
     ]
+
+
+greatcircle = profiled(greatcircle)
+
+
+@impunity
+def greatcircle_batch(
+    lat1: Annotated[Any, "degree"],
+    lon1: Annotated[Any, "degree"],
+    lat2: Annotated[Any, "degree"],
+    lon2: Annotated[Any, "degree"],
+    npts: Any = None,
+    *,
+    tolerance: Annotated[Any, "m"] = None,
+    endpoints: bool = True,
+    ellps: str = "WGS84",
+) -> Tuple[
+    Annotated[Any, "degree"],
+    Annotated[Any, "degree"],
+    Annotated[Any, "dimensionless"],
+]:
+    """Computes the great circles between several pairs of points.
+
+    This is a batched version of :func:`greatcircle`: all the points are
+    computed with one direct geodesic problem over a flat array, and the
+    result is returned as flat arrays with the offsets of each great circle.
+
+    Great circles are densified either with a fixed number of intermediate
+    points, or so that the chord between two consecutive points never
+    deviates by more than a given distance from the arc.
+
+    :param lat1: latitude values of the origins
+    :param lon1: longitude values of the origins
+    :param lat2: latitude values of the destinations
+    :param lon2: longitude values of the destinations
+    :param npts: number of intermediate points (int, or one per great circle)
+    :param tolerance: maximum chord error, in meters (mutually exclusive with
+        npts)
+    :param endpoints: if True, include origins and destinations
+    :param ellps: the name of the ellipsoid (default: WGS84)
+
+    :return: a tuple with latitude values, longitude values (all in degrees)
+        and offsets: the points of the i-th great circle are at indices
+        ``offsets[i]:offsets[i + 1]``
+
+    >>> lat, lon, offsets = greatcircle_batch([0, 10], [0, 0], [0, 20], [2, 0],
+    ...                                       npts=1)
+    >>> offsets
+    array([0, 3, 6])
+    >>> lon
+    array([0., 1., 2., 0., 0., 0.])
+    """
+    if (npts is None) == (tolerance is None):
+        raise ValueError("Exactly one of npts and tolerance must be set")
+    if tolerance is not None and np.any(np.asarray(tolerance) <= 0):
+        raise ValueError("tolerance must be positive")
+
+    lat1 = np.atleast_1d(np.asarray(lat1, dtype=np.float64))
+    lon1 = np.atleast_1d(np.asarray(lon1, dtype=np.float64))
+    lat2 = np.atleast_1d(np.asarray(lat2, dtype=np.float64))
+    lon2 = np.atleast_1d(np.asarray(lon2, dtype=np.float64))
+    lat1, lon1, lat2, lon2 = np.broadcast_arrays(lat1, lon1, lat2, lon2)
+
+    geod = get_geod(ellps)
+    az12, _, dist = geod.inv(lon1, lat1, lon2, lat2)
+
+    if tolerance is not None:
+        # sagitta of an arc of length s on a circle of radius r, the smallest
+        # radius of curvature of the ellipsoid (meridional, at the equator):
+        # r * (1 - cos(s / 2r)) <= tolerance
+        r = geod.a * (1 - geod.es)
+        max_length = 2 * r * np.arccos(1 - np.minimum(tolerance, r) / r)
+        segments = np.maximum(1, np.ceil(dist / max_length)).astype(np.intp)
+    else:
+        segments = np.broadcast_to(
+            np.asarray(npts, dtype=np.intp) + 1, dist.shape
+        )
+
+    counts = segments + 1 if endpoints else segments - 1
+    offsets = np.zeros(counts.size + 1, dtype=np.intp)
+    np.cumsum(counts, out=offsets[1:])
+
+    route = np.repeat(np.arange(counts.size), counts)
+    step = np.arange(offsets[-1]) - offsets[route]
+    if not endpoints:
+        step += 1
+    along = dist[route] * step / segments[route]
+
+    lon, lat, _ = geod.fwd(lon1[route], lat1[route], az12[route], along)
+    if endpoints:
+        # avoid rounding errors at the destination
+        lat[offsets[1:] - 1] = lat2
+        lon[offsets[1:] - 1] = lon2
+
+    lat_: Annotated[Any, "degree"] = lat
+    lon_: Annotated[Any, "degree"] = lon
+    return lat_, lon_, offsets
+
+
+greatcircle_batch = profiled(greatcircle_batch)
+
+
+# Number of pairs solved at once by the matrix functions: with the input and
+# output buffers, a block fits in about 1MB (L2 cache size on most CPUs)
+BLOCK_PAIRS = 1 << 15
+# Bytes of working memory needed per pair (four inputs solved in place)
+_BYTES_PER_PAIR = 4 * 8
+
+
+def _inv_matrix(
+    lat1: Any,
+    lon1: Any,
+    lat2: Any,
+    lon2: Any,
+    which: str,
+    symmetric: bool,
+    max_memory: int | None,
+    out: Any,
+    ellps: str,
+) -> npt.NDArray[np.float64]:
+    lat1 = np.asarray(lat1, dtype=np.float64).ravel()
+    lon1 = np.asarray(lon1, dtype=np.float64).ravel()
+    if lat2 is None and lon2 is None:
+        lat2, lon2 = lat1, lon1
+    elif lat2 is None or lon2 is None:
+        raise ValueError("lat2 and lon2 must be both set or both None")
+    else:
+        if symmetric:
+            raise ValueError("symmetric mode requires a single set of points")
+        lat2 = np.asarray(lat2, dtype=np.float64).ravel()
+        lon2 = np.asarray(lon2, dtype=np.float64).ravel()
+
+    n, m = lat1.shape[0], lat2.shape[0]
+    if lon1.shape[0] != n or lon2.shape[0] != m:
+        raise ValueError("latitude and longitude arrays must have equal sizes")
+
+    if out is None:
+        out = np.empty((n, m), dtype=np.float64)
+    elif out.shape != (n, m):
+        raise ValueError(f"out must be of shape {(n, m)}, not {out.shape}")
+
+    pairs = BLOCK_PAIRS
+    if max_memory is not None:
+        pairs = max(1, min(pairs, max_memory // _BYTES_PER_PAIR))
+    if symmetric:
+        rows = cols = max(1, math.isqrt(pairs))
+    else:
+        cols = max(1, min(m, pairs))
+        rows = max(1, pairs // cols)
+
+    # buffers are allocated once, and pyproj solves in place
+    buffers = np.empty((4, rows * cols), dtype=np.float64)
+    geod = get_geod(ellps)
+
+    for i0 in range(0, n, rows):
+        i1 = min(i0 + rows, n)
+        for j0 in range(i0 if symmetric else 0, m, cols):
+            j1 = min(j0 + cols, m)
+            shape = (i1 - i0, j1 - j0)
+            size = shape[0] * shape[1]
+            lo1, la1, lo2, la2 = (buf[:size].reshape(shape) for buf in buffers)
+            lo1[...] = lon1[i0:i1, None]
+            la1[...] = lat1[i0:i1, None]
+            lo2[...] = lon2[None, j0:j1]
+            la2[...] = lat2[None, j0:j1]
+            # returns (forward azimuth, back azimuth, distance)
+            fwd_, back_, dist_ = geod.inv(lo1, la1, lo2, la2, inplace=True)
+            block = dist_ if which == "distance" else fwd_
+            out[i0:i1, j0:j1] = block
+            if symmetric and j0 > i0:
+                block = dist_ if which == "distance" else back_
+                out[j0:j1, i0:i1] = block.T
+
+    return out  # type: ignore
+
+
+@impunity
+def distance_matrix(
+    lat1: Annotated[Any, "degree"],
+    lon1: Annotated[Any, "degree"],
+    lat2: Annotated[Any, "degree"] = None,
+    lon2: Annotated[Any, "degree"] = None,
+    *,
+    symmetric: bool = False,
+    max_memory: int | None = None,
+    out: Any = None,
+    ellps: str = "WGS84",
+) -> Annotated[Any, "m"]:
+    """Computes the distances between all pairs of points of two sets.
+
+    The matrix is filled block by block, so that the working memory remains
+    bounded and cache-friendly whatever the size of the sets.
+
+    :param lat1: latitude values of the first set (rows)
+    :param lon1: longitude values of the first set (rows)
+    :param lat2: latitude values of the second set (columns), the first set
+        is used when None
+    :param lon2: longitude values of the second set (columns)
+    :param symmetric: when True, only the blocks of the upper triangle are
+        computed and mirrored (the second set must be None)
+    :param max_memory: an upper bound (in bytes) on the working memory,
+        the output matrix excluded
+    :param out: a preallocated array of shape (n, m) to write the results to,
+        e.g. a :class:`numpy.memmap` for matrices which do not fit in memory
+    :param ellps: the name of the ellipsoid (default: WGS84)
+
+    :return: the (n, m) distance matrix, in meters
+
+    >>> distance_matrix([0, 0], [0, 1], [0], [0])
+    array([[     0.     ],
+           [111319.49...]])
+    """
+    dist: Annotated[Any, "m"] = _inv_matrix(
+        lat1, lon1, lat2, lon2, "distance", symmetric, max_memory, out, ellps
+    )
+    return dist
+
+
+distance_matrix = profiled(distance_matrix)
+
+
+@impunity
+def bearing_matrix(
+    lat1: Annotated[Any, "degree"],
+    lon1: Annotated[Any, "degree"],
+    lat2: Annotated[Any, "degree"] = None,
+    lon2: Annotated[Any, "degree"] = None,
+    *,
+    symmetric: bool = False,
+    max_memory: int | None = None,
+    out: Any = None,
+    ellps: str = "WGS84",
+) -> Annotated[Any, "degree"]:
+    """Computes the bearings between all pairs of points of two sets.
+
+    The matrix is filled block by block, see :func:`distance_matrix`.
+    In symmetric mode, the lower triangle is filled with the back azimuths
+    computed for the upper triangle.
+
+    :param lat1: latitude values of the first set (rows)
+    :param lon1: longitude values of the first set (rows)
+    :param lat2: latitude values of the second set (columns), the first set
+        is used when None
+    :param lon2: longitude values of the second set (columns)
+    :param symmetric: when True, only the blocks of the upper triangle are
+        computed (the second set must be None)
+    :param max_memory: an upper bound (in bytes) on the working memory,
+        the output matrix excluded
+    :param out: a preallocated array of shape (n, m) to write the results to
+    :param ellps: the name of the ellipsoid (default: WGS84)
+
+    :return: the (n, m) matrix of bearings, in degrees, from the points of the
+        first set to the points of the second set
+    """
+    angle: Annotated[Any, "degree"] = _inv_matrix(
+        lat1, lon1, lat2, lon2, "bearing", symmetric, max_memory, out, ellps
+    )
+    return angle
+
+
+bearing_matrix = profiled(bearing_matrix)
+
+
+class Kinematics(NamedTuple):
+    """Per-point kinematics of trajectories, as returned by
+    :func:`kinematics`.
+
+    Each value describes the segment leading to the current point, so that
+    values are NaN for the first point of each flight.
+    """
+
+    #: length of the segment, in meters
+    distance: Annotated[Any, "m"]
+    #: initial track angle of the segment, in degrees
+    track: Annotated[Any, "degree"]
+    #: cumulative along-track distance since the first point, in meters
+    cumdist: Annotated[Any, "m"]
+    #: average ground speed over the segment, in m/s
+    groundspeed: Annotated[Any, "m/s"]
+
+
+def _timestamps(timestamp: Any) -> Any:
+    """Flat array of timestamps, as datetime64 values (in UTC) or numbers."""
+    if not hasattr(getattr(timestamp, "dtype", None), "tz"):
+        timestamp = np.asarray(timestamp).ravel()
+        if timestamp.dtype != object:
+            return timestamp
+    # timezone-aware timestamps (e.g. in pandas, as often in ADS-B data) or
+    # datetime objects
+    import pandas as pd
+
+    index = pd.DatetimeIndex(pd.to_datetime(timestamp, utc=True))
+    return index.tz_convert(None).to_numpy()
+
+
+def _flight_starts(
+    size: int, flight_id: Any, offsets: Any
+) -> npt.NDArray[np.bool_]:
+    """Returns a mask flagging the first point of each flight."""
+    start = np.zeros(size, dtype=np.bool_)
+    if flight_id is not None and offsets is not None:
+        raise ValueError("flight_id and offsets are mutually exclusive")
+    if flight_id is not None:
+        flight_id = np.asarray(flight_id)
+        if flight_id.shape != (size,):
+            raise ValueError("flight_id must have the same size as lat/lon")
+        np.not_equal(flight_id[1:], flight_id[:-1], out=start[1:])
+    elif offsets is not None:
+        offsets = np.asarray(offsets, dtype=np.intp)
+        start[offsets[offsets < size]] = True
+    if size > 0:
+        start[0] = True
+    return start
+
+
+@impunity
+def kinematics(
+    lat: Annotated[Any, "degree"],
+    lon: Annotated[Any, "degree"],
+    timestamp: Any,
+    flight_id: Any = None,
+    *,
+    offsets: Any = None,
+    ellps: str = "WGS84",
+) -> Kinematics:
+    """Computes the kinematics of (several) trajectories in one pass.
+
+    Points are passed as flat arrays: points of a same flight must be
+    contiguous and sorted by timestamp. Flights are delimited either by a
+    flight identifier per point, or by the offsets of their first point.
+    A single inverse geodesic problem is solved per segment.
+
+    :param lat: latitude values
+    :param lon: longitude values
+    :param timestamp: timestamps, as datetime64 values, timezone-aware pandas
+        timestamps or datetime objects, or as numbers of seconds
+    :param flight_id: an identifier of the flight for each point
+    :param offsets: the index of the first point of each flight (mutually
+        exclusive with flight_id); all points belong to the same flight when
+        none of them is set.
+    :param ellps: the name of the ellipsoid (default: WGS84)
+
+    :return: a :class:`Kinematics` tuple with distance (in m), track
+        (in degrees), cumulative distance (in m) and ground speed (in m/s)
+
+    >>> k = kinematics(
+    ...     [0, 0, 0, 10, 10], [0, 1, 2, 0, 0.5], [0, 600, 1200, 0, 300],
+    ...     offsets=[0, 3]
+    ... )
+    >>> k.cumdist.round()
+    array([     0., 111319., 222639.,      0.,  54820.])
+    >>> k.groundspeed.round(1)
+    array([  nan, 185.5, 185.5,   nan, 182.7])
+    """
+    lat = np.asarray(lat, dtype=np.float64).ravel()
+    lon = np.asarray(lon, dtype=np.float64).ravel()
+    if lat.shape != lon.shape:
+        raise ValueError("lat and lon must have the same size")
+    timestamp = _timestamps(timestamp)
+    if timestamp.shape != lat.shape:
+        raise ValueError("timestamp must have the same size as lat/lon")
+    size = lat.shape[0]
+    start = _flight_starts(size, flight_id, offsets)
+
+    if np.issubdtype(timestamp.dtype, np.datetime64):
+        dt = np.diff(timestamp) / np.timedelta64(1, "s")
+    else:
+        dt = np.diff(timestamp.astype(np.float64))
+
+    track = np.empty(size, dtype=np.float64)
+    dist = np.empty(size, dtype=np.float64)
+    if size > 1:
+        # slices are views: no shifted copies of the coordinates
+        geod = get_geod(ellps)
+        track[1:], _, dist[1:] = geod.inv(lon[:-1], lat[:-1], lon[1:], lat[1:])
+
+    # cumulated distance, reset at the first point of each flight
+    dist[start] = 0
+    cumdist = np.cumsum(dist)
+    first = np.maximum.accumulate(np.where(start, np.arange(size), 0))
+    cumdist -= cumdist[first]
+
+    gs = np.full(size, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        np.divide(dist[1:], dt, out=gs[1:], where=dt > 0)
+    gs[start] = np.nan
+    dist[start] = np.nan
+    track[start] = np.nan
+
+    distance: Annotated[Any, "m"] = dist
+    cumulative: Annotated[Any, "m"] = cumdist
+    groundspeed: Annotated[Any, "m/s"] = gs
+    angle: Annotated[Any, "degree"] = track
+    return Kinematics(distance, angle, cumulative, groundspeed)
+
+
+kinematics = profiled(kinematics)
+
+
+# Candidates are preselected with angles on the unit sphere: converting
+# distances to angles with this margin over the semi-minor axis covers the
+# range of radii of curvature of the WGS84 ellipsoid.
+_SPHERE_MARGIN = 1.02
+# Number of query points processed at once by PointIndex
+_QUERY_CHUNK = 1 << 14
+
+
+def _unit_vectors(lat: Any, lon: Any) -> npt.NDArray[np.float64]:
+    phi, lam = np.radians(lat), np.radians(lon)
+    cos_phi = np.cos(phi)
+    return np.stack(
+        [cos_phi * np.cos(lam), cos_phi * np.sin(lam), np.sin(phi)], axis=-1
+    )
+
+
+def _expand(
+    query: npt.NDArray[np.intp],
+    lo: npt.NDArray[np.intp],
+    hi: npt.NDArray[np.intp],
+) -> Tuple[npt.NDArray[np.intp], npt.NDArray[np.intp]]:
+    """Expands intervals [lo, hi) into flat (query, index) pairs."""
+    length = np.maximum(hi - lo, 0)
+    offsets = np.cumsum(length) - length
+    query = np.repeat(query, length)
+    index = np.arange(query.size) + np.repeat(lo - offsets, length)
+    return query, index
+
+
+class PointIndex:
+    """A spatial index for nearest neighbour queries on a set of points.
+
+    Reference points (airports, navaids, waypoints, etc.) are bucketed once on
+    a regular latitude/longitude grid. Queries gather the candidates in the
+    cells overlapping a spherical cap around each query point, filter them
+    with angles on the unit sphere, and exact geodesic distances are only
+    computed for the remaining candidates.
+
+    Instances can be pickled, e.g. to be shipped to worker processes.
+
+    :param lat: latitude values of the reference points
+    :param lon: longitude values of the reference points
+    :param cell_size: approximate size of the grid cells, in degrees
+    :param ellps: the name of the ellipsoid (default: WGS84)
+
+    >>> index = PointIndex([43.63, 48.72, 49.01], [1.37, 2.38, 2.55])
+    >>> idx, dist = index.query([48.85], [2.35], k=2)
+    >>> idx
+    array([[1, 2]])
+    >>> dist.round()
+    array([[14624., 23051.]])
+    """
+
+    def __init__(
+        self,
+        lat: Annotated[Any, "degree"],
+        lon: Annotated[Any, "degree"],
+        cell_size: float = 1.0,
+        ellps: str = "WGS84",
+    ) -> None:
+        lat = np.asarray(lat, dtype=np.float64).ravel()
+        lon = np.asarray(lon, dtype=np.float64).ravel()
+        if lat.shape != lon.shape:
+            raise ValueError("lat and lon must have the same size")
+
+        self.ellps = ellps
+        self.n_rows = max(1, round(180 / cell_size))
+        self.n_cols = max(1, round(360 / cell_size))
+
+        cells = self._cells(lat, lon)
+        #: permutation from the internal (sorted by cell) to the input order
+        self.order = np.argsort(cells, kind="stable")
+        self.lat = lat[self.order]
+        self.lon = lon[self.order]
+        self.xyz = _unit_vectors(self.lat, self.lon)
+        #: reference points in cell c are at indices starts[c]:starts[c + 1]
+        self.starts = np.searchsorted(
+            cells[self.order], np.arange(self.n_rows * self.n_cols + 1)
+        )
+
+    def __len__(self) -> int:
+        return self.lat.shape[0]
+
+    def _rows(self, lat: Any) -> npt.NDArray[np.intp]:
+        row = np.floor((lat + 90) * (self.n_rows / 180))
+        return np.clip(row, 0, self.n_rows - 1).astype(np.intp)
+
+    def _cells(self, lat: Any, lon: Any) -> npt.NDArray[np.intp]:
+        col = np.floor((lon + 180) % 360 * (self.n_cols / 360))
+        col = np.clip(col, 0, self.n_cols - 1).astype(np.intp)
+        return self._rows(lat) * self.n_cols + col  # type: ignore
+
+    def _candidates(
+        self, lat: Any, lon: Any, alpha: Any
+    ) -> Tuple[
+        npt.NDArray[np.intp], npt.NDArray[np.intp], npt.NDArray[np.float64]
+    ]:
+        """Returns the (query, reference) pairs within an angle alpha (in
+        radians), with their angle on the unit sphere."""
+        n_cols = self.n_cols
+        alpha_deg = np.degrees(alpha)
+        r0 = self._rows(lat - alpha_deg)
+        r1 = self._rows(lat + alpha_deg)
+
+        # half-width in longitude of the spherical cap
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.sin(alpha) / np.cos(np.radians(lat))
+        full = (np.abs(lat) + alpha_deg >= 90) | (alpha >= np.pi / 2)
+        full |= ~(ratio < 1)
+        dlon = np.degrees(np.arcsin(np.where(full, 0, ratio)))
+        scale = n_cols / 360
+        c0 = np.floor((lon - dlon + 180) * scale).astype(np.intp)
+        c1 = np.floor((lon + dlon + 180) * scale).astype(np.intp)
+        c0 %= n_cols
+        c1 %= n_cols
+        full |= (c1 - c0) % n_cols + 1 >= n_cols
+        c0[full], c1[full] = 0, n_cols - 1
+        # caps crossing the antimeridian span two column ranges per row
+        wrap = c1 < c0
+        a0, a1 = c0, np.where(wrap, n_cols - 1, c1)
+        b0, b1 = np.zeros_like(c0), np.where(wrap, c1, -1)
+
+        query, row = _expand(np.arange(lat.shape[0]), r0, r1 + 1)
+        base = row * n_cols
+        # first and last cells of both column ranges in each row
+        lo = np.concatenate([base + a0[query], base + b0[query]])
+        hi = np.concatenate([base + a1[query], base + b1[query]])
+        query, index = _expand(
+            np.concatenate([query, query]),
+            self.starts[lo],
+            np.where(hi >= lo, self.starts[hi + 1], 0),
+        )
+
+        # angles from chord lengths remain accurate for close points
+        chord = np.linalg.norm(
+            _unit_vectors(lat, lon)[query] - self.xyz[index], axis=-1
+        )
+        angle = 2 * np.arcsin(np.minimum(chord / 2, 1))
+        keep = angle <= alpha[query]
+        return query[keep], index[keep], angle[keep]
+
+    def query_radius(
+        self,
+        lat: Annotated[Any, "degree"],
+        lon: Annotated[Any, "degree"],
+        radius: Annotated[Any, "m"],
+    ) -> Tuple[
+        npt.NDArray[np.intp],
+        Annotated[npt.NDArray[np.float64], "m"],
+        npt.NDArray[np.intp],
+    ]:
+        """Finds all reference points within a distance of query points.
+
+        :param lat: latitude values of the query points
+        :param lon: longitude values of the query points
+        :param radius: the search radius, in meters (one value, or one per
+            query point)
+
+        :return: a tuple with the indices of the reference points, their
+            distances (in meters) and offsets: matches of the i-th query point
+            are at ``offsets[i]:offsets[i + 1]``, sorted by distance.
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64)).ravel()
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64)).ravel()
+        radius = np.broadcast_to(
+            np.asarray(radius, dtype=np.float64), lat.shape
+        )
+        geod = get_geod(self.ellps)
+
+        queries, indices, distances = [], [], []
+        for start in range(0, lat.shape[0], _QUERY_CHUNK):
+            s = slice(start, start + _QUERY_CHUNK)
+            alpha = np.minimum(np.pi, radius[s] * _SPHERE_MARGIN / geod.b)
+            query, index, _ = self._candidates(lat[s], lon[s], alpha)
+            _, _, dist = geod.inv(
+                lon[s][query], lat[s][query], self.lon[index], self.lat[index]
+            )
+            keep = dist <= radius[s][query]
+            query, index, dist = query[keep], index[keep], dist[keep]
+            order = np.lexsort((dist, query))
+            queries.append(query[order] + start)
+            indices.append(self.order[index[order]])
+            distances.append(dist[order])
+
+        query = np.concatenate([np.empty(0, dtype=np.intp), *queries])
+        offsets = np.zeros(lat.shape[0] + 1, dtype=np.intp)
+        np.cumsum(np.bincount(query, minlength=lat.shape[0]), out=offsets[1:])
+        return (
+            np.concatenate([np.empty(0, dtype=np.intp), *indices]),
+            np.concatenate([np.empty(0), *distances]),
+            offsets,
+        )
+
+    def query(
+        self,
+        lat: Annotated[Any, "degree"],
+        lon: Annotated[Any, "degree"],
+        k: int = 1,
+    ) -> Tuple[npt.NDArray[np.intp], Annotated[npt.NDArray[np.float64], "m"]]:
+        """Finds the k nearest reference points of query points.
+
+        :param lat: latitude values of the query points
+        :param lon: longitude values of the query points
+        :param k: the number of neighbours
+
+        :return: a tuple with the indices of the k nearest reference points
+            and their distances (in meters), both of shape (n, k) and sorted
+            by distance. When the index contains fewer than k points, missing
+            values are padded with -1 and inf.
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64)).ravel()
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64)).ravel()
+        geod = get_geod(self.ellps)
+
+        indices = np.full((lat.shape[0], k), -1, dtype=np.intp)
+        distances = np.full((lat.shape[0], k), np.inf)
+        if len(self) == 0:
+            return indices, distances
+
+        # a cap expected to contain about 4k points, grown until large enough
+        alpha0 = min(np.pi, 4 * math.sqrt(k / len(self)))
+        for start in range(0, lat.shape[0], _QUERY_CHUNK):
+            pending = np.arange(start, min(start + _QUERY_CHUNK, lat.shape[0]))
+            alpha = np.full(pending.shape, alpha0)
+            while pending.size > 0:
+                query, index, angle = self._candidates(
+                    lat[pending], lon[pending], alpha
+                )
+                order = np.lexsort((angle, query))
+                query, index, angle = query[order], index[order], angle[order]
+                counts = np.bincount(query, minlength=pending.size)
+                first = np.cumsum(counts) - counts
+
+                # all the k nearest points are within a margin of the k-th
+                # smallest angle, which must remain within the cap
+                threshold = np.full(pending.size, np.inf)
+                enough = counts >= k
+                threshold[enough] = (
+                    angle[first[enough] + k - 1] * _SPHERE_MARGIN
+                )
+                done = (threshold <= alpha) | (alpha >= np.pi)
+
+                keep = done[query] & (angle <= threshold[query])
+                query, index = query[keep], index[keep]
+                _, _, dist = geod.inv(
+                    lon[pending[query]],
+                    lat[pending[query]],
+                    self.lon[index],
+                    self.lat[index],
+                )
+                order = np.lexsort((dist, query))
+                query, index, dist = query[order], index[order], dist[order]
+                counts = np.bincount(query, minlength=pending.size)
+                rank = np.arange(query.size) - np.repeat(
+                    np.cumsum(counts) - counts, counts
+                )
+                keep = rank < k
+                row, col = pending[query[keep]], rank[keep]
+                indices[row, col] = self.order[index[keep]]
+                distances[row, col] = dist[keep]
+
+                pending, alpha = pending[~done], alpha[~done]
+                alpha = np.minimum(np.pi, 2 * alpha)
+
+        return indices, distances
+
+
+class CrossTrack(NamedTuple):
+    """Position of points relative to route segments, as returned by
+    :func:`cross_track`.
+    """
+
+    #: signed distance to the great circle of the segment, in meters:
+    #: positive on the right of the segment, negative on its left
+    cross_track: Annotated[Any, "m"]
+    #: distance from the start of the segment along its great circle, in
+    #: meters: negative before the start, larger than the length of the
+    #: segment after its end
+    along_track: Annotated[Any, "m"]
+    #: index of the closest segment, -1 if the point has no candidate segment
+    segment: Any
+
+
+# Number of (point, segment) pairs solved at once by cross_track
+_CROSS_TRACK_PAIRS = 1 << 16
+
+
+def _route_segments(
+    lat1: Any, lon1: Any, lat2: Any, lon2: Any, offsets: Any
+) -> Tuple[Any, Any, Any, Any, Any, Any]:
+    """Returns the endpoints of the segments, their index (as returned by
+    :func:`cross_track`) and the offsets of the segments of each route."""
+    lat1 = np.atleast_1d(np.asarray(lat1, dtype=np.float64)).ravel()
+    lon1 = np.atleast_1d(np.asarray(lon1, dtype=np.float64)).ravel()
+    if lat1.shape != lon1.shape:
+        raise ValueError("latitude and longitude arrays must have equal sizes")
+
+    if lat2 is not None and lon2 is not None:
+        if offsets is not None:
+            raise ValueError("offsets are only valid for polylines")
+        lat2 = np.atleast_1d(np.asarray(lat2, dtype=np.float64)).ravel()
+        lon2 = np.atleast_1d(np.asarray(lon2, dtype=np.float64)).ravel()
+        lat1, lon1, lat2, lon2 = np.broadcast_arrays(lat1, lon1, lat2, lon2)
+        # each segment is a route of its own
+        index = np.arange(lat1.shape[0])
+        return lat1, lon1, lat2, lon2, index, np.arange(index.size + 1)
+    if lat2 is not None or lon2 is not None:
+        raise ValueError("lat2 and lon2 must be both set or both None")
+
+    # segments join consecutive points, except across two routes
+    start = _flight_starts(lat1.shape[0], None, offsets)
+    index = np.flatnonzero(~start[1:])
+    route = np.cumsum(start)[index] - 1
+    seg_offsets = np.searchsorted(route, np.arange(start.sum() + 1))
+    return (
+        lat1[index],
+        lon1[index],
+        lat1[index + 1],
+        lon1[index + 1],
+        index,
+        seg_offsets,
+    )
+
+
+@impunity
+def cross_track(
+    lat: Annotated[Any, "degree"],
+    lon: Annotated[Any, "degree"],
+    lat1: Annotated[Any, "degree"],
+    lon1: Annotated[Any, "degree"],
+    lat2: Annotated[Any, "degree"] = None,
+    lon2: Annotated[Any, "degree"] = None,
+    *,
+    offsets: Any = None,
+    route: Any = None,
+    ellps: str = "WGS84",
+) -> CrossTrack:
+    """Computes the cross-track and along-track distances of points relative
+    to their closest route segment.
+
+    Segments are given either by the arrays of their endpoints (lat1, lon1,
+    lat2, lon2), or as polylines (lat1, lon1 only) where each segment joins
+    two consecutive points. Several polylines may be passed as flat arrays
+    delimited by the offsets of their first point, as returned by
+    :func:`greatcircle_batch`.
+
+    Each point is compared to all the segments, or only to the segments of
+    its own route with the ``route`` argument: with endpoint arrays, each
+    segment is a route of its own, so that ``route=np.arange(n)`` compares
+    the i-th point to the i-th segment only.
+
+    A single inverse geodesic problem is solved per (point, segment) pair,
+    plus one per segment: cross-track and along-track distances are then
+    derived with spherical trigonometry from the geodesic distances and
+    azimuths. The closest segment is the one minimising the distance from
+    the point to the segment (to its closest endpoint if the projection of
+    the point falls outside the segment).
+
+    :param lat: latitude values of the points
+    :param lon: longitude values of the points
+    :param lat1: latitude values of the start of the segments, or of the
+        points of the polylines
+    :param lon1: longitude values of the start of the segments, or of the
+        points of the polylines
+    :param lat2: latitude values of the end of the segments (None for
+        polylines)
+    :param lon2: longitude values of the end of the segments (None for
+        polylines)
+    :param offsets: the index of the first point of each polyline; all points
+        belong to the same polyline when not set
+    :param route: the index of the route (segment or polyline) of each point
+    :param ellps: the name of the ellipsoid (default: WGS84)
+
+    :return: a :class:`CrossTrack` tuple with cross-track and along-track
+        distances (in m) and the index of the closest segment: the index in
+        the endpoint arrays, or the index of the first point of the segment
+        in the polyline arrays.
+
+    >>> xt = cross_track([0.5, 1.5], [0.5, 2.5], [0, 0, 1], [0, 2, 3])
+    >>> xt.segment
+    array([0, 1])
+    >>> xt.cross_track.round()
+    array([-55287., -78441.])
+    >>> xt.along_track.round()
+    array([ 55660., 156383.])
+    """
+    lat = np.atleast_1d(np.asarray(lat, dtype=np.float64)).ravel()
+    lon = np.atleast_1d(np.asarray(lon, dtype=np.float64)).ravel()
+    if lat.shape != lon.shape:
+        raise ValueError("lat and lon must have the same size")
+    size = lat.shape[0]
+    s_lat1, s_lon1, s_lat2, s_lon2, index, seg_offsets = _route_segments(
+        lat1, lon1, lat2, lon2, offsets
+    )
+
+    # candidate segments of each point are at indices lo:hi
+    if route is None:
+        lo = np.zeros(size, dtype=np.intp)
+        hi = np.full(size, index.size, dtype=np.intp)
+    else:
+        route = np.broadcast_to(np.asarray(route, dtype=np.intp), (size,))
+        lo, hi = seg_offsets[route], seg_offsets[route + 1]
+
+    geod = get_geod(ellps)
+    radius = (2 * geod.a + geod.b) / 3
+    az12, _, length = geod.inv(s_lon1, s_lat1, s_lon2, s_lat2)
+    theta12, delta12 = np.radians(az12), length / radius
+
+    xt = np.full(size, np.nan)
+    at = np.full(size, np.nan)
+    segment = np.full(size, -1, dtype=np.intp)
+
+    # points are processed in chunks of a bounded number of pairs
+    counts = np.maximum(hi - lo, 0)
+    bounds = np.cumsum(counts)
+    start = 0
+    while start < size:
+        before = bounds[start] - counts[start]
+        stop = np.searchsorted(bounds, before + _CROSS_TRACK_PAIRS, "right")
+        stop = max(int(stop), start + 1)
+
+        query, seg = _expand(
+            np.arange(start, stop), lo[start:stop], hi[start:stop]
+        )
+        az13, _, dist13 = geod.inv(
+            s_lon1[seg], s_lat1[seg], lon[query], lat[query]
+        )
+        delta13 = dist13 / radius
+        dtheta = np.radians(az13) - theta12[seg]
+        sin13 = np.sin(delta13)
+        delta_xt = np.arcsin(np.clip(sin13 * np.sin(dtheta), -1, 1))
+        delta_at = np.arctan2(sin13 * np.cos(dtheta), np.cos(delta13))
+
+        # angular distance from the point to the segment
+        excess = np.maximum(-delta_at, delta_at - delta12[seg])
+        closest = np.where(
+            excess > 0,
+            np.arccos(np.clip(np.cos(delta_xt) * np.cos(excess), -1, 1)),
+            np.abs(delta_xt),
+        )
+
+        # the closest segment comes first among the pairs of each point
+        order = np.lexsort((closest, query))
+        first = order[np.flatnonzero(np.diff(query[order], prepend=-1))]
+        point = query[first]
+        xt[point] = delta_xt[first] * radius
+        at[point] = delta_at[first] * radius
+        segment[point] = index[seg[first]]
+        start = stop
+
+    cross: Annotated[Any, "m"] = xt
+    along: Annotated[Any, "m"] = at
+    return CrossTrack(cross, along, segment)
+
+
+cross_track = profiled(cross_track)
+
+
+class AirspaceIndex:
+    """A spatial index for containment queries on a set of airspaces.
+
+    Airspaces (sectors, FIRs, etc.) are polygons with lower and upper
+    altitude limits. Their geodesic edges are densified with
+    :func:`greatcircle_batch`, and the resulting rings are bucketed once on a
+    regular latitude/longitude grid: for each airspace, the index keeps the
+    cells fully inside the polygon, and the cells crossed by its boundary
+    with their segments and whether their center is inside the polygon.
+
+    Query points in a cell fully inside an airspace need no further test.
+    Other points are tested exactly, by counting the crossings between the
+    boundary segments of their cell and the line joining them to the center
+    of the cell.
+
+    Polygons must not contain a pole, and must not extend further than 180
+    degrees of longitude from their first vertex.
+
+    Instances can be pickled, e.g. to be shipped to worker processes.
+
+    :param lat: latitude values of the vertices of the polygons
+    :param lon: longitude values of the vertices of the polygons
+    :param offsets: the index of the first vertex of each polygon; all the
+        vertices belong to the same polygon when not set. Polygons are closed
+        implicitly.
+    :param lower: the lower altitude limit of each polygon, in meters
+        (default: no limit)
+    :param upper: the upper altitude limit of each polygon, in meters
+        (default: no limit)
+    :param tolerance: maximum chord error for the densification of the
+        edges, in meters
+    :param cell_size: approximate size of the grid cells, in degrees
+    :param ellps: the name of the ellipsoid (default: WGS84)
+
+    >>> index = AirspaceIndex(
+    ...     [40, 40, 50, 50, 45, 45, 55, 55],
+    ...     [0, 10, 10, 0, 5, 15, 15, 5],
+    ...     offsets=[0, 4],
+    ...     lower=[0, 3000],
+    ...     upper=[3000, 6000],
+    ... )
+    >>> index.query([45, 48, 48, 60], [2, 8, 8, 8], [1000, 1000, 4000, 1000])
+    array([ 0,  0,  1, -1])
+    """
+
+    def __init__(
+        self,
+        lat: Annotated[Any, "degree"],
+        lon: Annotated[Any, "degree"],
+        offsets: Any = None,
+        lower: Annotated[Any, "m"] = None,
+        upper: Annotated[Any, "m"] = None,
+        *,
+        tolerance: Annotated[Any, "m"] = 100,
+        cell_size: float = 1.0,
+        ellps: str = "WGS84",
+    ) -> None:
+        lat = np.asarray(lat, dtype=np.float64).ravel()
+        lon = np.asarray(lon, dtype=np.float64).ravel()
+        if lat.shape != lon.shape:
+            raise ValueError("lat and lon must have the same size")
+
+        start = _flight_starts(lat.shape[0], None, offsets)
+        first = np.flatnonzero(start)
+        n_polygons = first.shape[0]
+        #: lower altitude limit of each airspace, in meters
+        self.lower = np.broadcast_to(
+            np.asarray(-np.inf if lower is None else lower, dtype=np.float64),
+            (n_polygons,),
+        ).copy()
+        #: upper altitude limit of each airspace, in meters
+        self.upper = np.broadcast_to(
+            np.asarray(np.inf if upper is None else upper, dtype=np.float64),
+            (n_polygons,),
+        ).copy()
+
+        self.ellps = ellps
+        self.n_rows = max(1, round(180 / cell_size))
+        self.n_cols = max(1, round(360 / cell_size))
+
+        # each edge joins a vertex to the next one in its polygon
+        following = np.arange(1, lat.shape[0] + 1)
+        following[np.r_[first[1:], lat.shape[0]] - 1] = first
+        g_lat, g_lon, g_offsets = greatcircle_batch(
+            lat, lon, lat[following], lon[following], tolerance=tolerance
+        )
+        # consecutive points of a densified edge form a segment, longitudes
+        # are unwrapped around the first vertex of the polygon
+        end = np.flatnonzero(~_flight_starts(g_lat.shape[0], None, g_offsets))
+        edge_polygon = np.cumsum(start) - 1
+        seg_polygon = np.repeat(edge_polygon, np.diff(g_offsets))[end]
+        ref = lon[first][seg_polygon]
+        xa = ref + _wrap(g_lon[end - 1] - ref)
+        xb = ref + _wrap(g_lon[end] - ref)
+        ya, yb = g_lat[end - 1], g_lat[end]
+        #: segments of the rings (x0, y0, x1, y1), unwrapped longitudes
+        self.segments = np.stack([xa, ya, xb, yb], axis=-1)
+
+        # cells of the bounding box of each polygon form a block; columns
+        # are not wrapped, so that blocks never cross the antimeridian
+        x_min, x_max = np.minimum(xa, xb), np.maximum(xa, xb)
+        y_min, y_max = np.minimum(ya, yb), np.maximum(ya, yb)
+        r0 = np.full(n_polygons, self.n_rows, dtype=np.intp)
+        r1 = np.full(n_polygons, -1, dtype=np.intp)
+        c0 = np.full(n_polygons, np.iinfo(np.intp).max, dtype=np.intp)
+        c1 = np.full(n_polygons, np.iinfo(np.intp).min, dtype=np.intp)
+        np.minimum.at(r0, seg_polygon, self._rows(y_min))
+        np.maximum.at(r1, seg_polygon, self._rows(y_max))
+        np.minimum.at(c0, seg_polygon, self._cols(x_min))
+        np.maximum.at(c1, seg_polygon, self._cols(x_max))
+        width = c1 - c0 + 1
+        blocks = np.zeros(n_polygons + 1, dtype=np.intp)
+        np.cumsum((r1 - r0 + 1) * width, out=blocks[1:])
+
+        def block(p: Any, row: Any, col: Any) -> Any:
+            return blocks[p] + (row - r0[p]) * width[p] + col - c0[p]
+
+        block_polygon = np.repeat(np.arange(n_polygons), np.diff(blocks))
+        position = np.arange(blocks[-1]) - blocks[block_polygon]
+        block_row = r0[block_polygon] + position // width[block_polygon]
+        block_col = c0[block_polygon] + position % width[block_polygon]
+
+        # a center is inside its polygon if an odd number of segments cross
+        # the parallel of the center on its west: crossings are flagged in
+        # the first cell with a center on their east, and cumulated by row
+        row0 = self._center_rows(y_min)
+        row1 = self._center_rows(y_max)
+        s, row = _expand(np.arange(end.shape[0]), row0, row1)
+        yc = (row + 0.5) * self.height - 90
+        x = xa[s] + (yc - ya[s]) * (xb[s] - xa[s]) / (yb[s] - ya[s])
+        col = np.ceil((x + 180) / self.width - 0.5).astype(np.intp)
+        p = seg_polygon[s]
+        keep = col <= c1[p]
+        crossings = np.zeros(blocks[-1], dtype=np.intp)
+        np.add.at(crossings, block(p[keep], row[keep], col[keep]), 1)
+        cumulated = np.cumsum(crossings)
+        row_start = block(block_polygon, block_row, c0[block_polygon])
+        count = cumulated - cumulated[row_start] + crossings[row_start]
+        inside = count % 2 == 1
+
+        # cells overlapping the bounding box of each segment
+        k0, l0 = self._rows(y_min), self._cols(x_min)
+        k_size = self._rows(y_max) - k0 + 1
+        l_size = self._cols(x_max) - l0 + 1
+        seg_index, k = _expand(
+            np.arange(end.shape[0]), np.zeros_like(k0), k_size * l_size
+        )
+        seg_block = block(
+            seg_polygon[seg_index],
+            k0[seg_index] + k // l_size[seg_index],
+            l0[seg_index] + k % l_size[seg_index],
+        )
+        boundary = np.zeros(blocks[-1], dtype=np.bool_)
+        boundary[seg_block] = True
+
+        # entries of the index: cells of each polygon fully inside it, or
+        # crossed by its boundary, sorted by grid cell
+        entry = np.flatnonzero(inside | boundary)
+        cells = block_row[entry] * self.n_cols + block_col[entry] % self.n_cols
+        order = np.argsort(cells, kind="stable")
+        entry = entry[order]
+        #: airspace of each entry
+        self.polygon = block_polygon[entry]
+        #: center of the cell of each entry (x, y), unwrapped longitudes
+        self.centers = np.stack(
+            [
+                (block_col[entry] + 0.5) * self.width - 180,
+                (block_row[entry] + 0.5) * self.height - 90,
+            ],
+            axis=-1,
+        )
+        #: whether the center of the cell of each entry is in its airspace
+        self.inside = inside[entry]
+        #: entries in cell c are at indices starts[c]:starts[c + 1]
+        self.starts = np.searchsorted(
+            cells[order], np.arange(self.n_rows * self.n_cols + 1)
+        )
+
+        # segments in the cell of each entry
+        rank = np.full(blocks[-1], -1, dtype=np.intp)
+        rank[entry] = np.arange(entry.shape[0])
+        seg_entry = rank[seg_block]
+        order = np.argsort(seg_entry, kind="stable")
+        #: segments of entry e are seg_index[seg_starts[e]:seg_starts[e + 1]]
+        self.seg_index = seg_index[order]
+        self.seg_starts = np.searchsorted(
+            seg_entry[order], np.arange(entry.shape[0] + 1)
+        )
+
+    def __len__(self) -> int:
+        return self.lower.shape[0]
+
+    @property
+    def height(self) -> float:
+        return 180 / self.n_rows
+
+    @property
+    def width(self) -> float:
+        return 360 / self.n_cols
+
+    def _rows(self, lat: Any) -> npt.NDArray[np.intp]:
+        row = np.floor((lat + 90) / self.height)
+        return np.clip(row, 0, self.n_rows - 1).astype(np.intp)
+
+    def _cols(self, lon: Any) -> npt.NDArray[np.intp]:
+        # unwrapped columns
+        return np.floor((lon + 180) / self.width).astype(np.intp)
+
+    def _center_rows(self, lat: Any) -> npt.NDArray[np.intp]:
+        # the first row with a center at or above a latitude
+        return np.ceil((lat + 90) / self.height - 0.5).astype(np.intp)
+
+    def query_all(
+        self,
+        lat: Annotated[Any, "degree"],
+        lon: Annotated[Any, "degree"],
+        altitude: Annotated[Any, "m"] = None,
+    ) -> Tuple[npt.NDArray[np.intp], npt.NDArray[np.intp]]:
+        """Finds all the airspaces containing query points.
+
+        :param lat: latitude values of the query points
+        :param lon: longitude values of the query points
+        :param altitude: altitude values of the query points, in meters;
+            altitude limits are ignored when not set
+
+        :return: a tuple with the indices of the airspaces and offsets:
+            airspaces containing the i-th query point are at
+            ``offsets[i]:offsets[i + 1]``, in increasing order.
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64)).ravel()
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64)).ravel()
+        if altitude is not None:
+            altitude = np.broadcast_to(
+                np.asarray(altitude, dtype=np.float64), lat.shape
+            )
+
+        queries, indices = [], []
+        for start in range(0, lat.shape[0], _QUERY_CHUNK):
+            s = slice(start, start + _QUERY_CHUNK)
+            cells = self._rows(lat[s]) * self.n_cols
+            cells += self._cols(lon[s]) % self.n_cols
+            query, entry = _expand(
+                np.arange(cells.shape[0]),
+                self.starts[cells],
+                self.starts[cells + 1],
+            )
+            if altitude is not None:
+                polygon, alt = self.polygon[entry], altitude[s][query]
+                keep = (self.lower[polygon] <= alt) & (
+                    alt <= self.upper[polygon]
+                )
+                query, entry = query[keep], entry[keep]
+
+            # crossings between the boundary segments of the cell and the
+            # line from the point to the center of the cell
+            pair, k = _expand(
+                np.arange(query.shape[0]),
+                self.seg_starts[entry],
+                self.seg_starts[entry + 1],
+            )
+            cx, cy = self.centers[entry[pair]].T
+            px = cx + _wrap(lon[s][query[pair]] - cx)
+            py = lat[s][query[pair]]
+            x0, y0, x1, y1 = self.segments[self.seg_index[k]].T
+            # the side of each point, half-open at the vertices
+            side_p = (x1 - x0) * (py - y0) - (y1 - y0) * (px - x0) > 0
+            side_c = (x1 - x0) * (cy - y0) - (y1 - y0) * (cx - x0) > 0
+            side_0 = (cx - px) * (y0 - py) - (cy - py) * (x0 - px) > 0
+            side_1 = (cx - px) * (y1 - py) - (cy - py) * (x1 - px) > 0
+            crossed = (side_p != side_c) & (side_0 != side_1)
+            odd = np.bincount(pair[crossed], minlength=query.shape[0]) % 2
+            keep = self.inside[entry] != (odd == 1)
+
+            query, polygon = query[keep], self.polygon[entry[keep]]
+            order = np.lexsort((polygon, query))
+            queries.append(query[order] + start)
+            indices.append(polygon[order])
+
+        query = np.concatenate([np.empty(0, dtype=np.intp), *queries])
+        offsets = np.zeros(lat.shape[0] + 1, dtype=np.intp)
+        np.cumsum(np.bincount(query, minlength=lat.shape[0]), out=offsets[1:])
+        return np.concatenate([np.empty(0, dtype=np.intp), *indices]), offsets
+
+    def query(
+        self,
+        lat: Annotated[Any, "degree"],
+        lon: Annotated[Any, "degree"],
+        altitude: Annotated[Any, "m"] = None,
+    ) -> npt.NDArray[np.intp]:
+        """Finds the airspace containing each query point.
+
+        :param lat: latitude values of the query points
+        :param lon: longitude values of the query points
+        :param altitude: altitude values of the query points, in meters;
+            altitude limits are ignored when not set
+
+        :return: the index of the airspace containing each point, -1 if
+            none; the smallest index when several airspaces overlap.
+        """
+        indices, offsets = self.query_all(lat, lon, altitude)
+        result = np.full(offsets.shape[0] - 1, -1, dtype=np.intp)
+        found = offsets[1:] > offsets[:-1]
+        result[found] = indices[offsets[:-1][found]]
+        return result
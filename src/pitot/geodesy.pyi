@@ -1,10 +1,14 @@
-from typing import Any, Sequence, overload
+from typing import Any, NamedTuple, Sequence, overload
 
 from typing_extensions import Annotated
 
 import numpy as np
 import numpy.typing as npt
+from pyproj import Geod
 
+METHODS: tuple[str, ...]
+
+def get_geod(ellps: str = "WGS84") -> Geod: ...
 @overload
 def distance(
     lat1: Annotated[float, "degree"],
@@ -12,6 +16,9 @@ def distance(
     lat2: Annotated[float, "degree"],
     lon2: Annotated[float, "degree"],
     *args: Any,
+    method: str = "geodesic",
+    reference: tuple[float, float] | None = None,
+    ellps: str = "WGS84",
     **kwargs: Any,
 ) -> Annotated[float, "m"]: ...
 @overload
@@ -21,6 +28,9 @@ def distance(
     lat2: Annotated[Sequence[float] | npt.NDArray[np.float64], "degree"],
     lon2: Annotated[Sequence[float] | npt.NDArray[np.float64], "degree"],
     *args: Any,
+    method: str = "geodesic",
+    reference: tuple[float, float] | None = None,
+    ellps: str = "WGS84",
     **kwargs: Any,
 ) -> Annotated[npt.NDArray[np.float64], "m"]: ...
 @overload
@@ -30,6 +40,9 @@ def bearing(
     lat2: Annotated[float, "degree"],
     lon2: Annotated[float, "degree"],
     *args: Any,
+    method: str = "geodesic",
+    reference: tuple[float, float] | None = None,
+    ellps: str = "WGS84",
     **kwargs: Any,
 ) -> Annotated[float, "degree"]: ...
 @overload
@@ -39,6 +52,9 @@ def bearing(
     lat2: Annotated[Sequence[float] | npt.NDArray[np.float64], "degree"],
     lon2: Annotated[Sequence[float] | npt.NDArray[np.float64], "degree"],
     *args: Any,
+    method: str = "geodesic",
+    reference: tuple[float, float] | None = None,
+    ellps: str = "WGS84",
     **kwargs: Any,
 ) -> Annotated[npt.NDArray[np.float64], "degree"]: ...
 @overload
@@ -48,6 +64,9 @@ def destination(
     bearing: Annotated[float, "degree"],
     distance: Annotated[float, "m"],
     *args: Any,
+    method: str = "geodesic",
+    reference: tuple[float, float] | None = None,
+    ellps: str = "WGS84",
     **kwargs: Any,
 ) -> tuple[
     Annotated[float, "degree"],
@@ -63,6 +82,9 @@ def destination(
     ],
     distance: Annotated[Sequence[float] | npt.NDArray[np.float64], "m"],
     *args: Any,
+    method: str = "geodesic",
+    reference: tuple[float, float] | None = None,
+    ellps: str = "WGS84",
     **kwargs: Any,
 ) -> tuple[
     Annotated[npt.NDArray[np.float64], "degree"],
@@ -78,6 +100,9 @@ def destination(
     ],
     distance: Annotated[float | Sequence[float] | npt.NDArray[np.float64], "m"],
     *args: Any,
+    method: str = "geodesic",
+    reference: tuple[float, float] | None = None,
+    ellps: str = "WGS84",
     **kwargs: Any,
 ) -> tuple[
     Annotated[npt.NDArray[np.float64], "degree"],
@@ -90,5 +115,208 @@ def greatcircle(
     lat2: Annotated[float, "degree"],
     lon2: Annotated[float, "degree"],
     *args: Any,
+    ellps: str = "WGS84",
     **kwargs: Any,
 ) -> list[tuple[Annotated[float, "degree"], Annotated[float, "degree"]]]: ...
+def greatcircle_batch(
+    lat1: Annotated[
+        float | Sequence[float] | npt.NDArray[np.float64], "degree"
+    ],
+    lon1: Annotated[
+        float | Sequence[float] | npt.NDArray[np.float64], "degree"
+    ],
+    lat2: Annotated[
+        float | Sequence[float] | npt.NDArray[np.float64], "degree"
+    ],
+    lon2: Annotated[
+        float | Sequence[float] | npt.NDArray[np.float64], "degree"
+    ],
+    npts: int | Sequence[int] | npt.NDArray[np.int64] | None = None,
+    *,
+    tolerance: Annotated[float | None, "m"] = None,
+    endpoints: bool = True,
+    ellps: str = "WGS84",
+) -> tuple[
+    Annotated[npt.NDArray[np.float64], "degree"],
+    Annotated[npt.NDArray[np.float64], "degree"],
+    npt.NDArray[np.intp],
+]: ...
+def distance_matrix(
+    lat1: Annotated[Sequence[float] | npt.NDArray[np.float64], "degree"],
+    lon1: Annotated[Sequence[float] | npt.NDArray[np.float64], "degree"],
+    lat2: Annotated[
+        Sequence[float] | npt.NDArray[np.float64] | None, "degree"
+    ] = None,
+    lon2: Annotated[
+        Sequence[float] | npt.NDArray[np.float64] | None, "degree"
+    ] = None,
+    *,
+    symmetric: bool = False,
+    max_memory: int | None = None,
+    out: npt.NDArray[np.float64] | None = None,
+    ellps: str = "WGS84",
+) -> Annotated[npt.NDArray[np.float64], "m"]: ...
+def bearing_matrix(
+    lat1: Annotated[Sequence[float] | npt.NDArray[np.float64], "degree"],
+    lon1: Annotated[Sequence[float] | npt.NDArray[np.float64], "degree"],
+    lat2: Annotated[
+        Sequence[float] | npt.NDArray[np.float64] | None, "degree"
+    ] = None,
+    lon2: Annotated[
+        Sequence[float] | npt.NDArray[np.float64] | None, "degree"
+    ] = None,
+    *,
+    symmetric: bool = False,
+    max_memory: int | None = None,
+    out: npt.NDArray[np.float64] | None = None,
+    ellps: str = "WGS84",
+) -> Annotated[npt.NDArray[np.float64], "degree"]: ...
+
+class Kinematics(NamedTuple):
+    distance: Annotated[npt.NDArray[np.float64], "m"]
+    track: Annotated[npt.NDArray[np.float64], "degree"]
+    cumdist: Annotated[npt.NDArray[np.float64], "m"]
+    groundspeed: Annotated[npt.NDArray[np.float64], "m/s"]
+
+def kinematics(
+    lat: Annotated[Sequence[float] | npt.NDArray[np.float64], "degree"],
+    lon: Annotated[Sequence[float] | npt.NDArray[np.float64], "degree"],
+    timestamp: Any,
+    flight_id: Any = None,
+    *,
+    offsets: Sequence[int] | npt.NDArray[np.int64] | None = None,
+    ellps: str = "WGS84",
+) -> Kinematics: ...
+
+class PointIndex:
+    ellps: str
+    n_rows: int
+    n_cols: int
+    order: npt.NDArray[np.intp]
+    lat: npt.NDArray[np.float64]
+    lon: npt.NDArray[np.float64]
+    xyz: npt.NDArray[np.float64]
+    starts: npt.NDArray[np.intp]
+
+    def __init__(
+        self,
+        lat: Annotated[Sequence[float] | npt.NDArray[np.float64], "degree"],
+        lon: Annotated[Sequence[float] | npt.NDArray[np.float64], "degree"],
+        cell_size: float = 1.0,
+        ellps: str = "WGS84",
+    ) -> None: ...
+    def __len__(self) -> int: ...
+    def query_radius(
+        self,
+        lat: Annotated[
+            float | Sequence[float] | npt.NDArray[np.float64], "degree"
+        ],
+        lon: Annotated[
+            float | Sequence[float] | npt.NDArray[np.float64], "degree"
+        ],
+        radius: Annotated[
+            float | Sequence[float] | npt.NDArray[np.float64], "m"
+        ],
+    ) -> tuple[
+        npt.NDArray[np.intp],
+        Annotated[npt.NDArray[np.float64], "m"],
+        npt.NDArray[np.intp],
+    ]: ...
+    def query(
+        self,
+        lat: Annotated[
+            float | Sequence[float] | npt.NDArray[np.float64], "degree"
+        ],
+        lon: Annotated[
+            float | Sequence[float] | npt.NDArray[np.float64], "degree"
+        ],
+        k: int = 1,
+    ) -> tuple[
+        npt.NDArray[np.intp], Annotated[npt.NDArray[np.float64], "m"]
+    ]: ...
+
+class CrossTrack(NamedTuple):
+    cross_track: Annotated[npt.NDArray[np.float64], "m"]
+    along_track: Annotated[npt.NDArray[np.float64], "m"]
+    segment: npt.NDArray[np.intp]
+
+def cross_track(
+    lat: Annotated[float | Sequence[float] | npt.NDArray[np.float64], "degree"],
+    lon: Annotated[float | Sequence[float] | npt.NDArray[np.float64], "degree"],
+    lat1: Annotated[
+        float | Sequence[float] | npt.NDArray[np.float64], "degree"
+    ],
+    lon1: Annotated[
+        float | Sequence[float] | npt.NDArray[np.float64], "degree"
+    ],
+    lat2: Annotated[
+        float | Sequence[float] | npt.NDArray[np.float64] | None, "degree"
+    ] = None,
+    lon2: Annotated[
+        float | Sequence[float] | npt.NDArray[np.float64] | None, "degree"
+    ] = None,
+    *,
+    offsets: Sequence[int] | npt.NDArray[np.int64] | None = None,
+    route: int | Sequence[int] | npt.NDArray[np.int64] | None = None,
+    ellps: str = "WGS84",
+) -> CrossTrack: ...
+
+class AirspaceIndex:
+    lower: npt.NDArray[np.float64]
+    upper: npt.NDArray[np.float64]
+    ellps: str
+    n_rows: int
+    n_cols: int
+    segments: npt.NDArray[np.float64]
+    polygon: npt.NDArray[np.intp]
+    centers: npt.NDArray[np.float64]
+    inside: npt.NDArray[np.bool_]
+    starts: npt.NDArray[np.intp]
+    seg_index: npt.NDArray[np.intp]
+    seg_starts: npt.NDArray[np.intp]
+
+    def __init__(
+        self,
+        lat: Annotated[Sequence[float] | npt.NDArray[np.float64], "degree"],
+        lon: Annotated[Sequence[float] | npt.NDArray[np.float64], "degree"],
+        offsets: Sequence[int] | npt.NDArray[np.int64] | None = None,
+        lower: Annotated[
+            float | Sequence[float] | npt.NDArray[np.float64] | None, "m"
+        ] = None,
+        upper: Annotated[
+            float | Sequence[float] | npt.NDArray[np.float64] | None, "m"
+        ] = None,
+        *,
+        tolerance: Annotated[float, "m"] = 100,
+        cell_size: float = 1.0,
+        ellps: str = "WGS84",
+    ) -> None: ...
+    def __len__(self) -> int: ...
+    @property
+    def height(self) -> float: ...
+    @property
+    def width(self) -> float: ...
+    def query_all(
+        self,
+        lat: Annotated[
+            float | Sequence[float] | npt.NDArray[np.float64], "degree"
+        ],
+        lon: Annotated[
+            float | Sequence[float] | npt.NDArray[np.float64], "degree"
+        ],
+        altitude: Annotated[
+            float | Sequence[float] | npt.NDArray[np.float64] | None, "m"
+        ] = None,
+    ) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.intp]]: ...
+    def query(
+        self,
+        lat: Annotated[
+            float | Sequence[float] | npt.NDArray[np.float64], "degree"
+        ],
+        lon: Annotated[
+            float | Sequence[float] | npt.NDArray[np.float64], "degree"
+        ],
+        altitude: Annotated[
+            float | Sequence[float] | npt.NDArray[np.float64] | None, "m"
+        ] = None,
+    ) -> npt.NDArray[np.intp]: ...
@@ -1,103 +1,147 @@
-from typing import Any, Tuple
+import functools
+from typing import Any, Optional, Tuple
 
 from impunity import impunity
 from typing_extensions import Annotated
 
 import numpy as np
-
-__all__ = ["density", "pressure", "sound_speed", "temperature"]
+import numpy.typing as npt
+
+from .raw import isa as raw
+from .raw.arrow import arrow_io
+from .raw.isa import Workspace
+from .raw.profiling import profiled
+
+__all__ = [
+    "AtmosphereTable",
+    "density",
+    "density_altitude",
+    "get_table",
+    "pressure",
+    "pressure_altitude",
+    "qnh_altitude",
+    "sound_speed",
+    "temperature",
+]
 
 m = Annotated[Any, "meters"]
 
+# (impunity only parses subscripted annotations with a unit)
+_Workspace = Optional[Workspace]
+_Outputs = Optional[Tuple[Any, Any, Any]]
+
 # Cp/Cv for air
-GAMMA: Annotated[float, "dimensionless"] = 1.40
+GAMMA: Annotated[float, "dimensionless"] = raw.GAMMA
 # sea level pressure ISA
-P_0: Annotated[float, "Pa"] = 101325.0
+P_0: Annotated[float, "Pa"] = raw.P_0
 # gas constant, sea level ISA
-R: Annotated[float, "m^2 / (s^2 * K)"] = 287.05287
+R: Annotated[float, "m^2 / (s^2 * K)"] = raw.R
 # sea level density ISA
-RHO_0: Annotated[float, "kg / m^3"] = 1.225
+RHO_0: Annotated[float, "kg / m^3"] = raw.RHO_0
 # until altitude = 22km
-STRATOSPHERE_TEMP: Annotated[float, "K"] = 216.65
+STRATOSPHERE_TEMP: Annotated[float, "K"] = raw.STRATOSPHERE_TEMP
 # Gravitational acceleration
-G_0: Annotated[float, "m / s^2"] = 9.80665
+G_0: Annotated[float, "m / s^2"] = raw.G_0
 # Temperature gradient below tropopause, ISA
-BETA_T: Annotated[float, "K / m"] = -0.0065
+BETA_T: Annotated[float, "K / m"] = raw.BETA_T
 # pressure at tropopause, ISA
-TROPOPAUSE_PRESS: Annotated[float, "Pa"] = 22632.0401
+TROPOPAUSE_PRESS: Annotated[float, "Pa"] = raw.TROPOPAUSE_PRESS
 # tropopause altitude
-H_TROP: Annotated[int, "m"] = 11000
+H_TROP: Annotated[int, "m"] = raw.H_TROP
 # sea level altitude
 SEA_ALT: Annotated[Any, "m"] = 0
 
 
 @impunity
-def temperature(h: Annotated[Any, "m"]) -> Annotated[Any, "K"]:
+def temperature(
+    h: Annotated[Any, "m"],
+    out: Any = None,
+    work: _Workspace = None,
+) -> Annotated[Any, "K"]:
     """Temperature of ISA atmosphere
 
     :param h: the altitude (by default in meters), :math:`0 < h < 84852`
         (will be clipped when outside range, integer input allowed)
+    :param out: an optional array (in K), where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
 
     :return: the temperature (in K)
 
     """
+    return raw.temperature(h, out=out, work=work)
 
-    temp_0: Annotated[Any, "K"] = 288.15
-    c: Annotated[Any, "K/m"] = 0.0065
-    temp: Annotated[Any, "K"] = np.maximum(
-        temp_0 - c * h,
-        STRATOSPHERE_TEMP,
-    )
-    return temp
+
+# (not as a decorator, impunity rewrites the source of decorated functions)
+temperature = profiled(temperature, kernel=False)
 
 
 @impunity
-def density(h: Annotated[Any, "m"]) -> Annotated[Any, "kg * m^-3"]:
+def density(
+    h: Annotated[Any, "m"],
+    method: str = "analytic",
+    out: Any = None,
+    work: _Workspace = None,
+) -> Annotated[Any, "kg * m^-3"]:
     """Density of ISA atmosphere
 
     :param h: the altitude (by default in meters), :math:`0 < h < 84852`
         (will be clipped when outside range, integer input allowed)
+    :param method: "analytic" (default) or "table" to interpolate values
+        precomputed by :func:`get_table`
+    :param out: an optional array (in kg/m3), where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
 
     :return: the density :math:`\\rho`, in kg/m3
 
     """
-    temp: Annotated[Any, "K"] = temperature(h)
-    temp_0: Annotated[Any, "K"] = 288.15
-    density_troposphere: Annotated[Any, "kg * m^-3"] = (
-        RHO_0 * (temp / temp_0) ** 4.256848
-    )
-    delta: Annotated[Any, "dimensionless"] = np.maximum(0, h - H_TROP)
-    density: Annotated[Any, "kg * m^-3"] = density_troposphere * np.exp(
-        -delta / 6341.5522
-    )
-    return density
+    if method == "table":
+        return get_table().density(h, out=out)
+    if method != "analytic":
+        raise ValueError(f"Unknown method {method!r}")
+    return raw.density(h, out=out, work=work)
+
+
+density = profiled(density, kernel=False)
 
 
 @impunity
-def pressure(h: Annotated[Any, "m"]) -> Annotated[Any, "Pa"]:
+def pressure(
+    h: Annotated[Any, "m"],
+    method: str = "analytic",
+    out: Any = None,
+    work: _Workspace = None,
+) -> Annotated[Any, "Pa"]:
     """Pressure of ISA atmosphere
 
     :param h: the altitude (by default in meters), :math:`0 < h < 84852`
         (will be clipped when outside range, integer input allowed)
+    :param method: "analytic" (default) or "table" to interpolate values
+        precomputed by :func:`get_table`
+    :param out: an optional array (in Pa), where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
 
     :return: the pressure, in Pa
 
     """
-    temp: Annotated[Any, "K"] = temperature(h)
-    temp_0: Annotated[Any, "K"] = temperature(SEA_ALT)
-    delta: Annotated[Any, "dimensionless"] = np.maximum(0, h - H_TROP)
-
-    press: Annotated[Any, "Pa"] = np.where(
-        h < H_TROP,
-        P_0 * (temp / temp_0) ** (-G_0 / (BETA_T * R)),
-        TROPOPAUSE_PRESS * np.exp(-G_0 / (R * STRATOSPHERE_TEMP) * delta),
-    )
-    return press
+    if method == "table":
+        return get_table().pressure(h, out=out)
+    if method != "analytic":
+        raise ValueError(f"Unknown method {method!r}")
+    return raw.pressure(h, out=out, work=work)
+
+
+pressure = profiled(pressure, kernel=False)
 
 
 @impunity
 def atmosphere(
     h: Annotated[Any, "m"],
+    method: str = "analytic",
+    out: _Outputs = None,
+    work: _Workspace = None,
 ) -> Tuple[
     Annotated[Any, "Pa"],
     Annotated[Any, "kg * m^-3"],
@@ -107,41 +151,300 @@ def atmosphere(
 
     :param h: the altitude (by default in meters), :math:`0 < h < 84852`
         (will be clipped when outside range, integer input allowed)
+    :param method: "analytic" (default) or "table" to interpolate values
+        precomputed by :func:`get_table`
+    :param out: an optional tuple of three arrays, where the results are
+        stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
 
     :return: a tuple (pressure, density, temperature)
 
     """
-    temp: Annotated[Any, "K"] = np.maximum(
-        288.15 - 0.0065 * h,
-        STRATOSPHERE_TEMP,
-    )
-    temp_0: Annotated[Any, "K"] = temperature(SEA_ALT)
+    if method == "table":
+        return get_table().atmosphere(h, out=out)
+    if method != "analytic":
+        raise ValueError(f"Unknown method {method!r}")
+    return raw.atmosphere(h, out=out, work=work)
 
-    density_troposphere: Annotated[Any, "kg * m^-3"] = (
-        RHO_0 * (temp / temp_0) ** 4.256848
-    )
-    delta: Annotated[Any, "dimensionless"] = np.maximum(0, h - 11000)
-    den: Annotated[Any, "kg * m^-3"] = density_troposphere * np.exp(
-        -delta / 6341.5522
-    )
-    press: Annotated[Any, "Pa"] = np.where(
-        h < H_TROP,
-        P_0 * (temp / temp_0) ** (-G_0 / (BETA_T * R)),
-        TROPOPAUSE_PRESS * np.exp(-G_0 / (R * STRATOSPHERE_TEMP) * delta),
-    )
-    return press, den, temp
+
+atmosphere = profiled(atmosphere, kernel=False)
 
 
 @impunity
-def sound_speed(h: Annotated[Any, "m"]) -> Annotated[Any, "m/s"]:
+def sound_speed(
+    h: Annotated[Any, "m"],
+    out: Any = None,
+    work: _Workspace = None,
+) -> Annotated[Any, "m/s"]:
     """Speed of sound in ISA atmosphere
 
     :param h: the altitude (by default in meters), :math:`0 < h < 84852`
         (will be clipped when outside range, integer input allowed)
+    :param out: an optional array (in m/s), where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
 
     :return: the speed of sound :math:`a`, in m/s
 
     """
-    temp: Annotated[Any, "K"] = temperature(h)
-    a: Annotated[Any, "m/s"] = np.sqrt(GAMMA * R * temp)
-    return a
+    return raw.sound_speed(h, out=out, work=work)
+
+
+sound_speed = profiled(sound_speed, kernel=False)
+
+
+@impunity
+def pressure_altitude(
+    p: Annotated[Any, "Pa"],
+    out: Any = None,
+    work: _Workspace = None,
+) -> Annotated[Any, "m"]:
+    """Pressure altitude: the altitude of a static pressure in ISA atmosphere
+
+    This is the inverse of :func:`pressure`, in closed form, below and above
+    the tropopause.
+
+    :param p: the static pressure (by default in Pa)
+    :param out: an optional array (in m), where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
+
+    :return: the pressure altitude, in m
+
+    >>> pressure_altitude(pressure(10_000))
+    10000.0...
+    """
+    return raw.pressure_altitude(p, out=out, work=work)
+
+
+pressure_altitude = profiled(pressure_altitude, kernel=False)
+
+
+@impunity
+def density_altitude(
+    rho: Annotated[Any, "kg * m^-3"],
+    out: Any = None,
+    work: _Workspace = None,
+) -> Annotated[Any, "m"]:
+    """Density altitude: the altitude of a density in ISA atmosphere
+
+    This is the inverse of :func:`density`, in closed form, below and above
+    the tropopause.
+
+    :param rho: the density (by default in kg/m3)
+    :param out: an optional array (in m), where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
+
+    :return: the density altitude, in m
+
+    """
+    return raw.density_altitude(rho, out=out, work=work)
+
+
+density_altitude = profiled(density_altitude, kernel=False)
+
+
+@impunity
+def qnh_altitude(
+    h: Annotated[Any, "m"],
+    qnh: Annotated[Any, "hPa"],
+    out: Any = None,
+    work: _Workspace = None,
+) -> Annotated[Any, "m"]:
+    """Altitude indicated by an altimeter set to QNH, from pressure altitude
+
+    Pressure altitudes (e.g. barometric altitudes in Mode S and ADS-B) are
+    read on altimeters set to the standard pressure (1013.25 hPa). The
+    altitude above sea level is approximated by the altitude read on an
+    altimeter set to the local QNH, for the same static pressure.
+
+    :param h: the pressure altitude (by default in meters)
+    :param qnh: the altimeter setting (by default in hPa)
+    :param out: an optional array (in m), where the result is stored
+    :param work: an optional :class:`~pitot.raw.Workspace` with scratch
+        arrays, reused between calls
+
+    :return: the altitude corrected for QNH, in m
+
+    """
+    setting: Annotated[Any, "Pa"] = qnh
+    return raw.qnh_altitude(h, setting, out=out, work=work)
+
+
+qnh_altitude = profiled(qnh_altitude, kernel=False)
+
+
+class AtmosphereTable:
+    """Tabulated ISA pressure and density.
+
+    Pressure and density are precomputed on a regular altitude grid (with a
+    node at the tropopause), and evaluated by cubic Hermite interpolation
+    using the analytic derivatives. Evaluation only involves a lookup and a
+    few multiplications and additions per element, no power or exponential.
+
+    With the default step of 100 m, the relative error with respect to the
+    analytic formulas remains below 1e-9.
+
+    Altitudes (in meters) are clipped to the range of the table.
+
+    :param step: the altitude step of the grid, in meters, must divide the
+        distance between the lowest altitude and the tropopause
+    :param h_min: the lowest altitude of the grid, in meters
+    :param h_max: the highest altitude of the grid, in meters
+
+    >>> table = AtmosphereTable()
+    >>> table.pressure(11000)
+    np.float64(22632.04...)
+    """
+
+    def __init__(
+        self,
+        step: Annotated[float, "m"] = 100.0,
+        h_min: Annotated[float, "m"] = -1000.0,
+        h_max: Annotated[float, "m"] = 86000.0,
+    ) -> None:
+        n = round((h_max - h_min) / step)
+        if n < 1 or abs((H_TROP - h_min) / step % 1) > 1e-9:
+            raise ValueError(
+                f"step must divide {H_TROP - h_min} (from h_min to the "
+                "tropopause)"
+            )
+        self.step = step
+        self.h_min = h_min
+        self.h_max = h_min + n * step
+
+        h = h_min + step * np.arange(n + 1)
+        below, above = _analytic_derivatives(h)
+        self.pressure_coefs = _hermite(
+            pressure(h), step * below[0][1:], step * above[0][:-1]
+        )
+        self.density_coefs = _hermite(
+            density(h), step * below[1][1:], step * above[1][:-1]
+        )
+
+    def __repr__(self) -> str:
+        return (
+            f"AtmosphereTable(step={self.step}, "
+            f"h_min={self.h_min}, h_max={self.h_max})"
+        )
+
+    def _locate(self, h: Any) -> Tuple[Any, Any]:
+        """Returns the interval index and position within the interval."""
+        x = np.array(h, dtype=np.float64, ndmin=1)
+        x -= self.h_min
+        x *= 1 / self.step
+        # the upper bound keeps the last node in the last interval
+        upper = np.nextafter(self.pressure_coefs.shape[1], 0)
+        np.clip(x, 0, upper, out=x)
+        idx = x.astype(np.intp)
+        x -= idx
+        return idx, x
+
+    @staticmethod
+    def _eval(coefs: npt.NDArray[np.float64], idx: Any, t: Any) -> Any:
+        # Horner's scheme
+        y = coefs[3].take(idx, mode="clip")
+        tmp = coefs[2].take(idx, mode="clip")
+        for k in (2, 1, 0):
+            if k < 2:
+                coefs[k].take(idx, mode="clip", out=tmp)
+            y *= t
+            y += tmp
+        return raw._cast(y)
+
+    @staticmethod
+    def _output(y: Any, shape: Tuple[int, ...], out: Any) -> Any:
+        """Reshapes the result, or stores it in the output array."""
+        if out is None:
+            return y.reshape(shape)[()]
+        np.copyto(out, y.reshape(shape))
+        return out
+
+    @profiled
+    @arrow_io
+    def pressure(
+        self, h: Annotated[Any, "m"], out: Any = None
+    ) -> Annotated[Any, "Pa"]:
+        """Pressure of ISA atmosphere, see :func:`pressure`."""
+        idx, t = self._locate(h)
+        y = self._eval(self.pressure_coefs, idx, t)
+        return self._output(y, np.shape(h), out)
+
+    @profiled
+    @arrow_io
+    def density(
+        self, h: Annotated[Any, "m"], out: Any = None
+    ) -> Annotated[Any, "kg * m^-3"]:
+        """Density of ISA atmosphere, see :func:`density`."""
+        idx, t = self._locate(h)
+        y = self._eval(self.density_coefs, idx, t)
+        return self._output(y, np.shape(h), out)
+
+    @profiled
+    @arrow_io
+    def atmosphere(
+        self,
+        h: Annotated[Any, "m"],
+        out: _Outputs = None,
+    ) -> Tuple[
+        Annotated[Any, "Pa"],
+        Annotated[Any, "kg * m^-3"],
+        Annotated[Any, "K"],
+    ]:
+        """Pressure, density and temperature, see :func:`atmosphere`."""
+        idx, t = self._locate(h)
+        shape = np.shape(h)
+        p_out, rho_out, temp_out = (None, None, None) if out is None else out
+        press = self._output(
+            self._eval(self.pressure_coefs, idx, t), shape, p_out
+        )
+        rho = self._output(
+            self._eval(self.density_coefs, idx, t), shape, rho_out
+        )
+        temp = raw.temperature(h, out=temp_out)
+        return press, rho, temp
+
+
+def _analytic_derivatives(h: Any) -> Tuple[Any, Any]:
+    """Derivatives of (pressure, density) w.r.t. altitude (in m), as limits
+    from below and from above, which differ at the tropopause."""
+    press, rho, temp = atmosphere(h)
+    derivatives = []
+    for strato in [h > H_TROP, h >= H_TROP]:
+        # d(ln p)/dh and d(ln rho)/dh in both layers
+        dlnp = np.where(
+            strato, -G_0 / (R * STRATOSPHERE_TEMP), -G_0 / (R * temp)
+        )
+        dlnrho = np.where(strato, -1 / 6341.5522, 4.256848 * BETA_T / temp)
+        derivatives.append((press * dlnp, rho * dlnrho))
+    return derivatives[0], derivatives[1]
+
+
+def _hermite(
+    y: npt.NDArray[np.float64],
+    dy_end: npt.NDArray[np.float64],
+    dy_start: npt.NDArray[np.float64],
+) -> npt.NDArray[np.float64]:
+    """Polynomial coefficients of cubic Hermite splines, for the position
+    t in [0, 1] within each interval. Derivatives are scaled by the step."""
+    y0, y1 = y[:-1], y[1:]
+    return np.stack(
+        [
+            y0,
+            dy_start,
+            3 * (y1 - y0) - 2 * dy_start - dy_end,
+            2 * (y0 - y1) + dy_start + dy_end,
+        ]
+    )
+
+
+@functools.lru_cache()
+def get_table(step: Annotated[float, "m"] = 100.0) -> AtmosphereTable:
+    """Returns the (cached) tabulated atmosphere for a given altitude step.
+
+    The table is built on first use, then shared by all calls with
+    ``method="table"``.
+    """
+    return AtmosphereTable(step)
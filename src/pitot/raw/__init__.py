@@ -0,0 +1,66 @@
+"""
+Unit-free kernels for the International Standard Atmosphere and air speed
+conversions.
+
+Functions in :mod:`pitot.isa` and :mod:`pitot.aero` are decorated with
+``impunity`` to check and convert physical units. The functions in this
+namespace take and return plain numbers (Python scalars, NumPy arrays or
+pandas Series) in fixed units and skip all annotation handling:
+
+- :mod:`pitot.raw.isa` works in SI units (m, K, Pa, kg/m3, m/s);
+- :mod:`pitot.raw.aero` works in aviation units (speeds in kts, altitudes
+  in ft).
+
+When all arguments are Python int or float, computations go through the
+:mod:`math` module rather than NumPy, which is several times faster than
+the NumPy scalar machinery and returns a Python float. Results agree with
+those of arrays within a few ULPs, as :mod:`math` and NumPy may round powers
+and exponentials differently; cancellations amplify these differences in
+air speed conversions at low speeds (about 1e-11 kts), and in
+``qnh_altitude`` near zero altitude.
+
+The decorated functions delegate to these kernels.
+
+The same functions are also available as ufuncs (with broadcasting, ``out=``,
+``where=`` and ``dtype=`` arguments) in :mod:`pitot.raw.ufuncs`, which is not
+imported by default.
+
+All these functions, and the decorated ones, can be evaluated in float32
+from end to end within the :func:`precision` context manager.
+
+All these functions, and the decorated ones, also accept an ``out=`` array
+(a tuple of three arrays for ``atmosphere``) and a :class:`Workspace` of
+scratch arrays: repeated calls on batches of the same shape then allocate no
+memory at all.
+
+Large arrays may be evaluated on several cores within the :func:`parallel`
+context manager, see :mod:`pitot.raw.executor`.
+
+Large arrays with few distinct values (e.g. altitudes in steps of 25 ft)
+may be evaluated on these values only within the :func:`factorized` context
+manager, see :mod:`pitot.raw.factorization`.
+
+Calls, elements and timings of all the public functions of pitot may be
+recorded within the :func:`profile` context manager (or with the
+``PITOT_PROFILE`` environment variable), see :mod:`pitot.raw.profiling`.
+
+>>> from pitot.raw import aero
+>>> aero.cas2tas(250.0, 10_000.0)
+288.71...
+"""
+
+from . import aero, isa
+from .executor import parallel
+from .factorization import factorized
+from .isa import Workspace, precision
+from .profiling import profile
+
+__all__ = [
+    "Workspace",
+    "aero",
+    "factorized",
+    "isa",
+    "parallel",
+    "precision",
+    "profile",
+]
@@ -0,0 +1,286 @@
+"""Unit-free kernels of :mod:`pitot.aero`, in aviation units.
+
+Air speeds are in kts, altitudes in ft and Mach numbers dimensionless.
+"""
+
+import math
+from typing import Any, List, Optional
+
+import numpy as np
+
+from . import isa
+from .isa import Workspace, _buffers, _cast, _kernel, _result
+
+__all__ = [
+    "cas2mach",
+    "cas2tas",
+    "eas2tas",
+    "mach2cas",
+    "mach2tas",
+    "tas2cas",
+    "tas2eas",
+    "tas2mach",
+]
+
+# one knot and one foot, in SI units
+KTS = 1852 / 3600
+FT = 0.3048
+
+
+# Scalar path, with the math module, for Python int and float arguments.
+
+
+def _scalar_tas2mach(tas: float, h: float) -> float:
+    return tas * KTS / isa._scalar_sound_speed(h * FT)
+
+
+def _scalar_mach2tas(M: float, h: float) -> float:
+    return M * isa._scalar_sound_speed(h * FT) / KTS
+
+
+def _scalar_eas2tas(eas: float, h: float) -> float:
+    return eas * math.sqrt(isa.RHO_0 / isa._scalar_density(h * FT))
+
+
+def _scalar_tas2eas(tas: float, h: float) -> float:
+    return tas * math.sqrt(isa._scalar_density(h * FT) / isa.RHO_0)
+
+
+def _scalar_cas2tas(cas: float, h: float) -> float:
+    p, rho, _temp = isa._scalar_atmosphere(h * FT)
+    cas_ = cas * KTS
+    qdyn = isa.P_0 * (
+        (1.0 + isa.RHO_0 * cas_ * cas_ / (7.0 * isa.P_0)) ** 3.5 - 1.0
+    )
+    tas = math.sqrt(7.0 * p / rho * ((1.0 + qdyn / p) ** (2.0 / 7.0) - 1.0))
+    return (-tas if cas < 0 else tas) / KTS
+
+
+def _scalar_tas2cas(tas: float, h: float) -> float:
+    p, rho, _temp = isa._scalar_atmosphere(h * FT)
+    tas_ = tas * KTS
+    qdyn = p * ((1.0 + rho * tas_ * tas_ / (7.0 * p)) ** 3.5 - 1.0)
+    cas = math.sqrt(
+        7.0
+        * isa.P_0
+        / isa.RHO_0
+        * ((qdyn / isa.P_0 + 1.0) ** (2.0 / 7.0) - 1.0)
+    )
+    return (-cas if tas < 0 else cas) / KTS
+
+
+def _scalar_mach2cas(M: float, h: float) -> float:
+    return _scalar_tas2cas(_scalar_mach2tas(M, h), h)
+
+
+def _scalar_cas2mach(cas: float, h: float) -> float:
+    return _scalar_tas2mach(_scalar_cas2tas(cas, h), h)
+
+
+# Array kernels, writing into preallocated arrays, with the operations of the
+# scalar path: results agree within a few ULPs, or about 1e-11 kts at low
+# speeds where (1 + x) ** 3.5 - 1 cancels out. The input speed may be the
+# output array (for chained conversions), so it is always read before the
+# output is first written. The temperature is not needed, so the ratio to T_0
+# is computed in place.
+
+
+def _tas2mach(tas: Any, h: Any, out: Any, a: Any) -> None:
+    np.multiply(h, FT, out=a)
+    isa._sound_speed(a, a)
+    np.multiply(tas, KTS, out=out)
+    np.divide(out, a, out=out)
+
+
+def _mach2tas(M: Any, h: Any, out: Any, a: Any) -> None:
+    np.multiply(h, FT, out=a)
+    isa._sound_speed(a, a)
+    np.multiply(M, a, out=out)
+    np.divide(out, KTS, out=out)
+
+
+def _density_ratio(h: Any, floats: List[Any], inverse: bool) -> None:
+    """Square root of the density ratio (or its inverse)."""
+    alt, rho, delta = floats
+    np.multiply(h, FT, out=alt)
+    isa._density(alt, rho, delta)
+    if inverse:
+        np.divide(isa.RHO_0, rho, out=rho)
+    else:
+        np.divide(rho, isa.RHO_0, out=rho)
+    np.sqrt(rho, out=rho)
+
+
+def _cas2tas(
+    cas: Any, h: Any, out: Any, floats: List[Any], masks: List[Any]
+) -> None:
+    cas_, p, rho, ratio, delta = floats
+    negative, mask = masks
+    np.less(cas, 0, out=negative)
+    np.multiply(cas, KTS, out=cas_)
+    # dynamic pressure, in out
+    np.multiply(isa.RHO_0, cas_, out=out)
+    np.multiply(out, cas_, out=out)
+    np.divide(out, 7.0 * isa.P_0, out=out)
+    np.add(1.0, out, out=out)
+    np.power(out, 3.5, out=out)
+    np.subtract(out, 1.0, out=out)
+    np.multiply(isa.P_0, out, out=out)
+    # the altitude (in m) replaces cas_
+    np.multiply(h, FT, out=cas_)
+    isa._atmosphere(cas_, p, rho, ratio, ratio, delta, mask)
+    np.multiply(7.0, p, out=ratio)
+    np.divide(ratio, rho, out=ratio)
+    np.divide(out, p, out=out)
+    np.add(1.0, out, out=out)
+    np.power(out, 2.0 / 7.0, out=out)
+    np.subtract(out, 1.0, out=out)
+    np.multiply(ratio, out, out=out)
+    np.sqrt(out, out=out)
+    np.negative(out, out=out, where=negative)
+    np.divide(out, KTS, out=out)
+
+
+def _tas2cas(
+    tas: Any, h: Any, out: Any, floats: List[Any], masks: List[Any]
+) -> None:
+    tas_, p, rho, ratio, delta = floats
+    negative, mask = masks
+    np.less(tas, 0, out=negative)
+    np.multiply(tas, KTS, out=tas_)
+    # the altitude (in m) goes to out, as tas is not needed anymore
+    np.multiply(h, FT, out=out)
+    isa._atmosphere(out, p, rho, ratio, ratio, delta, mask)
+    # dynamic pressure, in ratio
+    np.multiply(rho, tas_, out=ratio)
+    np.multiply(ratio, tas_, out=ratio)
+    np.multiply(7.0, p, out=delta)
+    np.divide(ratio, delta, out=ratio)
+    np.add(1.0, ratio, out=ratio)
+    np.power(ratio, 3.5, out=ratio)
+    np.subtract(ratio, 1.0, out=ratio)
+    np.multiply(p, ratio, out=ratio)
+    np.divide(ratio, isa.P_0, out=ratio)
+    np.add(ratio, 1.0, out=ratio)
+    np.power(ratio, 2.0 / 7.0, out=ratio)
+    np.subtract(ratio, 1.0, out=ratio)
+    np.multiply(7.0 * isa.P_0 / isa.RHO_0, ratio, out=out)
+    np.sqrt(out, out=out)
+    np.negative(out, out=out, where=negative)
+    np.divide(out, KTS, out=out)
+
+
+@_kernel(_scalar_tas2mach)
+def tas2mach(
+    tas: Any, h: Any, out: Any = None, work: Optional[Workspace] = None
+) -> Any:
+    """Mach number from TAS (in kts) at altitude h (in ft)."""
+    tas, h = _cast(tas), _cast(h)
+    if out is None and type(tas) in (float, int) and type(h) in (float, int):
+        return _scalar_tas2mach(tas, h)
+    arrays = np.asarray(tas), np.asarray(h)
+    result, (a,), _ = _buffers(arrays, out, work, 1)
+    _tas2mach(*arrays, result, a)
+    return _result((tas, h), result, out)
+
+
+@_kernel(_scalar_mach2tas)
+def mach2tas(
+    M: Any, h: Any, out: Any = None, work: Optional[Workspace] = None
+) -> Any:
+    """TAS (in kts) from Mach number at altitude h (in ft)."""
+    M, h = _cast(M), _cast(h)
+    if out is None and type(M) in (float, int) and type(h) in (float, int):
+        return _scalar_mach2tas(M, h)
+    arrays = np.asarray(M), np.asarray(h)
+    result, (a,), _ = _buffers(arrays, out, work, 1)
+    _mach2tas(*arrays, result, a)
+    return _result((M, h), result, out)
+
+
+@_kernel(_scalar_eas2tas)
+def eas2tas(
+    eas: Any, h: Any, out: Any = None, work: Optional[Workspace] = None
+) -> Any:
+    """TAS (in kts) from EAS (in kts) at altitude h (in ft)."""
+    eas, h = _cast(eas), _cast(h)
+    if out is None and type(eas) in (float, int) and type(h) in (float, int):
+        return _scalar_eas2tas(eas, h)
+    arrays = np.asarray(eas), np.asarray(h)
+    result, floats, _ = _buffers(arrays, out, work, 3)
+    _density_ratio(arrays[1], floats, inverse=True)
+    np.multiply(arrays[0], floats[1], out=result)
+    return _result((eas, h), result, out)
+
+
+@_kernel(_scalar_tas2eas)
+def tas2eas(
+    tas: Any, h: Any, out: Any = None, work: Optional[Workspace] = None
+) -> Any:
+    """EAS (in kts) from TAS (in kts) at altitude h (in ft)."""
+    tas, h = _cast(tas), _cast(h)
+    if out is None and type(tas) in (float, int) and type(h) in (float, int):
+        return _scalar_tas2eas(tas, h)
+    arrays = np.asarray(tas), np.asarray(h)
+    result, floats, _ = _buffers(arrays, out, work, 3)
+    _density_ratio(arrays[1], floats, inverse=False)
+    np.multiply(arrays[0], floats[1], out=result)
+    return _result((tas, h), result, out)
+
+
+@_kernel(_scalar_cas2tas, factorize=True)
+def cas2tas(
+    cas: Any, h: Any, out: Any = None, work: Optional[Workspace] = None
+) -> Any:
+    """TAS (in kts) from CAS (in kts) at altitude h (in ft)."""
+    cas, h = _cast(cas), _cast(h)
+    if out is None and type(cas) in (float, int) and type(h) in (float, int):
+        return _scalar_cas2tas(cas, h)
+    arrays = np.asarray(cas), np.asarray(h)
+    result, floats, masks = _buffers(arrays, out, work, 5, 2)
+    _cas2tas(*arrays, result, floats, masks)
+    return _result((cas, h), result, out)
+
+
+@_kernel(_scalar_tas2cas, factorize=True)
+def tas2cas(
+    tas: Any, h: Any, out: Any = None, work: Optional[Workspace] = None
+) -> Any:
+    """CAS (in kts) from TAS (in kts) at altitude h (in ft)."""
+    tas, h = _cast(tas), _cast(h)
+    if out is None and type(tas) in (float, int) and type(h) in (float, int):
+        return _scalar_tas2cas(tas, h)
+    arrays = np.asarray(tas), np.asarray(h)
+    result, floats, masks = _buffers(arrays, out, work, 5, 2)
+    _tas2cas(*arrays, result, floats, masks)
+    return _result((tas, h), result, out)
+
+
+@_kernel(_scalar_mach2cas)
+def mach2cas(
+    M: Any, h: Any, out: Any = None, work: Optional[Workspace] = None
+) -> Any:
+    """CAS (in kts) from Mach number at altitude h (in ft)."""
+    M, h = _cast(M), _cast(h)
+    if out is None and type(M) in (float, int) and type(h) in (float, int):
+        return _scalar_mach2cas(M, h)
+    arrays = np.asarray(M), np.asarray(h)
+    result, floats, masks = _buffers(arrays, out, work, 5, 2)
+    _mach2tas(*arrays, result, floats[0])
+    _tas2cas(result, arrays[1], result, floats, masks)
+    return _result((M, h), result, out)
+
+
+@_kernel(_scalar_cas2mach, factorize=True)
+def cas2mach(
+    cas: Any, h: Any, out: Any = None, work: Optional[Workspace] = None
+) -> Any:
+    """Mach number from CAS (in kts) at altitude h (in ft)."""
+    cas, h = _cast(cas), _cast(h)
+    if out is None and type(cas) in (float, int) and type(h) in (float, int):
+        return _scalar_cas2mach(cas, h)
+    arrays = np.asarray(cas), np.asarray(h)
+    result, floats, masks = _buffers(arrays, out, work, 5, 2)
+    _cas2tas(*arrays, result, floats, masks)
+    _tas2mach(result, arrays[1], result, floats[0])
+    return _result((cas, h), result, out)
@@ -0,0 +1,198 @@
+"""Apache Arrow and Polars containers as inputs and outputs.
+
+Functions decorated with :func:`arrow_io` accept :class:`pyarrow.Array`,
+:class:`pyarrow.ChunkedArray` and :class:`polars.Series` arguments (of
+integer or floating point types), in addition to NumPy arrays and scalars:
+
+- values are read from the Arrow data buffers without any copy;
+- nulls are not filled with NaN: the function also computes values in null
+  slots, then the validity bitmap (of the input, or the intersection of the
+  validity bitmaps of all inputs) is attached to the result;
+- results come back in the container type of the inputs: a Polars Series
+  (named after the first Series passed) if any input is a Polars Series, a
+  ChunkedArray (with the chunks of the inputs) if any input is a
+  ChunkedArray, an Array otherwise.
+
+Neither pyarrow nor polars are imported by pitot, and Python scalars skip
+all checks, so that the math path of :mod:`pitot.raw` remains fast.
+
+For example (neither library is a dependency of pitot)::
+
+    >>> import pyarrow as pa  # doctest: +SKIP
+    >>> from pitot.raw import aero
+    >>> aero.cas2tas(pa.array([250.0, None, 300.0]), 10_000)  # doctest: +SKIP
+    <pyarrow.lib.DoubleArray object at ...>
+    [
+      288.71...,
+      null,
+      345.38...
+    ]
+"""
+
+from __future__ import annotations
+
+import functools
+import sys
+from typing import Any, Callable, Iterator, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+__all__ = ["arrow_io"]
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+# container types, updated as pyarrow and polars get imported
+_modules: Tuple[Any, Any] = (None, None)
+_types: Tuple[type, ...] = ()
+
+
+def _container_types() -> Tuple[type, ...]:
+    global _modules, _types
+    modules = sys.modules.get("pyarrow"), sys.modules.get("polars")
+    if modules != _modules:
+        pa, pl = modules
+        types: List[type] = []
+        if pa is not None:
+            types += [pa.Array, pa.ChunkedArray]
+        if pl is not None:
+            types.append(pl.Series)
+        _modules, _types = modules, tuple(types)
+    return _types
+
+
+def arrow_io(func: _F) -> _F:
+    """Makes a function of NumPy arrays accept Arrow and Polars containers.
+
+    Only positional arguments are considered. The function must return an
+    array (or a tuple of arrays) of the broadcast shape of its inputs.
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        for arg in args:
+            # Python scalars first, for the math path of pitot.raw
+            if type(arg) is not float and type(arg) is not int:
+                types = _container_types()
+                if types and any(isinstance(arg, types) for arg in args):
+                    return _call(func, args, kwargs)
+                break
+        return func(*args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _call(func: Callable[..., Any], args: Any, kwargs: Any) -> Any:
+    import pyarrow as pa
+
+    pl = sys.modules.get("polars")
+    name: Optional[str] = None
+    if pl is not None:
+        for arg in args:
+            if isinstance(arg, pl.Series) and name is None:
+                name = arg.name
+        args = [
+            arg.to_arrow() if isinstance(arg, pl.Series) else arg
+            for arg in args
+        ]
+
+    if any(isinstance(arg, pa.ChunkedArray) for arg in args):
+        pieces = [_call_arrays(func, piece, kwargs) for piece in _split(args)]
+        if not pieces:
+            result: Any = pa.chunked_array([], type=pa.float64())
+        elif isinstance(pieces[0], tuple):
+            result = tuple(pa.chunked_array(list(p)) for p in zip(*pieces))
+        else:
+            result = pa.chunked_array(pieces)
+    else:
+        result = _call_arrays(func, args, kwargs)
+
+    if name is not None and pl is not None:
+        if isinstance(result, tuple):
+            return tuple(pl.Series(name, r) for r in result)
+        return pl.Series(name, result)
+    return result
+
+
+def _split(args: Any) -> Iterator[List[Any]]:
+    """Slices the arguments (without copy) along the union of the chunk
+    boundaries of all ChunkedArrays, so that each slice is a single Array."""
+    import pyarrow as pa
+
+    length = 0
+    boundaries = {0}
+    for arg in args:
+        if isinstance(arg, (pa.Array, pa.ChunkedArray)):
+            length = len(arg)
+        if isinstance(arg, pa.ChunkedArray):
+            boundaries.update(np.cumsum([len(c) for c in arg.chunks]))
+    edges = sorted(b for b in boundaries if b <= length)
+    for start, stop in zip(edges[:-1], edges[1:]):
+        piece = []
+        for arg in args:
+            if isinstance(arg, pa.ChunkedArray):
+                (arg,) = arg.slice(start, stop - start).chunks
+            elif isinstance(arg, pa.Array):
+                arg = arg.slice(start, stop - start)
+            elif isinstance(arg, np.ndarray) and arg.ndim > 0:
+                arg = arg[start:stop]
+            piece.append(arg)
+        yield piece
+
+
+def _values(array: Any) -> Any:
+    """A NumPy view of the data buffer of an Arrow array."""
+    import pyarrow as pa
+
+    if not (
+        pa.types.is_integer(array.type) or pa.types.is_floating(array.type)
+    ):
+        raise TypeError(f"Unsupported Arrow type {array.type}")
+    dtype = np.dtype(array.type.to_pandas_dtype())
+    data = np.frombuffer(
+        array.buffers()[1], dtype=dtype, count=array.offset + len(array)
+    )
+    return data[array.offset :]
+
+
+def _validity(arrays: List[Any]) -> Any:
+    """The validity bitmap (with no offset) shared by all arrays, if any."""
+    import pyarrow.compute as pc
+
+    nullable = [array for array in arrays if array.null_count > 0]
+    if not nullable:
+        return None
+    if len(nullable) == 1 and nullable[0].offset % 8 == 0:
+        (array,) = nullable
+        bitmap = array.buffers()[0]
+        return bitmap.slice(array.offset // 8)
+    # a new bitmap, with no offset
+    valid = pc.is_valid(nullable[0])
+    for array in nullable[1:]:
+        valid = pc.and_(valid, pc.is_valid(array))
+    return valid.buffers()[1]
+
+
+def _call_arrays(func: Callable[..., Any], args: Any, kwargs: Any) -> Any:
+    import pyarrow as pa
+
+    arrays = [arg for arg in args if isinstance(arg, pa.Array)]
+    bitmap = _validity(arrays)
+    values = [
+        _values(arg) if isinstance(arg, pa.Array) else arg for arg in args
+    ]
+    if bitmap is None:
+        result = func(*values, **kwargs)
+    else:
+        # garbage in null slots must not raise warnings
+        with np.errstate(all="ignore"):
+            result = func(*values, **kwargs)
+
+    def wrap(array: Any) -> Any:
+        array = np.ascontiguousarray(array)
+        buffers = [bitmap, pa.py_buffer(array)]
+        arrow_type = pa.from_numpy_dtype(array.dtype)
+        return pa.Array.from_buffers(arrow_type, len(array), buffers)
+
+    if isinstance(result, tuple):
+        return tuple(wrap(r) for r in result)
+    return wrap(result)
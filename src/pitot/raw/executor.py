@@ -0,0 +1,228 @@
+"""Parallel evaluation of large arrays, in chunks, on a pool of workers.
+
+Within the :func:`parallel` context manager, the functions of
+:mod:`pitot.isa`, :mod:`pitot.aero` (through their kernels in
+:mod:`pitot.raw`) and the vectorised functions of :mod:`pitot.geodesy`
+split their (broadcast) inputs into chunks of rows, evaluate the chunks on a
+pool of workers and write the results into a shared output array.
+
+NumPy ufunc loops and pyproj release the GIL, so that a pool of threads (the
+default) scales with the number of cores, without copying the inputs. A
+process pool may be passed as well: chunks are then pickled back and forth.
+
+Small inputs (less than two chunks) and Python scalars are evaluated
+directly.
+
+Chunks evaluated in threads see the settings of the caller, e.g. the
+:func:`~pitot.raw.precision` of the computations.
+
+>>> import numpy as np
+>>> from pitot import aero
+>>> cas = np.linspace(100, 300, 1_000_000)
+>>> with parallel(4, chunk_size=100_000):
+...     tas = aero.cas2tas(cas, 30_000)
+>>> bool((tas == aero.cas2tas(cas, 30_000)).all())
+True
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import functools
+import inspect
+import math
+import os
+import sys
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Callable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import numpy as np
+
+__all__ = ["CHUNK_SIZE", "parallel", "parallelizable"]
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+#: Default number of elements per chunk
+CHUNK_SIZE = 1 << 18
+
+
+class _Config(NamedTuple):
+    executor: Executor
+    chunk_size: int
+
+
+_config: ContextVar[Optional[_Config]] = ContextVar("parallel", default=None)
+
+
+@contextlib.contextmanager
+def parallel(
+    n_jobs: Optional[int] = -1,
+    *,
+    executor: Optional[Executor] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[None]:
+    """Evaluates large arrays in parallel, see :mod:`pitot.raw.executor`.
+
+    The setting is local to the current thread (or asyncio task).
+
+    :param n_jobs: the number of threads, -1 (default) or None for one per
+        core, 1 to disable parallel evaluation
+    :param executor: a :class:`concurrent.futures.Executor` to use instead of
+        a pool of ``n_jobs`` threads (it is not shut down when leaving the
+        context)
+    :param chunk_size: the number of elements per chunk
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    pool: Optional[Executor] = None
+    if executor is None and n_jobs > 1:
+        executor = pool = ThreadPoolExecutor(n_jobs, "pitot")
+    config = None if executor is None else _Config(executor, chunk_size)
+    token = _config.set(config)
+    try:
+        yield
+    finally:
+        _config.reset(token)
+        if pool is not None:
+            pool.shutdown()
+
+
+def parallelizable(func: _F) -> _F:
+    """Makes a function of arrays run in parallel within :func:`parallel`.
+
+    The function must be elementwise along the first axis: each row of the
+    (broadcast) inputs gives the same row of the output(s). If it accepts an
+    ``out=`` argument, chunks are written into the output directly.
+    """
+    takes_out = "out" in inspect.signature(func).parameters
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        config = _config.get()
+        if config is None:
+            return func(*args, **kwargs)
+        return _run(func, takes_out, config, args, kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _rows(args: List[Any], shape: Any, start: int, stop: int) -> List[Any]:
+    """Slices the arguments which are not broadcast along the first axis."""
+    return [
+        arg[start:stop]
+        if isinstance(arg, np.ndarray)
+        and arg.ndim == len(shape)
+        and arg.shape[0] > 1
+        else arg
+        for arg in args
+    ]
+
+
+def _task(
+    func: Callable[..., Any], args: List[Any], kwargs: Any, out: Any
+) -> Any:
+    if out is None:
+        return func(*args, **kwargs)
+    func(*args, **kwargs, out=out)
+    return None
+
+
+def _run(
+    func: Callable[..., Any],
+    takes_out: bool,
+    config: _Config,
+    args: Any,
+    kwargs: Any,
+) -> Any:
+    arrays = [
+        np.asarray(arg)
+        if isinstance(arg, (list, tuple)) or hasattr(arg, "__array__")
+        else arg
+        for arg in args
+    ]
+    shapes = [a.shape for a in arrays if isinstance(a, np.ndarray)]
+    shape = np.broadcast_shapes(*shapes) if shapes else ()
+    size = math.prod(shape)
+    if len(shape) == 0 or size < 2 * config.chunk_size:
+        return func(*args, **kwargs)
+
+    rows = max(1, config.chunk_size * shape[0] // size)
+    bounds = [*range(0, shape[0], rows), shape[0]]
+    chunks = list(zip(bounds[:-1], bounds[1:]))
+
+    # scratch workspaces must not be shared between threads
+    kwargs.pop("work", None)
+    # the structure of the output(s) is given by the first chunk
+    out = kwargs.pop("out", None)
+    if out is None:
+        start, stop = chunks.pop(0)
+        first = func(*_rows(arrays, shape, start, stop), **kwargs)
+        several = isinstance(first, tuple)
+        results = first if several else (first,)
+        outputs = tuple(np.empty(shape, np.asarray(r).dtype) for r in results)
+        for output, result in zip(outputs, results):
+            output[start:stop] = result
+    else:
+        several = isinstance(out, tuple)
+        outputs = out if several else (out,)
+
+    # processes need a picklable function, and cannot share the output
+    shared = takes_out and not isinstance(config.executor, ProcessPoolExecutor)
+    if isinstance(config.executor, ProcessPoolExecutor):
+        func = getattr(sys.modules[func.__module__], func.__name__)
+
+    futures = []
+    for start, stop in chunks:
+        out_: Any = None
+        if shared:
+            out_ = tuple(output[start:stop] for output in outputs)
+            out_ = out_ if several else out_[0]
+        chunk = _rows(arrays, shape, start, stop)
+        if isinstance(config.executor, ProcessPoolExecutor):
+            future = config.executor.submit(_task, func, chunk, kwargs, out_)
+        else:
+            # threads see the settings of the caller (e.g. precision), but
+            # do not split their chunk again
+            context = contextvars.copy_context()
+            context.run(_config.set, None)
+            future = config.executor.submit(
+                context.run, _task, func, chunk, kwargs, out_
+            )
+        futures.append(future)
+    for (start, stop), future in zip(chunks, futures):
+        result = future.result()
+        if result is not None:
+            results = result if isinstance(result, tuple) else (result,)
+            for output, r in zip(outputs, results):
+                output[start:stop] = r
+
+    if out is not None:
+        return out
+    outputs = _series(args, shape, outputs)
+    return outputs if several else outputs[0]
+
+
+def _series(args: Any, shape: Any, outputs: Tuple[Any, ...]) -> Any:
+    """Wraps outputs into Series like the first pandas Series argument."""
+    pd = sys.modules.get("pandas")
+    if pd is not None:
+        for arg in args:
+            if isinstance(arg, pd.Series) and arg.shape == shape:
+                return tuple(
+                    pd.Series(o, index=arg.index, name=arg.name)
+                    for o in outputs
+                )
+    return outputs
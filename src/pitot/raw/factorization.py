@@ -0,0 +1,384 @@
+"""Factorised evaluation of inputs with few distinct values.
+
+Barometric altitudes in ADS-B data are multiples of 25 ft, and air speeds
+or Mach numbers are heavily repeated, so that large arrays often contain
+only a few thousand distinct values (or pairs of values).
+
+Within the :func:`factorized` context manager, the most expensive
+functions of :mod:`pitot.isa` (:func:`~pitot.isa.density`,
+:func:`~pitot.isa.pressure`, :func:`~pitot.isa.atmosphere` and
+:func:`~pitot.isa.qnh_altitude`) and :mod:`pitot.aero`
+(:func:`~pitot.aero.cas2tas`, :func:`~pitot.aero.tas2cas` and
+:func:`~pitot.aero.cas2mach`) detect such inputs on a sample, through their
+kernels in :mod:`pitot.raw`. They then evaluate the distinct values
+(or pairs) only, and gather the results back into arrays of the size of the
+inputs. Results are the same, bit for bit.
+
+Integer values in a limited range (e.g. altitudes in ft or speeds in kts)
+are cheaper to factorise than other values, which are hashed. Factorising
+costs a few passes over the inputs, so that cheaper functions (e.g.
+:func:`~pitot.isa.temperature`) are always evaluated directly.
+
+Results may also be kept in a bounded cache, which persists across calls
+within the context, e.g. when processing a stream of batches: only values
+never seen before are evaluated.
+
+Small inputs and inputs with many distinct values are evaluated directly.
+
+>>> import numpy as np
+>>> from pitot import aero
+>>> h = np.arange(1_000_000) % 1600 * 25
+>>> with factorized():
+...     tas = aero.cas2tas(250, h)
+>>> bool((tas == aero.cas2tas(250, h)).all())
+True
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import math
+import threading
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import numpy as np
+
+from .executor import _series
+
+__all__ = ["MIN_SIZE", "factorizable", "factorized"]
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+#: Default minimum number of elements for a factorised evaluation
+MIN_SIZE = 1 << 16
+# Number of elements sampled to detect inputs with few distinct values
+_SAMPLE_SIZE = 1 << 12
+# Largest range of integer values coded by their offset, and minimum number
+# of possible tuples of values flagged in a dense array rather than hashed
+_DENSE_SIZE = 1 << 22
+
+
+class _Slot:
+    """Cached results of a function, for given constant arguments."""
+
+    def __init__(self, n_args: int) -> None:
+        import pandas as pd
+
+        # distinct values of each varying argument, their position is their
+        # id; tuples of values are identified by the combination of the ids
+        self.values: List[Any] = [None] * n_args
+        self.keys = pd.Index([], dtype=np.int64)
+        self.results: Tuple[Any, ...] = ()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def ids(self, i: int, values: Any) -> Any:
+        """Ids of distinct values of the i-th argument, new values are
+        appended."""
+        import pandas as pd
+
+        if self.values[i] is None:
+            self.values[i] = pd.Index(values)
+            return np.arange(len(values))
+        ids = self.values[i].get_indexer(values)
+        new = ids < 0
+        if new.any():
+            ids[new] = len(self.values[i]) + np.arange(np.sum(new))
+            self.values[i] = self.values[i].append(pd.Index(values[new]))
+        return ids
+
+
+class _Cache:
+    """A bounded cache of results, cleared when full."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.slots: Dict[Tuple[Any, ...], _Slot] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return sum(len(slot) for slot in self.slots.values())
+
+
+class _Config(NamedTuple):
+    min_size: int
+    cache: Optional[_Cache]
+
+
+_config: ContextVar[Optional[_Config]] = ContextVar("factorized", default=None)
+
+
+@contextlib.contextmanager
+def factorized(
+    min_size: int = MIN_SIZE, *, cache_size: int = 0
+) -> Iterator[None]:
+    """Evaluates repeated values only once, see
+    :mod:`pitot.raw.factorization`.
+
+    The setting is local to the current thread (or asyncio task).
+
+    :param min_size: the minimum number of elements of the inputs for a
+        factorised evaluation
+    :param cache_size: the maximum number of results (for distinct values
+        or pairs) kept across calls within the context, 0 to disable the
+        cache; the cache is cleared when full
+    """
+    if cache_size < 0:
+        raise ValueError("cache_size must not be negative")
+    cache = _Cache(cache_size) if cache_size > 0 else None
+    token = _config.set(_Config(max(1, min_size), cache))
+    try:
+        yield
+    finally:
+        _config.reset(token)
+
+
+def factorizable(func: _F) -> _F:
+    """Makes a function of arrays evaluate distinct values only within
+    :func:`factorized`.
+
+    The function must be elementwise: each element of the (broadcast)
+    inputs gives the same element of the output(s).
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        config = _config.get()
+        if config is None or set(kwargs) - {"out", "work"}:
+            return func(*args, **kwargs)
+        return _run(func, name, config, args, kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _few_distinct(array: Any) -> bool:
+    """Detects, on a sample, if values are repeated at least twice."""
+    import pandas as pd
+
+    step = max(1, array.size // _SAMPLE_SIZE)
+    sample = array.reshape(-1)[::step]
+    return 2 * len(pd.unique(sample)) <= int(sample.size)
+
+
+def _codes(array: Any) -> Tuple[Any, Any]:
+    """Returns codes of the values of a flat array, and the values for each
+    code: some values may not be present in the array."""
+    import pandas as pd
+
+    if array.dtype.kind in "iuf":
+        # integer values in a small range (e.g. altitudes in ft, speeds in
+        # kts) are coded by their offset, without hashing
+        low, high = array.min(), array.max()
+        if high - low < _DENSE_SIZE:  # False with NaN
+            offset = np.subtract(array, low)
+            codes = offset.astype(np.int32)
+            if array.dtype.kind != "f" or np.array_equal(codes, offset):
+                values = np.arange(int(high - low) + 1) + low
+                return codes, values.astype(array.dtype)
+    return pd.factorize(array, use_na_sentinel=False)  # type: ignore
+
+
+def _factorize(
+    arrays: List[Any],
+) -> Optional[Tuple[Any, Optional[Any], List[Any], List[Any]]]:
+    """Returns the codes of the tuples of values in flat arrays, the codes
+    present (None if all codes are evaluated), and for each array, the
+    values for its codes and their index in each tuple to evaluate.
+
+    Returns None if there are too many possible tuples.
+    """
+    import pandas as pd
+
+    factors = [_codes(array) for array in arrays]
+    dims = tuple(len(values) for _, values in factors)
+    space = math.prod(dims)
+    if space >= 1 << 62:
+        return None
+    dtype = np.int32 if space < 1 << 31 else np.int64
+    codes = factors[0][0].astype(dtype, copy=False)
+    for (other, _), m in zip(factors[1:], dims[1:]):
+        codes = codes * dtype(m) + other
+
+    present = None
+    if len(arrays) == 1 and 4 * space <= codes.size:
+        evaluated = np.arange(space)  # cheaper than finding values present
+    elif space <= max(_DENSE_SIZE, codes.size):
+        flags = np.zeros(space, dtype=np.bool_)
+        flags[codes] = True
+        evaluated = present = np.flatnonzero(flags)
+    else:
+        codes, evaluated = pd.factorize(codes)
+    indices = np.unravel_index(evaluated, dims)
+    return codes, present, [v for _, v in factors], list(indices)
+
+
+def _call(
+    func: Callable[..., Any],
+    args: List[Any],
+    positions: List[int],
+    values: List[Any],
+) -> Tuple[Any, ...]:
+    call_args = list(args)
+    for i, value in zip(positions, values):
+        call_args[i] = value
+    result = func(*call_args)
+    return result if isinstance(result, tuple) else (result,)
+
+
+def _lookup(
+    slot: _Slot, values: List[Any], indices: List[Any]
+) -> Tuple[Any, Any]:
+    """Returns the keys of tuples of values in a slot, and their rows (-1
+    if missing)."""
+    # the ids of values are combined into the bits of a single key; only
+    # values of the tuples are registered, not all the candidate values
+    import pandas as pd
+
+    bits = 63 // len(values)
+    keys = np.zeros(len(indices[0]), dtype=np.int64)
+    for i, (v, index) in enumerate(zip(values, indices)):
+        inverse, distinct = pd.factorize(index)
+        keys <<= bits
+        keys |= slot.ids(i, v[distinct])[inverse]
+    return keys, slot.keys.get_indexer(keys)
+
+
+def _cached(
+    func: Callable[..., Any],
+    name: str,
+    cache: _Cache,
+    args: List[Any],
+    positions: List[int],
+    values: List[Any],
+    indices: List[Any],
+) -> Tuple[Any, ...]:
+    """Evaluates the function on distinct tuples of values, through the
+    cache."""
+    from .isa import _precision
+
+    n = len(indices[0])
+    if n > cache.size or cache.size >= 1 << (63 // len(positions)):
+        return _call(
+            func, args, positions, [v[i] for v, i in zip(values, indices)]
+        )
+    # the precision and the constant arguments identify the slot
+    key = (
+        name,
+        str(_precision.get()),
+        tuple(
+            None if i in positions else np.asarray(arg).item()
+            for i, arg in enumerate(args)
+        ),
+    )
+    with cache.lock:
+        slot = cache.slots.get(key)
+        if slot is None:
+            slot = cache.slots[key] = _Slot(len(positions))
+        keys, rows = _lookup(slot, values, indices)
+        missing = np.flatnonzero(rows < 0)
+        if len(cache) + missing.size > cache.size:
+            cache.slots.clear()
+            slot = cache.slots[key] = _Slot(len(positions))
+            keys, rows = _lookup(slot, values, indices)
+            missing = np.arange(n)
+
+        if missing.size > 0:
+            computed = _call(
+                func,
+                args,
+                positions,
+                [v[index[missing]] for v, index in zip(values, indices)],
+            )
+            rows[missing] = len(slot.keys) + np.arange(missing.size)
+            slot.keys = slot.keys.append(type(slot.keys)(keys[missing]))
+            slot.results = tuple(
+                np.concatenate([r, np.asarray(c)])
+                for r, c in zip(
+                    slot.results or [np.empty(0, c.dtype) for c in computed],
+                    computed,
+                )
+            )
+        return tuple(r[rows] for r in slot.results)
+
+
+def _run(
+    func: Callable[..., Any],
+    name: str,
+    config: _Config,
+    args: Any,
+    kwargs: Any,
+) -> Any:
+    arrays = [
+        np.asarray(arg)
+        if isinstance(arg, (list, tuple)) or hasattr(arg, "__array__")
+        else arg
+        for arg in args
+    ]
+    shapes = [a.shape for a in arrays if isinstance(a, np.ndarray)]
+    shape = np.broadcast_shapes(*shapes) if shapes else ()
+    size = math.prod(shape)
+    if len(shape) == 0 or size < config.min_size:
+        return func(*args, **kwargs)
+
+    # arrays of the size of the output are factorised, other arguments must
+    # be constant (e.g. a scalar altitude for many speeds)
+    positions = [
+        i
+        for i, a in enumerate(arrays)
+        if isinstance(a, np.ndarray) and a.size > 1
+    ]
+    if any(arrays[i].shape != shape for i in positions) or any(
+        np.ndim(arrays[i]) > 0 for i in range(len(arrays)) if i not in positions
+    ):
+        return func(*args, **kwargs)
+    if not all(_few_distinct(arrays[i]) for i in positions):
+        return func(*args, **kwargs)
+
+    factors = _factorize([arrays[i].reshape(-1) for i in positions])
+    if factors is None:
+        return func(*args, **kwargs)
+    codes, present, values, indices = factors
+    if config.cache is None:
+        results = _call(
+            func,
+            arrays,
+            positions,
+            [v[index] for v, index in zip(values, indices)],
+        )
+    else:
+        results = _cached(
+            func, name, config.cache, arrays, positions, values, indices
+        )
+    several = len(results) > 1
+
+    # gather the results back into the shape of the inputs
+    tables = []
+    for r in results:
+        r = np.asarray(r)
+        if present is not None:  # codes of all possible tuples
+            table = np.empty(present[-1] + 1, dtype=r.dtype)
+            table[present] = r
+            r = table
+        tables.append(r)
+    out = kwargs.get("out")
+    if out is None:
+        outputs = tuple(table[codes].reshape(shape) for table in tables)
+        outputs = _series(args, shape, outputs)
+        return outputs if several else outputs[0]
+    for output, table in zip(out if several else (out,), tables):
+        output[...] = table[codes].reshape(shape)
+    return out
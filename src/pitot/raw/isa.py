@@ -0,0 +1,556 @@
+"""Unit-free kernels of :mod:`pitot.isa`, in SI units.
+
+Altitudes are in m, temperatures in K, pressures in Pa, densities in kg/m3
+and speeds in m/s.
+"""
+
+import contextlib
+import functools
+import math
+import sys
+from contextvars import ContextVar
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+import numpy as np
+import numpy.typing as npt
+
+from . import profiling
+from .arrow import arrow_io
+from .executor import parallelizable
+from .factorization import factorizable
+from .profiling import profiled
+
+__all__ = [
+    "atmosphere",
+    "density",
+    "density_altitude",
+    "pressure",
+    "pressure_altitude",
+    "qnh_altitude",
+    "sound_speed",
+    "temperature",
+]
+
+# Cp/Cv for air
+GAMMA = 1.40
+# sea level pressure ISA
+P_0 = 101325.0
+# gas constant, sea level ISA
+R = 287.05287
+# sea level density ISA
+RHO_0 = 1.225
+# sea level temperature ISA
+T_0 = 288.15
+# until altitude = 22km
+STRATOSPHERE_TEMP = 216.65
+# Gravitational acceleration
+G_0 = 9.80665
+# Temperature gradient below tropopause, ISA
+BETA_T = -0.0065
+# pressure at tropopause, ISA
+TROPOPAUSE_PRESS = 22632.0401
+# tropopause altitude
+H_TROP = 11000
+
+# exponents of the pressure below and above the tropopause
+_TROPOSPHERE_EXP = -G_0 / (BETA_T * R)
+_STRATOSPHERE_EXP = -G_0 / (R * STRATOSPHERE_TEMP)
+
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+_precision: ContextVar[Optional[np.dtype[Any]]] = ContextVar(
+    "precision", default=None
+)
+
+
+@contextlib.contextmanager
+def precision(dtype: Optional[npt.DTypeLike]) -> Iterator[None]:
+    """Sets the floating point precision of all ISA and air speed functions.
+
+    Within the context, inputs are cast to the given dtype when entering any
+    function of :mod:`pitot.isa`, :mod:`pitot.aero` (and their raw kernels),
+    and all intermediate and final results remain in that dtype. Python
+    scalars give NumPy scalars of that dtype.
+
+    The setting is local to the current thread (or asyncio task). For a
+    per call setting, the functions of :mod:`pitot.raw.ufuncs` accept a
+    ``dtype`` argument.
+
+    :param dtype: usually ``"float32"``, or None for the default behaviour
+        (float64, unless all inputs are float32 arrays)
+
+    >>> from pitot.raw import isa
+    >>> with precision("float32"):
+    ...     isa.density(3000)
+    np.float32(0.90...)
+    """
+    token = _precision.set(None if dtype is None else np.dtype(dtype))
+    try:
+        yield
+    finally:
+        _precision.reset(token)
+
+
+def _cast(x: Any) -> Any:
+    """Casts the input to the dtype set by :func:`precision`, if any."""
+    dtype = _precision.get()
+    if dtype is None:
+        return x
+    if isinstance(x, np.ndarray):
+        return x.astype(dtype, copy=False)
+    if hasattr(x, "astype") and not isinstance(x, np.generic):
+        return x.astype(dtype)  # e.g. pandas Series
+    return np.asarray(x, dtype=dtype)[()]
+
+
+def _bind(func: Callable[..., Any], args: Any, kwargs: Any) -> Tuple[Any, ...]:
+    """Arguments of a kernel passed by keyword, as positional arguments."""
+    import inspect
+
+    signature = inspect.signature(func)
+    inputs = [
+        parameter
+        for parameter in signature.parameters.values()
+        if parameter.name not in ("out", "work")
+    ]
+    return signature.replace(parameters=inputs).bind(*args, **kwargs).args
+
+
+def _kernel(
+    scalar: Callable[..., Any], factorize: bool = False
+) -> Callable[[_F], _F]:
+    """Decorates an array function with the layers of :mod:`pitot.raw`:
+    profiling, Arrow containers, (optionally) factorisation and parallel
+    evaluation.
+
+    Python int and float arguments go straight to the scalar function,
+    before any of these layers, unless a profiler or a precision is set. The
+    scalar function returns None outside of the domain of the math module:
+    the arguments then go through the layers as well. Arguments may also be
+    passed by keyword, as in the public functions.
+    """
+
+    def decorator(func: _F) -> _F:
+        layers = parallelizable(func)
+        if factorize:
+            layers = factorizable(layers)
+        layers = profiled(arrow_io(layers))
+
+        @functools.wraps(func)
+        def wrapper(
+            *args: Any,
+            out: Any = None,
+            work: Optional[Workspace] = None,
+            **kwargs: Any,
+        ) -> Any:
+            if kwargs:
+                args = _bind(func, args, kwargs)
+            if (
+                out is None
+                and not profiling._profilers
+                and _precision.get() is None
+            ):
+                for arg in args:
+                    if type(arg) is not float and type(arg) is not int:
+                        break
+                else:
+                    result = scalar(*args)
+                    if result is not None:
+                        return result
+            return layers(*args, out=out, work=work)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+class Workspace:
+    """Scratch arrays, reused by the functions they are passed to.
+
+    Passing the same workspace and output arrays to repeated calls on batches
+    of a fixed shape avoids any allocation of intermediate arrays. A workspace
+    must not be shared between threads.
+
+    >>> work = Workspace()
+    >>> h = np.linspace(0, 10_000, 1000)
+    >>> out = np.empty_like(h)
+    >>> density(h, out=out, work=work) is out
+    True
+    """
+
+    def __init__(self) -> None:
+        self._buffers: Dict[Any, List[npt.NDArray[Any]]] = {}
+
+    def __repr__(self) -> str:
+        sizes = sum(b.nbytes for v in self._buffers.values() for b in v)
+        return f"Workspace({sizes} bytes)"
+
+    def get(
+        self, shape: Tuple[int, ...], dtype: np.dtype[Any], n: int
+    ) -> List[npt.NDArray[Any]]:
+        """Returns n scratch arrays of the given shape and dtype."""
+        buffers = self._buffers.setdefault((shape, dtype), [])
+        while len(buffers) < n:
+            buffers.append(np.empty(shape, dtype))
+        return buffers[:n]
+
+
+def _buffers(
+    arrays: Sequence[npt.NDArray[Any]],
+    out: Any,
+    work: Optional[Workspace],
+    n: int,
+    masks: int = 0,
+) -> Tuple[Any, List[npt.NDArray[Any]], List[npt.NDArray[np.bool_]]]:
+    """Returns the output array, n scratch arrays and scratch boolean masks.
+
+    Arrays are allocated if no output or workspace is provided. When there
+    are several outputs (a tuple), the first one gives the shape and dtype.
+    """
+    if out is not None:
+        first = out[0] if isinstance(out, tuple) else out
+        shape, dtype = first.shape, first.dtype
+    else:
+        shape = np.broadcast_shapes(*(array.shape for array in arrays))
+        # integers are computed as float64, float32 stays float32
+        dtype = np.result_type(*arrays, 0.0)
+        out = np.empty(shape, dtype)
+    if work is None:
+        floats = [np.empty(shape, dtype) for _ in range(n)]
+        bools = [np.empty(shape, np.bool_) for _ in range(masks)]
+    else:
+        floats = work.get(shape, dtype, n)
+        bools = work.get(shape, np.dtype(np.bool_), masks)
+    return out, floats, bools
+
+
+def _result(inputs: Tuple[Any, ...], result: Any, out: Any) -> Any:
+    """Returns the output array if provided, a scalar for scalar inputs, and
+    a Series for Series inputs."""
+    if out is not None:
+        return out
+    pd = sys.modules.get("pandas")
+    if pd is not None:
+        for like in inputs:
+            if isinstance(like, pd.Series) and like.shape == result.shape:
+                return pd.Series(result, index=like.index, name=like.name)
+    return result[()]
+
+
+# Scalar path, with the math module, for Python int and float arguments.
+# These functions call each other directly, without any check.
+
+
+def _scalar_temperature(h: float) -> float:
+    return max(T_0 - 0.0065 * h, STRATOSPHERE_TEMP)
+
+
+def _scalar_density(h: float) -> float:
+    power: float = (_scalar_temperature(h) / T_0) ** 4.256848
+    delta = max(h - H_TROP, 0.0)
+    return RHO_0 * power * math.exp(-delta / 6341.5522)
+
+
+def _scalar_pressure(h: float) -> float:
+    if h < H_TROP:
+        power: float = (_scalar_temperature(h) / T_0) ** _TROPOSPHERE_EXP
+        return P_0 * power
+    delta = max(h - H_TROP, 0.0)
+    return TROPOPAUSE_PRESS * math.exp(_STRATOSPHERE_EXP * delta)
+
+
+def _scalar_atmosphere(h: float) -> Tuple[float, float, float]:
+    temp = _scalar_temperature(h)
+    ratio = temp / T_0
+    delta = max(h - H_TROP, 0.0)
+    den = RHO_0 * ratio**4.256848 * math.exp(-delta / 6341.5522)
+    if h < H_TROP:
+        press = P_0 * ratio**_TROPOSPHERE_EXP
+    else:
+        press = TROPOPAUSE_PRESS * math.exp(_STRATOSPHERE_EXP * delta)
+    return press, den, temp
+
+
+def _scalar_sound_speed(h: float) -> float:
+    return math.sqrt(GAMMA * R * _scalar_temperature(h))
+
+
+# Array kernels, writing into preallocated arrays. The operations follow the
+# scalar path, so that results agree within a few ULPs.
+
+
+def _temperature(h: Any, out: Any) -> None:
+    np.multiply(0.0065, h, out=out)
+    np.subtract(T_0, out, out=out)
+    np.maximum(out, STRATOSPHERE_TEMP, out=out)
+
+
+def _density(h: Any, out: Any, delta: Any) -> None:
+    _temperature(h, out)
+    np.divide(out, T_0, out=out)
+    np.power(out, 4.256848, out=out)
+    np.multiply(RHO_0, out, out=out)
+    np.subtract(h, H_TROP, out=delta)
+    np.maximum(0, delta, out=delta)
+    np.negative(delta, out=delta)
+    np.divide(delta, 6341.5522, out=delta)
+    np.exp(delta, out=delta)
+    np.multiply(out, delta, out=out)
+
+
+def _stratosphere(h: Any, out: Any, delta: Any, mask: Any) -> None:
+    """Replaces values of out by the pressure above the tropopause."""
+    np.subtract(h, H_TROP, out=delta)
+    np.maximum(0, delta, out=delta)
+    np.multiply(_STRATOSPHERE_EXP, delta, out=delta)
+    np.exp(delta, out=delta)
+    np.multiply(TROPOPAUSE_PRESS, delta, out=delta)
+    np.less(h, H_TROP, out=mask)
+    np.logical_not(mask, out=mask)
+    np.copyto(out, delta, where=mask)
+
+
+def _pressure(h: Any, out: Any, delta: Any, mask: Any) -> None:
+    _temperature(h, out)
+    np.divide(out, T_0, out=out)
+    np.power(out, _TROPOSPHERE_EXP, out=out)
+    np.multiply(P_0, out, out=out)
+    _stratosphere(h, out, delta, mask)
+
+
+def _atmosphere(
+    h: Any, press: Any, den: Any, temp: Any, ratio: Any, delta: Any, mask: Any
+) -> None:
+    _temperature(h, temp)
+    np.divide(temp, T_0, out=ratio)
+    np.subtract(h, H_TROP, out=delta)
+    np.maximum(0, delta, out=delta)
+    np.power(ratio, 4.256848, out=den)
+    np.multiply(RHO_0, den, out=den)
+    np.negative(delta, out=press)
+    np.divide(press, 6341.5522, out=press)
+    np.exp(press, out=press)
+    np.multiply(den, press, out=den)
+    np.power(ratio, _TROPOSPHERE_EXP, out=press)
+    np.multiply(P_0, press, out=press)
+    _stratosphere(h, press, delta, mask)
+
+
+def _sound_speed(h: Any, out: Any) -> None:
+    _temperature(h, out)
+    np.multiply(GAMMA * R, out, out=out)
+    np.sqrt(out, out=out)
+
+
+@_kernel(_scalar_temperature)
+def temperature(
+    h: Any, out: Any = None, work: Optional[Workspace] = None
+) -> Any:
+    """Temperature (in K) at altitude h (in m), see
+    :func:`pitot.isa.temperature`. (No workspace is needed.)"""
+    h = _cast(h)
+    if out is None and type(h) in (float, int):
+        return _scalar_temperature(h)
+    array = np.asarray(h)
+    result, _, _ = _buffers([array], out, None, 0)
+    _temperature(array, result)
+    return _result((h,), result, out)
+
+
+@_kernel(_scalar_density, factorize=True)
+def density(h: Any, out: Any = None, work: Optional[Workspace] = None) -> Any:
+    """Density (in kg/m3) at altitude h (in m), see
+    :func:`pitot.isa.density`."""
+    h = _cast(h)
+    if out is None and type(h) in (float, int):
+        return _scalar_density(h)
+    array = np.asarray(h)
+    result, (delta,), _ = _buffers([array], out, work, 1)
+    _density(array, result, delta)
+    return _result((h,), result, out)
+
+
+@_kernel(_scalar_pressure, factorize=True)
+def pressure(h: Any, out: Any = None, work: Optional[Workspace] = None) -> Any:
+    """Pressure (in Pa) at altitude h (in m), see :func:`pitot.isa.pressure`."""
+    h = _cast(h)
+    if out is None and type(h) in (float, int):
+        return _scalar_pressure(h)
+    array = np.asarray(h)
+    result, (delta,), (mask,) = _buffers([array], out, work, 1, 1)
+    _pressure(array, result, delta, mask)
+    return _result((h,), result, out)
+
+
+@_kernel(_scalar_atmosphere, factorize=True)
+def atmosphere(
+    h: Any,
+    out: Optional[Tuple[Any, Any, Any]] = None,
+    work: Optional[Workspace] = None,
+) -> Tuple[Any, Any, Any]:
+    """Pressure (in Pa), density (in kg/m3) and temperature (in K) at
+    altitude h (in m), see :func:`pitot.isa.atmosphere`."""
+    h = _cast(h)
+    if out is None and type(h) in (float, int):
+        return _scalar_atmosphere(h)
+    array = np.asarray(h)
+    press, (ratio, delta), (mask,) = _buffers([array], out, work, 2, 1)
+    if out is None:
+        results = (press, np.empty_like(press), np.empty_like(press))
+    else:
+        results = out
+    _atmosphere(array, *results, ratio, delta, mask)
+    if out is not None:
+        return out
+    return (
+        _result((h,), results[0], None),
+        _result((h,), results[1], None),
+        _result((h,), results[2], None),
+    )
+
+
+@_kernel(_scalar_sound_speed)
+def sound_speed(
+    h: Any, out: Any = None, work: Optional[Workspace] = None
+) -> Any:
+    """Speed of sound (in m/s) at altitude h (in m), see
+    :func:`pitot.isa.sound_speed`. (No workspace is needed.)"""
+    h = _cast(h)
+    if out is None and type(h) in (float, int):
+        return _scalar_sound_speed(h)
+    array = np.asarray(h)
+    result, _, _ = _buffers([array], out, None, 0)
+    _sound_speed(array, result)
+    return _result((h,), result, out)
+
+
+# Inverse functions, for the same two layers of the atmosphere. The boundary
+# between both branches is the tropopause: TROPOPAUSE_PRESS and RHO_TROP are
+# the pressure and density at H_TROP.
+
+_TROPOSPHERE_INV = 1 / _TROPOSPHERE_EXP
+RHO_TROP = RHO_0 * (STRATOSPHERE_TEMP / T_0) ** 4.256848
+
+
+def _pressure_altitude(p: Any, out: Any, delta: Any, mask: Any) -> None:
+    """Writes the pressure altitude into out, which may be p itself."""
+    np.less_equal(p, TROPOPAUSE_PRESS, out=mask)
+    np.divide(p, TROPOPAUSE_PRESS, out=delta)
+    np.log(delta, out=delta)
+    np.divide(delta, _STRATOSPHERE_EXP, out=delta)
+    np.add(H_TROP, delta, out=delta)
+    np.divide(p, P_0, out=out)
+    np.power(out, _TROPOSPHERE_INV, out=out)
+    np.multiply(T_0, out, out=out)
+    np.subtract(T_0, out, out=out)
+    np.divide(out, 0.0065, out=out)
+    np.copyto(out, delta, where=mask)
+
+
+def _density_altitude(rho: Any, out: Any, delta: Any, mask: Any) -> None:
+    """Writes the density altitude into out, which may be rho itself."""
+    np.less(rho, RHO_TROP, out=mask)
+    np.divide(rho, RHO_TROP, out=delta)
+    np.log(delta, out=delta)
+    np.multiply(6341.5522, delta, out=delta)
+    np.subtract(H_TROP, delta, out=delta)
+    np.divide(rho, RHO_0, out=out)
+    np.power(out, 1 / 4.256848, out=out)
+    np.multiply(T_0, out, out=out)
+    np.subtract(T_0, out, out=out)
+    np.divide(out, 0.0065, out=out)
+    np.copyto(out, delta, where=mask)
+
+
+# (the scalar path returns None for non positive values, or nan, which go
+# through NumPy, as arrays, for inf or nan)
+
+
+def _scalar_pressure_altitude(p: float) -> Optional[float]:
+    if not p > 0:
+        return None
+    if p <= TROPOPAUSE_PRESS:
+        return H_TROP + math.log(p / TROPOPAUSE_PRESS) / _STRATOSPHERE_EXP
+    power: float = (p / P_0) ** _TROPOSPHERE_INV
+    return (T_0 - T_0 * power) / 0.0065
+
+
+def _scalar_density_altitude(rho: float) -> Optional[float]:
+    if not rho > 0:
+        return None
+    if rho < RHO_TROP:
+        return H_TROP - 6341.5522 * math.log(rho / RHO_TROP)
+    power: float = (rho / RHO_0) ** (1 / 4.256848)
+    return (T_0 - T_0 * power) / 0.0065
+
+
+def _scalar_qnh_altitude(h: float, qnh: float) -> Optional[float]:
+    if not qnh > 0:
+        return None
+    return _scalar_pressure_altitude(_scalar_pressure(h) * P_0 / qnh)
+
+
+@_kernel(_scalar_pressure_altitude)
+def pressure_altitude(
+    p: Any, out: Any = None, work: Optional[Workspace] = None
+) -> Any:
+    """Pressure altitude (in m) for a static pressure p (in Pa), see
+    :func:`pitot.isa.pressure_altitude`."""
+    p = _cast(p)
+    if out is None and type(p) in (float, int):
+        h = _scalar_pressure_altitude(p)
+        if h is not None:
+            return h
+    array = np.asarray(p)
+    result, (delta,), (mask,) = _buffers([array], out, work, 1, 1)
+    _pressure_altitude(array, result, delta, mask)
+    return _result((p,), result, out)
+
+
+@_kernel(_scalar_density_altitude)
+def density_altitude(
+    rho: Any, out: Any = None, work: Optional[Workspace] = None
+) -> Any:
+    """Density altitude (in m) for a density rho (in kg/m3), see
+    :func:`pitot.isa.density_altitude`."""
+    rho = _cast(rho)
+    if out is None and type(rho) in (float, int):
+        h = _scalar_density_altitude(rho)
+        if h is not None:
+            return h
+    array = np.asarray(rho)
+    result, (delta,), (mask,) = _buffers([array], out, work, 1, 1)
+    _density_altitude(array, result, delta, mask)
+    return _result((rho,), result, out)
+
+
+@_kernel(_scalar_qnh_altitude, factorize=True)
+def qnh_altitude(
+    h: Any, qnh: Any, out: Any = None, work: Optional[Workspace] = None
+) -> Any:
+    """Altitude (in m) on an altimeter set to qnh (in Pa), from the pressure
+    altitude h (in m), see :func:`pitot.isa.qnh_altitude`."""
+    h, qnh = _cast(h), _cast(qnh)
+    if out is None and type(h) in (float, int) and type(qnh) in (float, int):
+        altitude = _scalar_qnh_altitude(h, qnh)
+        if altitude is not None:
+            return altitude
+    array, setting = np.asarray(h), np.asarray(qnh)
+    result, (delta,), (mask,) = _buffers([array, setting], out, work, 1, 1)
+    # the static pressure, as if the altimeter were set to P_0
+    _pressure(array, result, delta, mask)
+    np.multiply(result, P_0, out=result)
+    np.divide(result, setting, out=result)
+    _pressure_altitude(result, result, delta, mask)
+    return _result((h, qnh), result, out)
@@ -0,0 +1,230 @@
+"""Opt-in profiling of the public functions of pitot.
+
+Within the :func:`profile` context manager, each call to a function of
+:mod:`pitot.isa`, :mod:`pitot.aero`, :mod:`pitot.geodesy`,
+:mod:`pitot.airac` and :mod:`pitot.raw` is recorded, with:
+
+- ``calls``: the number of calls;
+- ``elements``: the number of elements processed (the size of the largest
+  argument, 1 for scalars);
+- ``time``: the wall time spent in the function, in seconds;
+- ``kernel_time``: the part of this time spent in numerical code: in the
+  kernels of :mod:`pitot.raw` for the functions of :mod:`pitot.isa` and
+  :mod:`pitot.aero`, the whole call for other functions;
+- ``overhead``: the rest, i.e. the cost of the layer decorated with
+  impunity (unit conversions and handling of arguments).
+
+The overhead is only measured for the functions of :mod:`pitot.isa` and
+:mod:`pitot.aero`, which delegate to separate kernels. The functions of
+:mod:`pitot.geodesy` and :mod:`pitot.airac` call pyproj or NumPy within
+their own body, and their overhead is always reported as 0: the handling of
+their arguments, and the Arrow and :func:`~pitot.raw.parallel` layers around
+:func:`~pitot.geodesy.distance`, :func:`~pitot.geodesy.bearing` and
+:func:`~pitot.geodesy.destination`, are counted as kernel time.
+
+Times are inclusive: a call to :func:`pitot.aero.cas2tas` is also recorded
+as a call to :func:`pitot.raw.aero.cas2tas`.
+
+>>> from pitot import aero
+>>> with profile() as profiler:
+...     tas = aero.cas2tas([250.0, 300.0], 10_000)
+>>> stats = profiler.to_dict()["pitot.aero.cas2tas"]
+>>> stats["calls"], stats["elements"]
+(1, 2)
+
+Profiling may also be enabled for the whole process with the
+``PITOT_PROFILE`` environment variable: with ``PITOT_PROFILE=1`` (or
+``stderr``), the statistics are printed as JSON on stderr at exit; any other
+value is the path of a JSON file where they are written.
+
+When profiling is not enabled, the cost of the instrumentation is a check
+of a global variable per call.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+__all__ = ["Profiler", "profile", "profiled"]
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+# active profilers, all of them record all calls
+_profilers: Tuple[Profiler, ...] = ()
+# kernel time of nested calls, per thread
+_local = threading.local()
+
+
+class _Stats:
+    __slots__ = ("calls", "elements", "kernel_time", "time")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.elements = 0
+        self.time = 0.0
+        self.kernel_time = 0.0
+
+
+class Profiler:
+    """Statistics of calls to the public functions of pitot, see
+    :mod:`pitot.raw.profiling`.
+    """
+
+    def __init__(self) -> None:
+        self._stats: Dict[str, _Stats] = {}
+        self._lock = threading.Lock()
+
+    def __repr__(self) -> str:
+        return f"Profiler({len(self._stats)} functions)"
+
+    def record(
+        self, name: str, elements: int, elapsed: float, kernel_time: float
+    ) -> None:
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = _Stats()
+            stats.calls += 1
+            stats.elements += elements
+            stats.time += elapsed
+            stats.kernel_time += kernel_time
+
+    def reset(self) -> None:
+        """Discards all statistics."""
+        with self._lock:
+            self._stats.clear()
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Statistics per function (sorted by name)."""
+        with self._lock:
+            return {
+                name: {
+                    "calls": stats.calls,
+                    "elements": stats.elements,
+                    "time": stats.time,
+                    "kernel_time": stats.kernel_time,
+                    "overhead": max(0.0, stats.time - stats.kernel_time),
+                }
+                for name, stats in sorted(self._stats.items())
+            }
+
+    def to_json(self, **kwargs: Any) -> str:
+        """Statistics per function, as JSON.
+
+        :param kwargs: passed to :func:`json.dumps`
+        """
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+def _start(profiler: Profiler) -> None:
+    global _profilers
+    _profilers = (*_profilers, profiler)
+
+
+def _stop(profiler: Profiler) -> None:
+    global _profilers
+    _profilers = tuple(p for p in _profilers if p is not profiler)
+
+
+@contextlib.contextmanager
+def profile(
+    callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> Iterator[Profiler]:
+    """Records calls to the public functions of pitot, in all threads.
+
+    :param callback: a function called with the statistics (as returned by
+        :meth:`Profiler.to_dict`) when leaving the context, e.g. to send
+        them to a metrics system
+
+    :return: the :class:`Profiler`
+    """
+    profiler = Profiler()
+    _start(profiler)
+    try:
+        yield profiler
+    finally:
+        _stop(profiler)
+        if callback is not None:
+            callback(profiler.to_dict())
+
+
+def _elements(args: Any) -> int:
+    elements = 1
+    for arg in args:
+        size = getattr(arg, "size", None)
+        if isinstance(size, int):
+            elements = max(elements, size)
+        elif isinstance(arg, (list, tuple)) or hasattr(
+            arg, "__arrow_c_array__"
+        ):
+            elements = max(elements, len(arg))
+    return elements
+
+
+def _call(
+    name: str, kernel: bool, func: Callable[..., Any], args: Any, kwargs: Any
+) -> Any:
+    stack: Optional[List[float]] = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = stack.pop()
+        kernel_time = elapsed if kernel else min(nested, elapsed)
+        if stack:
+            stack[-1] += kernel_time
+        elements = _elements(args)
+        for profiler in _profilers:
+            profiler.record(name, elements, elapsed, kernel_time)
+
+
+def profiled(func: _F, kernel: bool = True) -> _F:
+    """Records the calls to a function within :func:`profile`.
+
+    :param kernel: False if the numerical code of the function is in other
+        profiled functions (e.g. the kernels of :mod:`pitot.raw`), so that
+        the rest of its time is reported as overhead; if True, the whole
+        call is reported as kernel time
+    """
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        if not _profilers:
+            return func(*args, **kwargs)
+        return _call(name, kernel, func, args, kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _dump(profiler: Profiler, target: str) -> None:
+    content = profiler.to_json(indent=2)
+    if target.lower() in ("1", "stderr"):
+        print(content, file=sys.stderr)
+    else:
+        with open(target, "w") as file:
+            file.write(content + "\n")
+
+
+def _from_environment() -> None:
+    target = os.environ.get("PITOT_PROFILE", "")
+    if target.lower() in ("", "0", "false"):
+        return
+    profiler = Profiler()
+    _start(profiler)
+    atexit.register(_dump, profiler, target)
+
+
+_from_environment()
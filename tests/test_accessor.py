@@ -0,0 +1,101 @@
+import tracemalloc
+import unittest
+
+import numpy as np
+import pandas as pd
+import pitot.accessor  # noqa: F401
+from pitot import aero, isa, raw
+
+
+class Accessor(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.df = pd.DataFrame(
+            {
+                "cas": rng.uniform(100, 350, 1000),
+                "mach": rng.uniform(0.2, 0.9, 1000),
+                "altitude": rng.uniform(0, 40_000, 1000),
+            }
+        )
+
+    def test_aero(self) -> None:
+        df = self.df
+        for name in raw.aero.__all__:
+            source = name.split("2")[0]
+            column = "mach" if source == "mach" else "cas"
+            # chunks of an odd size, the last one being shorter
+            getattr(df.pitot, name)(column, "altitude", "result", chunk_size=99)
+            expected = getattr(aero, name)(df[column], df.altitude)
+            np.testing.assert_array_equal(df.result, expected)
+
+    def test_isa(self) -> None:
+        df = self.df.pitot.atmosphere("altitude", chunk_size=128)
+        for name in ["pressure", "density", "temperature"]:
+            expected = getattr(isa, name)(df.altitude)
+            np.testing.assert_array_equal(df[name], expected)
+        df.pitot.sound_speed("altitude", "a")
+        np.testing.assert_array_equal(df.a, isa.sound_speed(df.altitude))
+        self.assertEqual(
+            df.attrs["units"],
+            {
+                "pressure": "Pa",
+                "density": "kg/m^3",
+                "temperature": "K",
+                "a": "m/s",
+            },
+        )
+
+    def test_units(self) -> None:
+        df = self.df.assign(
+            h_m=self.df.altitude * 0.3048, cas_ms=self.df.cas * 1852 / 3600
+        )
+        df.attrs["units"] = {"h_m": "m", "cas_ms": "m/s"}
+        df.pitot.cas2tas("cas_ms", "h_m", "tas")
+        df.pitot.cas2tas("cas", "altitude", "expected")
+        np.testing.assert_allclose(df.tas, df.expected, rtol=1e-12)
+
+        # altitudes in ft for ISA functions
+        df.attrs["units"]["altitude"] = "ft"
+        df.pitot.density("altitude")
+        np.testing.assert_allclose(df.density, isa.density(df.h_m), rtol=1e-12)
+
+    def test_dtypes(self) -> None:
+        df = pd.DataFrame(
+            {
+                "cas": pd.array([250, None, 300], dtype="Float64"),
+                "altitude": np.array([10_000, 20_000, 30_000]),
+                "h32": np.array([0, 1000, 2000], dtype=np.float32),
+            }
+        )
+        df.pitot.cas2tas("cas", "altitude")
+        self.assertEqual(df.tas.dtype, np.float64)
+        self.assertTrue(np.isnan(df.tas[1]))
+        self.assertAlmostEqual(df.tas[0], aero.cas2tas(250, 10_000))
+        df.pitot.temperature("h32")
+        self.assertEqual(df.temperature.dtype, np.float32)
+
+        empty = df.iloc[:0].copy()
+        self.assertEqual(len(empty.pitot.cas2mach("cas", "altitude")), 0)
+        with self.assertRaises(ValueError):
+            df.pitot.cas2tas("cas", "altitude", chunk_size=0)
+
+    @unittest.skipIf(
+        int(pd.__version__.split(".")[0]) < 3,
+        "pandas 2, without copy-on-write, copies columns on assignment",
+    )
+    def test_memory(self) -> None:
+        n = 1_000_000
+        df = pd.DataFrame(
+            {"cas": np.full(n, 250.0), "altitude": np.linspace(0, 40_000, n)}
+        )
+        chunk_size = 10_000
+        tracemalloc.start()
+        df.pitot.cas2tas("cas", "altitude", chunk_size=chunk_size)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # the result column, and scratch arrays for a few chunks
+        self.assertLess(peak, 8 * n + 20 * 8 * chunk_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import tracemalloc
 import unittest
+from typing import Any
 
 from impunity import impunity
 from typing_extensions import Annotated
@@ -120,6 +122,144 @@ class Aero(unittest.TestCase):
 
         self.assertFalse(raised)
 
+    def test_airspeeds(self) -> None:
+        h = np.linspace(0, 45_000, 101)
+        cas = np.linspace(-50, 350, 101)
+
+        tas = aero.cas2tas(cas, h)
+        expected = aero.Airspeeds(
+            tas=tas,
+            cas=cas,
+            eas=aero.tas2eas(tas, h),
+            mach=aero.tas2mach(tas, h),
+        )
+        for source in aero.SPEEDS:
+            result = aero.airspeeds(h, **{source: getattr(expected, source)})
+            for name in aero.SPEEDS:
+                np.testing.assert_allclose(
+                    getattr(result, name), getattr(expected, name), rtol=1e-9
+                )
+
+        result = aero.airspeeds(h, cas=250, outputs=["mach"])
+        self.assertIsNone(result.tas)
+        np.testing.assert_allclose(result.mach, aero.cas2mach(250, h))
+
+        result = aero.airspeeds(35_000, mach=0.78)
+        self.assertAlmostEqual(result.cas, aero.mach2cas(0.78, 35_000))
+
+        # a scalar altitude, and altitudes broadcast against the speeds
+        for h_ in (30_000, h[::20, None]):
+            for source in aero.SPEEDS:
+                value = getattr(expected, source)[None, ::10]
+                result = aero.airspeeds(h_, **{source: value})
+                shape = np.broadcast_shapes(np.shape(h_), value.shape)
+                true = np.broadcast_to(value, shape)
+                if source != "tas":
+                    true = getattr(aero, f"{source}2tas")(value, h_)
+                for name in aero.SPEEDS:
+                    with self.subTest(h=np.shape(h_), source=source, name=name):
+                        speed = getattr(result, name)
+                        self.assertEqual(speed.shape, shape)
+                        if name != "tas":
+                            speed = getattr(aero, f"{name}2tas")(speed, h_)
+                        np.testing.assert_allclose(
+                            speed, true, rtol=1e-9, atol=1e-9
+                        )
+
+        with self.assertRaises(ValueError):
+            aero.airspeeds(h, cas=cas, tas=tas)
+        with self.assertRaises(ValueError):
+            aero.airspeeds(h, cas=cas, outputs=["ias"])
+
+    def test_airspeeds_memory(self) -> None:
+        h = np.linspace(0, 40_000, 100_000)
+        cas = np.linspace(100, 350, 100_000)
+
+        def peak(fun: Any) -> int:
+            tracemalloc.start()
+            fun()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return peak
+
+        chained = peak(lambda: (aero.cas2tas(cas, h), aero.cas2mach(cas, h)))
+        fused = peak(
+            lambda: aero.airspeeds(h, cas=cas, outputs=["tas", "mach"])
+        )
+        self.assertLess(fused, 0.6 * chained)
+
+    def test_wind_triangle(self) -> None:
+        rng = np.random.default_rng(0)
+        h = rng.uniform(0, 40_000, 1000)
+        gs = rng.uniform(100, 500, 1000)
+        track = rng.uniform(0, 360, 1000)
+        wind_u, wind_v = rng.uniform(-80, 80, (2, 1000))
+
+        result = aero.wind_triangle(gs, track, wind_u, wind_v, h)
+        # the air vector plus the wind vector is the ground vector
+        heading = np.radians(result.heading)
+        np.testing.assert_allclose(
+            result.tas * np.sin(heading) + wind_u,
+            gs * np.sin(np.radians(track)),
+            atol=1e-9,
+        )
+        np.testing.assert_allclose(
+            result.tas * np.cos(heading) + wind_v,
+            gs * np.cos(np.radians(track)),
+            atol=1e-9,
+        )
+        drift = (track - result.heading + 180) % 360 - 180
+        np.testing.assert_allclose(result.drift, drift, atol=1e-9)
+        np.testing.assert_allclose(
+            result.mach, aero.tas2mach(result.tas, h), rtol=1e-9
+        )
+        np.testing.assert_allclose(
+            result.cas, aero.tas2cas(result.tas, h), rtol=1e-9
+        )
+        self.assertIsNone(result.eas)
+
+        inverse = aero.wind_triangle(
+            result.tas, result.heading, wind_u, wind_v, h, inverse=True
+        )
+        np.testing.assert_allclose(inverse.gs, gs)
+        np.testing.assert_allclose(inverse.track, track)
+        np.testing.assert_allclose(inverse.drift, result.drift, atol=1e-9)
+        np.testing.assert_allclose(inverse.cas, result.cas)
+
+        # no wind, and broadcast arguments
+        calm = aero.wind_triangle(gs, track, 0, 0, outputs=())
+        np.testing.assert_allclose(calm.tas, gs)
+        np.testing.assert_allclose(calm.heading, track)
+        self.assertIsNone(calm.mach)
+        result = aero.wind_triangle(400, 0, 0, 50, [0, 30_000])
+        np.testing.assert_allclose(result.tas, [350, 350])
+        self.assertEqual(result.mach.shape, (2,))
+        # a scalar altitude, with all the air speeds
+        result = aero.wind_triangle(
+            gs, track, wind_u, wind_v, 30_000, outputs=aero.SPEEDS
+        )
+        np.testing.assert_allclose(
+            result.eas, aero.tas2eas(result.tas, 30_000), rtol=1e-9
+        )
+        np.testing.assert_allclose(
+            result.cas, aero.tas2cas(result.tas, 30_000), rtol=1e-9
+        )
+        self.assertEqual(result.mach.shape, gs.shape)
+
+        with self.assertRaises(ValueError):
+            aero.wind_triangle(gs, track, wind_u, wind_v)
+
+    @impunity
+    def test_wind_triangle_units(self) -> None:
+        gs: Annotated[Any, "m/s"] = 200
+        track: Annotated[Any, "rad"] = np.pi / 2
+        wind: Annotated[Any, "m/s"] = -20
+        h: Annotated[Any, "m"] = 10_000
+        result = aero.wind_triangle(gs, track, wind, 0, h)
+        # (fields of the result are in kts and degrees)
+        self.assertAlmostEqual(result.tas, 220 * 3600 / 1852)
+        self.assertAlmostEqual(result.heading, 90)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+from pitot import airac
+
+
+class AIRAC(unittest.TestCase):
+    def test_airac_cycles(self) -> None:
+        rng = np.random.default_rng(42)
+        start, stop = pd.Timestamp("1990-01-01"), pd.Timestamp("2100-12-31")
+        ns = rng.integers(start.value, stop.value, 2000)
+        # include the exact start of each cycle, and the instant before
+        cycle = pd.Timestamp(airac.AIRAC_EPOCH).value + np.arange(
+            -100, 1400, 7
+        ) * (28 * 86400 * 10**9)
+        ns = np.concatenate([ns, cycle, cycle - 1000])
+        timestamps = ns.astype("datetime64[ns]")
+
+        expected = [airac.airac_cycle(t) for t in pd.to_datetime(timestamps)]
+
+        codes = airac.airac_cycles(timestamps)
+        self.assertEqual(codes.dtype, np.int64)
+        self.assertEqual([f"{c:04d}" for c in codes], expected)
+
+        categories = airac.airac_cycles(timestamps, categorical=True)
+        self.assertIsInstance(categories, pd.Categorical)
+        self.assertEqual(list(categories), expected)
+
+        index = pd.DatetimeIndex(timestamps, tz="UTC")
+        np.testing.assert_array_equal(airac.airac_cycles(index), codes)
+
+    def test_airac_cycles_series(self) -> None:
+        series = pd.Series(
+            pd.to_datetime(["2023-01-25 23:00", None, "2023-01-26 00:30"]),
+            index=[3, 4, 5],
+            name="timestamp",
+        ).dt.tz_localize("Europe/Paris")
+
+        codes = airac.airac_cycles(series)
+        self.assertIsInstance(codes, pd.Series)
+        self.assertEqual(codes.index.tolist(), [3, 4, 5])
+        # 2023-01-26 00:30 in Paris is still the 25th in UTC
+        self.assertEqual(codes.tolist(), [2213, -1, 2213])
+
+        labels = airac.airac_cycles(
+            series, categorical=True, template="{year}-{ordinal}"
+        )
+        self.assertEqual(labels.dtype, "category")
+        self.assertEqual(labels.iloc[0], "22-13")
+        self.assertTrue(pd.isna(labels.iloc[1]))
+
+        empty = airac.airac_cycles(np.array([], dtype="datetime64[ns]"))
+        self.assertEqual(empty.shape, (0,))
+
+    def test_airac_table(self) -> None:
+        table = airac.airac_table()
+        self.assertEqual(
+            table.start.iloc[0], pd.Timestamp("1998-01-01", tz="UTC")
+        )
+        self.assertEqual(table.end.iloc[-1].year, 2101)
+        np.testing.assert_array_equal(np.diff(table.serial), 1)
+        # the table is a copy, the cache can't be altered
+        table.loc[0, "ident"] = "XXXX"
+        self.assertEqual(airac.airac_table().ident.iloc[0], "9801")
+
+        self.assertEqual(
+            table.ident.iloc[1:].tolist(),
+            [airac.airac_cycle(t) for t in table.start.iloc[1:]],
+        )
+        self.assertEqual(
+            table.ident.iloc[1:].tolist(),
+            airac.airac_cycles(table.start.iloc[1:], categorical=True).tolist(),
+        )
+
+        for row in table.query("2000 <= start.dt.year < 2100").itertuples():
+            self.assertEqual(
+                airac.airac_interval(row.ident),
+                (row.start.to_pydatetime(), row.end.to_pydatetime()),
+            )
+        # a year starting with a new cycle
+        self.assertEqual(
+            airac.airac_interval("4301")[0].isoformat(),
+            "2043-01-01T00:00:00+00:00",
+        )
+        with self.assertRaises(ValueError):
+            airac.airac_interval("2314")
+
+    def test_airac_bucket(self) -> None:
+        rng = np.random.default_rng(0)
+        start, stop = pd.Timestamp("1990-01-01"), pd.Timestamp("2110-01-01")
+        ns = rng.integers(start.value, stop.value, 100_000)
+        timestamps = pd.DatetimeIndex(ns.astype("datetime64[ns]"), tz="UTC")
+
+        table = airac.airac_table()
+        intervals = pd.IntervalIndex.from_arrays(
+            table.start, table.end, closed="left"
+        )
+        expected = intervals.get_indexer(timestamps)
+        np.testing.assert_array_equal(airac.airac_bucket(timestamps), expected)
+        np.testing.assert_array_equal(
+            table.start.searchsorted(timestamps, side="right") - 1,
+            np.where(timestamps < table.end.iloc[-1], expected, len(table) - 1),
+        )
@@ -0,0 +1,108 @@
+import unittest
+from typing import Any
+
+import numpy as np
+from pitot import aero, geodesy, isa
+
+try:
+    import pyarrow as pa
+
+    HAS_PYARROW = True
+except ImportError:  # pragma: no cover
+    HAS_PYARROW = False
+
+try:
+    import polars as pl
+
+    HAS_POLARS = True
+except ImportError:  # pragma: no cover
+    HAS_POLARS = False
+
+
+@unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+class Arrow(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.cas = rng.uniform(100, 350, 100)
+        self.h = rng.uniform(0, 40_000, 100)
+        self.mask = rng.uniform(size=100) < 0.2
+
+    def assert_equal(self, result: Any, expected: Any, mask: Any) -> None:
+        self.assertEqual(result.null_count, mask.sum())
+        np.testing.assert_array_equal(result.is_null(), mask)
+        values = result.to_numpy(zero_copy_only=False)
+        np.testing.assert_array_equal(values[~mask], expected[~mask])
+
+    def test_array(self) -> None:
+        cas = pa.array(self.cas, mask=self.mask)
+        result = aero.cas2tas(cas, self.h)
+        self.assertIsInstance(result, pa.DoubleArray)
+        self.assert_equal(result, aero.cas2tas(self.cas, self.h), self.mask)
+        # the validity bitmap is shared, not copied
+        self.assertEqual(result.buffers()[0].address, cas.buffers()[0].address)
+
+        # no null, integers, float32
+        result = isa.temperature(pa.array([0, 11000, 20000]))
+        self.assertEqual(result.null_count, 0)
+        self.assertEqual(result.to_pylist(), [288.15, 216.65, 216.65])
+        result = isa.density(pa.array(self.h, type=pa.float32()))
+        self.assertEqual(result.type, pa.float32())
+
+        with self.assertRaises(TypeError):
+            isa.density(pa.array(["a", "b"]))
+
+    def test_offsets(self) -> None:
+        cas = pa.array(self.cas, mask=self.mask).slice(3)
+        h = pa.array(self.h, mask=self.mask[::-1]).slice(5)
+        cas, h = cas.slice(0, len(h)), h.slice(0, len(h))
+        mask = self.mask[3:-2] | self.mask[::-1][5:]
+        expected = aero.cas2tas(self.cas[3:-2], self.h[5:])
+        self.assert_equal(aero.cas2tas(cas, h), expected, mask)
+
+    def test_chunked(self) -> None:
+        cas = pa.chunked_array([self.cas[:30], self.cas[30:]])
+        h = pa.chunked_array([self.h[:50], self.h[50:90], self.h[90:]])
+        result = aero.cas2mach(cas, h)
+        self.assertIsInstance(result, pa.ChunkedArray)
+        self.assertEqual([len(c) for c in result.chunks], [30, 20, 40, 10])
+        expected = aero.cas2mach(self.cas, self.h)
+        np.testing.assert_array_equal(result.to_numpy(), expected)
+
+        _, rho, _ = isa.atmosphere(h, method="table")
+        np.testing.assert_array_equal(
+            rho.to_numpy(), isa.density(self.h, method="table")
+        )
+
+    def test_geodesy(self) -> None:
+        lat = pa.array([0.0, None, 45.0])
+        lon = pa.array([0.0, 10.0, 10.0])
+        result = geodesy.distance(lat, lon, lon, lat)
+        self.assertEqual(result.null_count, 1)
+        expected = geodesy.distance(
+            [0.0, 45.0], [0.0, 10.0], [0.0, 10.0], [0.0, 45.0]
+        )
+        np.testing.assert_array_equal(result.drop_null().to_numpy(), expected)
+
+        lat2, lon2, _ = geodesy.destination(lat, lon, lon, lon)
+        self.assertEqual(lat2.null_count, 1)
+        self.assertEqual(lon2.null_count, 1)
+
+    @unittest.skipUnless(HAS_POLARS, "polars is not installed")
+    def test_polars(self) -> None:
+        cas = pl.Series("cas", self.cas).scatter(
+            np.flatnonzero(self.mask), None
+        )
+        result = aero.cas2tas(cas, pl.Series("h", self.h))
+        self.assertIsInstance(result, pl.Series)
+        self.assertEqual(result.name, "cas")
+        self.assertEqual(result.null_count(), self.mask.sum())
+        np.testing.assert_array_equal(
+            result.filter(~pl.Series(self.mask)).to_numpy(),
+            aero.cas2tas(self.cas, self.h)[~self.mask],
+        )
+        # Python scalars are not affected
+        self.assertIs(type(aero.cas2tas(250.0, 10_000.0)), float)
+
+
+if __name__ == "__main__":
+    unittest.main()
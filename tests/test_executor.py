@@ -0,0 +1,112 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pitot import aero, factorized, geodesy, isa, parallel
+from pitot.raw import aero as raw_aero
+from pitot.raw import isa as raw_isa
+
+
+class Parallel(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        self.cas = rng.uniform(100, 350, 10_001)
+        self.h = rng.uniform(0, 40_000, 10_001)
+        self.lat = rng.uniform(-80, 80, (2, 10_001))
+        self.lon = rng.uniform(-180, 180, (2, 10_001))
+
+    def test_raw(self) -> None:
+        expected = raw_aero.cas2tas(self.cas, self.h)
+        atmosphere = raw_isa.atmosphere(self.h)
+        with parallel(4, chunk_size=1000):
+            result = raw_aero.cas2tas(self.cas, self.h)
+            np.testing.assert_array_equal(result, expected)
+            # broadcast arguments
+            result = raw_aero.cas2tas(self.cas, 30_000.0)
+            expected = raw_aero.cas2tas(self.cas, 30_000.0)
+            np.testing.assert_array_equal(result, expected)
+            # several outputs, and out= arguments
+            for r, e in zip(raw_isa.atmosphere(self.h), atmosphere):
+                np.testing.assert_array_equal(r, e)
+            out = np.empty_like(self.h), np.empty_like(self.h), self.h.copy()
+            self.assertIs(raw_isa.atmosphere(self.h, out=out), out)
+            for r, e in zip(out, atmosphere):
+                np.testing.assert_array_equal(r, e)
+
+    def test_units(self) -> None:
+        expected = aero.cas2mach(self.cas, self.h)
+        temperature = isa.temperature(self.h)
+        with parallel(4, chunk_size=1000):
+            np.testing.assert_array_equal(
+                aero.cas2mach(self.cas, self.h), expected
+            )
+            np.testing.assert_array_equal(isa.temperature(self.h), temperature)
+            # scalars are evaluated directly
+            self.assertEqual(isa.temperature(0), isa.temperature(0))
+
+    def test_pandas(self) -> None:
+        cas = pd.Series(self.cas, index=np.arange(10_001) * 2, name="cas")
+        expected = raw_aero.cas2tas(cas, self.h)
+        with parallel(4, chunk_size=1000):
+            result = raw_aero.cas2tas(cas, self.h)
+        self.assertIsInstance(result, pd.Series)
+        pd.testing.assert_series_equal(result, expected)
+
+    def test_geodesy(self) -> None:
+        args = self.lat[0], self.lon[0], self.lat[1], self.lon[1]
+        distance = geodesy.distance(*args)
+        haversine = geodesy.distance(*args, method="haversine")
+        destination = geodesy.destination(*args)
+        with parallel(4, chunk_size=1000):
+            np.testing.assert_array_equal(geodesy.distance(*args), distance)
+            np.testing.assert_array_equal(
+                geodesy.distance(*args, method="haversine"), haversine
+            )
+            for r, e in zip(geodesy.destination(*args), destination):
+                np.testing.assert_array_equal(r, e)
+
+    def test_executor(self) -> None:
+        args = self.lat[0], self.lon[0], self.lat[1], self.lon[1]
+        expected = raw_aero.cas2tas(self.cas, self.h)
+        with ThreadPoolExecutor(2) as executor:
+            with parallel(executor=executor, chunk_size=1000):
+                result = raw_aero.cas2tas(self.cas, self.h)
+        np.testing.assert_array_equal(result, expected)
+
+        with ProcessPoolExecutor(2) as executor:
+            with parallel(executor=executor, chunk_size=2500):
+                result = raw_aero.cas2tas(self.cas, self.h)
+                distance = geodesy.distance(*args)
+        np.testing.assert_array_equal(result, expected)
+        np.testing.assert_array_equal(distance, geodesy.distance(*args))
+
+    def test_context(self) -> None:
+        rng = np.random.default_rng(1)
+        cas = rng.integers(100, 350, 1_000_000).astype(np.float64)
+        h = rng.integers(0, 1600, 1_000_000) * 25.0
+        with raw_isa.precision("float32"):
+            expected = raw_aero.cas2tas(cas, h)
+            # the settings of the caller apply to all chunks
+            with parallel(3, chunk_size=100_000):
+                result = raw_aero.cas2tas(cas, h)
+                with factorized():
+                    factorized_result = raw_aero.cas2tas(cas, h)
+                    atmosphere = raw_isa.atmosphere(h)
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_array_equal(result, expected)
+        np.testing.assert_array_equal(factorized_result, expected)
+        with raw_isa.precision("float32"):
+            for r, e in zip(atmosphere, raw_isa.atmosphere(h)):
+                self.assertEqual(r.dtype, np.float32)
+                np.testing.assert_array_equal(r, e)
+
+    def test_sequential(self) -> None:
+        with self.assertRaises(ValueError):
+            with parallel(chunk_size=0):
+                pass
+        with parallel(1):
+            np.testing.assert_array_equal(
+                raw_aero.cas2tas(self.cas, self.h),
+                aero.cas2tas(self.cas, self.h),
+            )
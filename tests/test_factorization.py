@@ -0,0 +1,138 @@
+import unittest
+from typing import Any, List
+
+import numpy as np
+import pandas as pd
+from pitot import aero, factorized, isa
+from pitot.raw import aero as raw_aero
+from pitot.raw import isa as raw_isa
+from pitot.raw.factorization import _config, factorizable
+
+
+class Factorization(unittest.TestCase):
+    def setUp(self) -> None:
+        rng = np.random.default_rng(0)
+        # barometric altitudes in steps of 25 ft, integer air speeds
+        self.h = rng.integers(0, 1600, 100_001) * 25.0
+        self.cas = rng.integers(100, 350, 100_001).astype(np.float64)
+        self.sizes: List[int] = []
+
+        def double(x: Any, y: Any = 1.0) -> Any:
+            self.sizes.append(np.size(x))
+            return np.multiply(x, 2) * y
+
+        self.double = factorizable(double)
+
+    def test_raw(self) -> None:
+        tas = raw_aero.cas2tas(self.cas, self.h)
+        h = self.h * 0.3048  # not integers, hashed
+        atmosphere = raw_isa.atmosphere(h)
+        with factorized():
+            np.testing.assert_array_equal(
+                raw_aero.cas2tas(self.cas, self.h), tas
+            )
+            for r, e in zip(raw_isa.atmosphere(h), atmosphere):
+                np.testing.assert_array_equal(r, e)
+            # constant arguments
+            np.testing.assert_array_equal(
+                raw_aero.cas2tas(self.cas, 30_000.0),
+                raw_aero.cas2tas(self.cas, np.full_like(self.cas, 30_000)),
+            )
+            # missing values
+            h[::7] = np.nan
+            np.testing.assert_array_equal(
+                raw_isa.density(h), raw_isa.density(h.copy())
+            )
+            out = np.empty_like(self.h), np.empty_like(self.h), h.copy()
+            self.assertIs(raw_isa.atmosphere(self.h, out=out), out)
+        for r, e in zip(out, raw_isa.atmosphere(self.h)):
+            np.testing.assert_array_equal(r, e)
+
+    def test_units(self) -> None:
+        expected = aero.cas2mach(self.cas, self.h)
+        pressure = isa.pressure(self.h)
+        with factorized():
+            np.testing.assert_array_equal(
+                aero.cas2mach(self.cas, self.h), expected
+            )
+            np.testing.assert_array_equal(isa.pressure(self.h), pressure)
+
+    def test_pandas(self) -> None:
+        cas = pd.Series(self.cas, index=np.arange(100_001) * 2, name="cas")
+        expected = raw_aero.cas2tas(cas, self.h)
+        with factorized():
+            result = raw_aero.cas2tas(cas, self.h)
+        self.assertIsInstance(result, pd.Series)
+        pd.testing.assert_series_equal(result, expected)
+
+    def test_precision(self) -> None:
+        h = self.h.astype(np.float32)
+        with raw_isa.precision(np.float32):
+            expected = raw_isa.pressure(h)
+            with factorized():
+                result = raw_isa.pressure(h)
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_array_equal(result, expected)
+
+    def test_distinct(self) -> None:
+        with factorized():
+            np.testing.assert_array_equal(self.double(self.h), self.h * 2)
+            self.assertEqual(self.sizes, [1600])
+            # pairs of values
+            np.testing.assert_array_equal(
+                self.double(self.h, self.cas), self.h * 2 * self.cas
+            )
+            self.assertLess(self.sizes[-1], 100_001)
+            # many distinct values, or small arrays
+            x = np.random.default_rng(0).uniform(0, 1, 100_001)
+            self.double(x)
+            self.double(self.h[:1000])
+            self.assertEqual(self.sizes[2:], [100_001, 1000])
+            # the range of even values, cheaper than finding those present
+            self.double(np.arange(100_000) % 100 * 2)
+            self.assertEqual(self.sizes[-1], 199)
+        with factorized(min_size=100):
+            self.double(np.tile(self.h[:10], 100))
+            self.assertEqual(self.sizes[-1], 10)
+        # nothing happens outside of the context
+        self.double(self.h)
+        self.assertEqual(self.sizes[-1], 100_001)
+
+    def test_cache(self) -> None:
+        with factorized(cache_size=2000):
+            self.double(self.h)
+            self.double(self.h[::-1])
+            self.assertEqual(self.sizes, [1600])
+            # new values only
+            np.testing.assert_array_equal(
+                self.double(self.h + 50), self.h * 2 + 100
+            )
+            self.assertEqual(self.sizes[1:], [2])
+            # constant arguments; the cache is cleared when full
+            self.double(self.h, 2)
+            self.double(self.h + 50)
+            self.assertEqual(self.sizes[2:], [1600, 1600])
+        with factorized(cache_size=1000):
+            self.double(self.h)
+            self.double(self.h)
+            self.assertEqual(self.sizes[4:], [1600, 1600])
+        with self.assertRaises(ValueError):
+            with factorized(cache_size=-1):
+                pass
+
+    def test_cache_bounded(self) -> None:
+        rng = np.random.default_rng(1)
+        with factorized(cache_size=5000):
+            config = _config.get()
+            assert config is not None and config.cache is not None
+            cache = config.cache
+            for _ in range(20):
+                # few distinct values, in a range of millions
+                x = rng.integers(0, 1000, 100_001) * 3000 + rng.integers(
+                    1_000_000
+                )
+                np.testing.assert_array_equal(self.double(x, x), 2.0 * x * x)
+                self.assertLessEqual(len(cache), 5000)
+                for slot in cache.slots.values():
+                    for values in slot.values:
+                        self.assertLessEqual(len(values), len(slot))
@@ -1,11 +1,28 @@
+import pickle
+import tempfile
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 from impunity import impunity
 from typing_extensions import Annotated
 
 import numpy as np
-from pitot.geodesy import bearing, destination, distance, greatcircle
+import pandas as pd
+from pitot.geodesy import (
+    AirspaceIndex,
+    PointIndex,
+    bearing,
+    bearing_matrix,
+    cross_track,
+    destination,
+    distance,
+    distance_matrix,
+    get_geod,
+    greatcircle,
+    greatcircle_batch,
+    kinematics,
+)
 
 zero: Annotated[int, "dimensionless"] = 0
 boop: Annotated[int, "dimensionless"] = 0
@@ -16,6 +33,10 @@ nmi = Annotated[Any, "nmi"]
 m = Annotated[Any, "m"]
 
 
+def _wrap(angle: Any) -> Any:
+    return (angle + 180) % 360 - 180
+
+
 class Geodesy(unittest.TestCase):
     @impunity
     def test_nautical_miles(self) -> None:
@@ -67,6 +88,424 @@ class Geodesy(unittest.TestCase):
         b = bearing(x[:-1, 0], x[:-1, 1], x[1:, 0], x[1:, 1])
         self.assertAlmostEqual(b.max(), b.min())
 
+    def test_geod_engine(self) -> None:
+        self.assertIs(get_geod(), get_geod("WGS84"))
+        self.assertIsNot(get_geod(), get_geod("sphere"))
+
+        with ThreadPoolExecutor(8) as executor:
+            engines = list(executor.map(get_geod, ["GRS80"] * 32))
+        self.assertTrue(all(e is engines[0] for e in engines))
+
+    def test_geod_ellipsoid(self) -> None:
+        d_wgs84 = distance(0, 0, 0, 1)
+        d_sphere = distance(0, 0, 0, 1, ellps="sphere")
+        self.assertAlmostEqual(d_wgs84, 111319.49, delta=1e-2)
+        self.assertAlmostEqual(d_sphere, 111194.87, delta=1e-2)
+
+    def test_distance_matrix(self) -> None:
+        rng = np.random.default_rng(0)
+        lat1, lon1 = rng.uniform(-80, 80, 37), rng.uniform(-180, 180, 37)
+        lat2, lon2 = rng.uniform(-80, 80, 23), rng.uniform(-180, 180, 23)
+
+        la1, la2 = np.meshgrid(lat1, lat2, indexing="ij")
+        lo1, lo2 = np.meshgrid(lon1, lon2, indexing="ij")
+
+        expected = distance(la1, lo1, la2, lo2)
+        result = distance_matrix(lat1, lon1, lat2, lon2, max_memory=1000)
+        np.testing.assert_allclose(result, expected)
+
+        expected = bearing(la1, lo1, la2, lo2)
+        result = bearing_matrix(lat1, lon1, lat2, lon2, max_memory=1000)
+        np.testing.assert_allclose(result, expected)
+
+    def test_distance_matrix_symmetric(self) -> None:
+        rng = np.random.default_rng(1)
+        lat, lon = rng.uniform(-80, 80, 51), rng.uniform(-180, 180, 51)
+
+        full = distance_matrix(lat, lon, lat, lon)
+        result = distance_matrix(lat, lon, symmetric=True, max_memory=2000)
+        np.testing.assert_allclose(result, full)
+
+        full = bearing_matrix(lat, lon, lat, lon)
+        result = bearing_matrix(lat, lon, symmetric=True, max_memory=2000)
+        # the bearing is undefined on the diagonal
+        np.fill_diagonal(full, 0)
+        np.fill_diagonal(result, 0)
+        delta = (result - full + 180) % 360 - 180
+        np.testing.assert_allclose(delta, 0, atol=1e-9)
+
+        with self.assertRaises(ValueError):
+            distance_matrix(lat, lon, lat, lon, symmetric=True)
+
+    def test_distance_matrix_out(self) -> None:
+        lat, lon = np.linspace(0, 10, 20), np.linspace(0, 20, 20)
+        expected = distance_matrix(lat, lon)
+
+        with tempfile.NamedTemporaryFile() as file:
+            out = np.memmap(file, dtype=np.float64, shape=(20, 20), mode="w+")
+            result = distance_matrix(lat, lon, symmetric=True, out=out)
+            self.assertIs(result, out)
+            np.testing.assert_allclose(out, expected)
+
+        with self.assertRaises(ValueError):
+            distance_matrix(lat, lon, out=np.empty((20, 19)))
+
+    def test_kinematics(self) -> None:
+        rng = np.random.default_rng(2)
+        sizes = [5, 1, 12, 7]
+        offsets = np.cumsum([0, *sizes[:-1]])
+        flight_id = np.repeat(["a", "b", "c", "d"], sizes)
+        lat = rng.uniform(40, 50, sum(sizes))
+        lon = rng.uniform(-5, 5, sum(sizes))
+        seconds = rng.integers(1, 60, sum(sizes)).cumsum()
+        timestamp = np.datetime64("2024-01-01") + seconds.astype("m8[s]")
+
+        result = kinematics(lat, lon, timestamp, flight_id)
+        for key, value in zip(
+            result._fields, kinematics(lat, lon, seconds, offsets=offsets)
+        ):
+            np.testing.assert_array_equal(getattr(result, key), value)
+        # timezone-aware timestamps, as in ADS-B data
+        aware = pd.DatetimeIndex(timestamp).tz_localize("UTC")
+        paris = aware.tz_convert("Europe/Paris")
+        for ts in (paris, pd.Series(paris), list(paris)):
+            np.testing.assert_array_equal(
+                kinematics(lat, lon, ts, flight_id).groundspeed,
+                result.groundspeed,
+            )
+
+        for start, size in zip(offsets, sizes):
+            s = slice(start, start + size)
+            la, lo, ts = lat[s], lon[s], seconds[s]
+            self.assertTrue(np.isnan(result.distance[start]))
+            self.assertTrue(np.isnan(result.track[start]))
+            self.assertEqual(result.cumdist[start], 0)
+            if size == 1:
+                continue
+            d = distance(la[:-1], lo[:-1], la[1:], lo[1:])
+            b = bearing(la[:-1], lo[:-1], la[1:], lo[1:])
+            np.testing.assert_allclose(result.distance[s][1:], d)
+            np.testing.assert_allclose(result.track[s][1:], b)
+            np.testing.assert_allclose(result.cumdist[s][1:], d.cumsum())
+            np.testing.assert_allclose(
+                result.groundspeed[s][1:], d / np.diff(ts)
+            )
+
+        with self.assertRaises(ValueError):
+            kinematics(lat, lon, seconds, flight_id, offsets=offsets)
+        with self.assertRaisesRegex(ValueError, "timestamp"):
+            kinematics(lat, lon, seconds[:-1], offsets=offsets)
+
+    def test_greatcircle_batch(self) -> None:
+        lat1, lon1 = np.array([43.6, 0, -33.9]), np.array([1.4, 0, 151.2])
+        lat2, lon2 = np.array([40.6, 0, 37.6]), np.array([-73.8, 45, -122.4])
+
+        lat, lon, offsets = greatcircle_batch(
+            lat1, lon1, lat2, lon2, 44, endpoints=False
+        )
+        np.testing.assert_array_equal(offsets, [0, 44, 88, 132])
+        for i in range(3):
+            s = slice(offsets[i], offsets[i + 1])
+            expected = np.stack(
+                greatcircle(lat1[i], lon1[i], lat2[i], lon2[i], 44)
+            )
+            np.testing.assert_allclose(lat[s], expected[:, 0])
+            np.testing.assert_allclose(lon[s], expected[:, 1])
+
+        lat, lon, offsets = greatcircle_batch(lat1, lon1, lat2, lon2, [0, 1, 2])
+        np.testing.assert_array_equal(offsets, [0, 2, 5, 9])
+        np.testing.assert_array_equal(lat[offsets[:-1]], lat1)
+        np.testing.assert_array_equal(lon[offsets[1:] - 1], lon2)
+
+        with self.assertRaises(ValueError):
+            greatcircle_batch(lat1, lon1, lat2, lon2)
+
+    def test_greatcircle_tolerance(self) -> None:
+        geod = get_geod()
+        r = geod.a * (1 - geod.es)
+
+        def ecef(lat: Any, lon: Any) -> Any:
+            lat, lon = np.radians(lat), np.radians(lon)
+            n = geod.a / np.sqrt(1 - geod.es * np.sin(lat) ** 2)
+            return np.stack(
+                [
+                    n * np.cos(lat) * np.cos(lon),
+                    n * np.cos(lat) * np.sin(lon),
+                    n * (1 - geod.es) * np.sin(lat),
+                ]
+            )
+
+        # meridians and the equator, where curvatures are extreme
+        lat1 = np.array([43.6, 0, -33.9, -89, 0])
+        lon1 = np.array([1.4, 0, 151.2, 10, 0])
+        lat2 = np.array([40.6, 0, 37.6, 89, 0])
+        lon2 = np.array([-73.8, 45, -122.4, 10, 90])
+
+        for tolerance in [10, 100, 1000, 100_000]:
+            lat, lon, offsets = greatcircle_batch(
+                lat1, lon1, lat2, lon2, tolerance=tolerance
+            )
+            # remove the jumps between consecutive great circles
+            first = np.delete(np.arange(lat.size - 1), offsets[1:-1] - 1)
+            az, _, d = geod.inv(
+                lon[first], lat[first], lon[first + 1], lat[first + 1]
+            )
+            # distance between the middles of the geodesic and of the chord
+            mid_lon, mid_lat, _ = geod.fwd(lon[first], lat[first], az, d / 2)
+            chord = (
+                ecef(lat[first], lon[first])
+                + ecef(lat[first + 1], lon[first + 1])
+            ) / 2
+            deviation = np.linalg.norm(ecef(mid_lat, mid_lon) - chord, axis=0)
+            self.assertLessEqual(deviation.max(), tolerance)
+
+            # one fewer segment would exceed the tolerance
+            total = distance(lat1, lon1, lat2, lon2)
+            segments = np.diff(offsets) - 2
+            sagitta = r * (1 - np.cos(total / segments / (2 * r)))
+            self.assertTrue(np.all(sagitta > tolerance))
+
+        for tolerance in [0, -1]:
+            with self.assertRaises(ValueError):
+                greatcircle_batch(lat1, lon1, lat2, lon2, tolerance=tolerance)
+
+    def test_point_index(self) -> None:
+        rng = np.random.default_rng(3)
+        # include points close to the poles and to the antimeridian
+        lat = np.r_[rng.uniform(-90, 90, 500), 89.9, -89.9, 10, 10]
+        lon = np.r_[rng.uniform(-180, 180, 500), 0, 90, 179.99, -179.99]
+        q_lat = np.r_[rng.uniform(-90, 90, 200), 89.5, 10]
+        q_lon = np.r_[rng.uniform(-180, 180, 200), -90, 180]
+        matrix = distance_matrix(q_lat, q_lon, lat, lon)
+
+        for cell_size in [0.5, 5, 45]:
+            index = PointIndex(lat, lon, cell_size=cell_size)
+
+            idx, dist = index.query(q_lat, q_lon, k=5)
+            expected = np.sort(matrix, axis=1)[:, :5]
+            np.testing.assert_allclose(dist, expected)
+            np.testing.assert_allclose(
+                np.take_along_axis(matrix, idx, axis=1), expected
+            )
+
+            idx, dist, offsets = index.query_radius(q_lat, q_lon, 500_000)
+            self.assertEqual(offsets[-1], np.sum(matrix <= 500_000))
+            for i in range(q_lat.shape[0]):
+                s = slice(offsets[i], offsets[i + 1])
+                within = np.flatnonzero(matrix[i] <= 500_000)
+                self.assertEqual(set(idx[s]), set(within))
+                np.testing.assert_allclose(dist[s], np.sort(matrix[i, within]))
+
+    def test_point_index_small(self) -> None:
+        index = PointIndex([43.6, 48.7], [1.4, 2.4])
+        idx, dist = index.query(0, 0, k=3)
+        np.testing.assert_array_equal(idx, [[0, 1, -1]])
+        self.assertEqual(dist[0, 2], np.inf)
+
+        idx, dist, offsets = index.query_radius([0, 45], [0, 2], 500_000)
+        np.testing.assert_array_equal(idx, [0, 1])
+        np.testing.assert_array_equal(offsets, [0, 0, 2])
+
+        clone = pickle.loads(pickle.dumps(index))
+        np.testing.assert_array_equal(clone.query(45, 2, k=2)[0], [[0, 1]])
+
+    def test_methods(self) -> None:
+        rng = np.random.default_rng(4)
+
+        # (method, max distance, max |latitude|) -> maximum errors on:
+        # relative distance, bearing (in degrees), relative destination
+        bounds = {
+            ("haversine", 10_000_000, 90): (0.006, 0.2, 0.006),
+            ("equirectangular", 100_000, 70): (0.006, 1.3, 0.022),
+            ("flat", 100_000, 70): (0.009, 1.4, 0.025),
+            ("flat", 20_000, 60): (0.002, 0.2, 0.004),
+        }
+        for (method, max_dist, max_lat), (e_d, e_b, e_p) in bounds.items():
+            lat1 = rng.uniform(-max_lat, max_lat, 10_000)
+            lon1 = rng.uniform(-180, 180, 10_000)
+            az = rng.uniform(-180, 180, 10_000)
+            dist = rng.uniform(1000, max_dist, 10_000)
+            lat2, lon2, _ = destination(lat1, lon1, az, dist)
+
+            d = distance(lat1, lon1, lat2, lon2, method=method)
+            self.assertLess(np.max(np.abs(d / dist - 1)), e_d, method)
+
+            b = bearing(lat1, lon1, lat2, lon2, method=method)
+            self.assertLess(np.max(np.abs((b - az + 180) % 360 - 180)), e_b)
+
+            lat, lon, _ = destination(lat1, lon1, az, dist, method=method)
+            delta = distance(lat, lon, lat2, lon2)
+            self.assertLess(np.max(delta / dist), e_p, method)
+
+        with self.assertRaises(ValueError):
+            distance(0, 0, 1, 1, method="vincenty")
+
+    def test_method_flat_reference(self) -> None:
+        lat, lon = np.array([48.5, 48.6]), np.array([2.2, 2.5])
+        ref = (48.55, 2.35)
+        d = distance(
+            lat[0], lon[0], lat[1], lon[1], method="flat", reference=ref
+        )
+        self.assertAlmostEqual(
+            d / distance(lat[0], lon[0], lat[1], lon[1]), 1, 5
+        )
+        lat2, lon2, back = destination(0, 0, 90, 1000, method="flat")
+        self.assertAlmostEqual(lat2, 0)
+        self.assertEqual(back, -90)
+        self.assertAlmostEqual(lon2, 1000 / 111319.49, 6)
+
+    def test_cross_track(self) -> None:
+        rng = np.random.default_rng(5)
+        # two routes of 6 and 4 points, densified to measure distances
+        r_lat = np.r_[rng.uniform(40, 50, 6), rng.uniform(-10, 0, 4)]
+        r_lon = np.r_[rng.uniform(-5, 5, 6), rng.uniform(100, 110, 4)]
+        lat1, lon1, lat2, lon2 = r_lat[:-1], r_lon[:-1], r_lat[1:], r_lon[1:]
+        g_lat, g_lon, g_offsets = greatcircle_batch(
+            lat1, lon1, lat2, lon2, tolerance=0.01
+        )
+        # lengths of the segments between the two routes are removed
+        lengths = np.delete(distance(lat1, lon1, lat2, lon2), 5)
+
+        lat = np.r_[rng.uniform(40, 50, 50), rng.uniform(-10, 0, 30)]
+        lon = np.r_[rng.uniform(-5, 5, 50), rng.uniform(100, 110, 30)]
+        route = np.repeat([0, 1], [50, 30])
+        result = cross_track(
+            lat, lon, r_lat, r_lon, offsets=[0, 6], route=route
+        )
+        self.assertTrue(np.all(result.segment != 5))
+        self.assertTrue(np.all((result.segment < 5) == (route == 0)))
+
+        # distances from each point to each densified segment
+        matrix = distance_matrix(lat, lon, g_lat, g_lon)
+        closest = np.minimum.reduceat(matrix, g_offsets[:-1], axis=1)
+        closest[route == 0, 5:] = closest[route == 1, :6] = np.inf
+        # the closest segment, up to ties at the joint of two segments
+        expected = result.segment
+        np.testing.assert_allclose(
+            np.take_along_axis(closest, expected[:, None], axis=1)[:, 0],
+            np.min(closest, axis=1),
+            rtol=5e-3,
+        )
+
+        # where the projection falls within the segment
+        rank = np.where(expected > 5, expected - 1, expected)
+        within = (result.along_track > 0) & (result.along_track < lengths[rank])
+        np.testing.assert_allclose(
+            np.abs(result.cross_track[within]),
+            np.min(closest, axis=1)[within],
+            rtol=5e-3,
+        )
+        # positive on the right of the segment
+        side = bearing(lat1[expected], lon1[expected], lat, lon)
+        side -= bearing(
+            lat1[expected], lon1[expected], lat2[expected], lon2[expected]
+        )
+        np.testing.assert_array_equal(
+            result.cross_track > 0, np.sin(np.radians(side)) > 0
+        )
+
+        # segments given by their endpoints
+        keep = np.arange(9) != 5
+        for key, value in zip(
+            result._fields,
+            cross_track(
+                lat, lon, lat1[keep], lon1[keep], lat2[keep], lon2[keep]
+            ),
+        ):
+            with self.subTest(key=key):
+                other = (
+                    value if key != "segment" else np.flatnonzero(keep)[value]
+                )
+                np.testing.assert_allclose(getattr(result, key), other)
+
+    def test_cross_track_segments(self) -> None:
+        # one segment per point along the equator
+        result = cross_track([1, -1], [1, 1], 0, 0, 0, [2, 3], route=[0, 1])
+        np.testing.assert_array_equal(result.segment, [0, 1])
+        np.testing.assert_allclose(
+            result.cross_track, [-110574, 110574], rtol=1e-3
+        )
+        np.testing.assert_allclose(result.along_track, 111319, rtol=1e-3)
+
+        # no candidate segment
+        result = cross_track(0, 0, [0, 0], [0, 1], offsets=[0, 1], route=1)
+        self.assertEqual(result.segment[0], -1)
+        self.assertTrue(np.isnan(result.cross_track[0]))
+
+        with self.assertRaises(ValueError):
+            cross_track(0, 0, 0, 0, 1, 1, offsets=[0])
+
+    def test_airspace_index(self) -> None:
+        rng = np.random.default_rng(6)
+        # star-shaped polygons, one of them across the antimeridian
+        centers = [(45, 5), (46, 8), (0, 179), (-30, -60), (60, 100)]
+        sizes = [12, 5, 20, 8, 30]
+        angle = np.concatenate(
+            [np.sort(rng.uniform(0, 2 * np.pi, n)) for n in sizes]
+        )
+        radius = rng.uniform(2, 6, sum(sizes))
+        c_lat, c_lon = np.repeat(centers, sizes, axis=0).T
+        lat = c_lat + radius * np.cos(angle)
+        lon = _wrap(c_lon + radius * np.sin(angle) / np.cos(np.radians(c_lat)))
+        offsets = np.cumsum([0, *sizes[:-1]])
+        lower = np.array([0, 3000, 0, 0, 0])
+        upper = np.array([6000, 9000, 12000, 12000, 12000])
+
+        # brute force ray casting on the densified rings
+        following = np.r_[np.arange(1, lat.shape[0]), 0]
+        following[offsets[1:] - 1] = offsets[:-1]
+        following[-1] = offsets[-1]
+        g_lat, g_lon, g_offsets = greatcircle_batch(
+            lat, lon, lat[following], lon[following], tolerance=100
+        )
+        # query points around each polygon
+        q_lat = np.repeat(c_lat[offsets], 600) + rng.uniform(-8, 8, 3000)
+        q_lon = _wrap(
+            np.repeat(c_lon[offsets], 600) + rng.uniform(-12, 12, 3000)
+        )
+        alt = rng.uniform(0, 12000, 3000)
+
+        expected = np.zeros((3000, len(sizes)), dtype=bool)
+        edge = np.repeat(np.arange(lat.shape[0]), np.diff(g_offsets))
+        polygon = np.repeat(np.arange(len(sizes)), sizes)[edge]
+        # segments join consecutive points of a same edge
+        polygon[g_offsets[1:] - 1] = -1
+        for p in range(len(sizes)):
+            ref = lon[offsets[p]]
+            idx = np.flatnonzero(polygon == p)
+            x0 = ref + _wrap(g_lon[idx] - ref)
+            x1 = ref + _wrap(g_lon[idx + 1] - ref)
+            y0, y1 = g_lat[idx], g_lat[idx + 1]
+            px = ref + _wrap(q_lon[:, None] - ref)
+            py = q_lat[:, None]
+            crossing = (y0 > py) != (y1 > py)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x = x0 + (py - y0) * (x1 - x0) / (y1 - y0)
+            count = np.sum(crossing & (px < x), axis=1)
+            expected[:, p] = count % 2 == 1
+        self.assertTrue(np.all(expected.sum(axis=0) > 20))
+
+        for cell_size in [0.5, 2, 10]:
+            index = AirspaceIndex(
+                lat, lon, offsets, lower, upper, cell_size=cell_size
+            )
+            self.assertEqual(len(index), 5)
+            indices, q_offsets = index.query_all(q_lat, q_lon)
+            result = np.zeros_like(expected)
+            result[np.repeat(np.arange(3000), np.diff(q_offsets)), indices] = 1
+            np.testing.assert_array_equal(result, expected)
+
+            within = expected & (lower <= alt[:, None])
+            within &= alt[:, None] <= upper
+            first = np.where(within.any(axis=1), np.argmax(within, axis=1), -1)
+            np.testing.assert_array_equal(index.query(q_lat, q_lon, alt), first)
+
+        clone = pickle.loads(pickle.dumps(index))
+        np.testing.assert_array_equal(clone.query(q_lat, q_lon, alt), first)
+        np.testing.assert_array_equal(
+            AirspaceIndex(lat[:12], lon[:12]).query([45, 0], [5, 0]), [0, -1]
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,6 @@
 import unittest
 from pathlib import Path
+from typing import Any
 
 from impunity import impunity
 from typing_extensions import Annotated
@@ -56,3 +57,75 @@ class ISA(unittest.TestCase):
         result = isa.sound_speed(altitude)
 
         np.testing.assert_allclose(result, expected, rtol=1e-2)
+
+    @impunity
+    def test_table(self) -> None:
+        expected: Annotated[pd.Series, "hPa"]
+        expected = isa_table.pressure.hPa
+
+        result: Annotated[npt.NDArray[np.float64], "hPa"]
+        result = isa.pressure(altitude, "table")
+
+        np.testing.assert_allclose(result, expected, rtol=1e-2)
+
+    def test_table_accuracy(self) -> None:
+        h = np.linspace(-1000, 86000, 1_000_001)
+        for name in ["pressure", "density"]:
+            analytic = getattr(isa, name)(h)
+            tabulated = getattr(isa, name)(h, method="table")
+            np.testing.assert_allclose(tabulated, analytic, rtol=1e-9)
+
+        p, rho, temp = isa.atmosphere(h[::1000], method="table")
+        np.testing.assert_allclose(p, isa.pressure(h[::1000]), rtol=1e-9)
+        np.testing.assert_allclose(rho, isa.density(h[::1000]), rtol=1e-9)
+        np.testing.assert_array_equal(temp, isa.temperature(h[::1000]))
+
+        # scalars, values at nodes and out of range
+        for h_ in [-2000, -1000, 0.0, 11000, 85999.9, 86000, 90000]:
+            expected_ = isa.density(min(max(h_, -1000), 86000))
+            result_ = isa.density(h_, method="table")
+            self.assertEqual(np.ndim(result_), 0)
+            self.assertAlmostEqual(result_ / expected_, 1, delta=1e-9)
+
+        with self.assertRaises(ValueError):
+            isa.AtmosphereTable(step=700)
+        with self.assertRaises(ValueError):
+            isa.density(h, method="spline")
+
+    def test_inverse(self) -> None:
+        # both sides of the tropopause
+        h = np.linspace(-1000, 30000, 310_001)
+        np.testing.assert_allclose(
+            isa.pressure_altitude(isa.pressure(h)), h, rtol=0, atol=1e-8
+        )
+        np.testing.assert_allclose(
+            isa.density_altitude(isa.density(h)), h, rtol=0, atol=1e-8
+        )
+        for h_ in [-1000, 0.0, 10999.9, 11000, 11000.1, 20000.0]:
+            self.assertAlmostEqual(
+                isa.pressure_altitude(isa.pressure(h_)), h_, delta=1e-8
+            )
+            self.assertAlmostEqual(
+                isa.density_altitude(isa.density(h_)), h_, delta=1e-8
+            )
+        self.assertEqual(isa.pressure_altitude(isa.P_0), 0)
+        self.assertEqual(isa.density_altitude(isa.RHO_0), 0)
+
+        # the altimeter set to QNH reads the same static pressure
+        h = np.linspace(0, 10000, 11)
+        qnh = np.array([[993.25], [1033.25]])
+        p = isa.pressure(isa.qnh_altitude(h, qnh)) * qnh * 100 / isa.P_0
+        expected = np.broadcast_to(isa.pressure(h), p.shape)
+        np.testing.assert_allclose(p, expected, rtol=1e-12)
+
+    @impunity
+    def test_qnh(self) -> None:
+        h: Annotated[npt.NDArray[np.float64], "ft"] = np.linspace(0, 20000, 5)
+        standard: Annotated[Any, "ft"] = isa.qnh_altitude(h, 1013.25)
+        np.testing.assert_allclose(standard, h, atol=1e-8)
+
+        # about 27 ft per hPa close to sea level
+        qnh: Annotated[npt.NDArray[np.float64], "hPa"]
+        qnh = np.array([993.25, 1033.25])
+        corrected: Annotated[Any, "ft"] = isa.qnh_altitude(0, qnh)
+        np.testing.assert_allclose(corrected, [-552.7, 539.9], atol=0.1)
@@ -0,0 +1,94 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from typing import Any, Dict, List
+
+import numpy as np
+from pitot import aero, airac, geodesy, isa, parallel, profile
+
+
+class Profiling(unittest.TestCase):
+    def test_calls(self) -> None:
+        cas = np.linspace(100, 300, 1000)
+        with profile() as profiler:
+            aero.cas2tas(cas, 10_000)
+            aero.cas2tas(250.0, 10_000)
+            isa.temperature(0)
+        stats = profiler.to_dict()
+
+        public = stats["pitot.aero.cas2tas"]
+        self.assertEqual(public["calls"], 2)
+        self.assertEqual(public["elements"], 1001)
+        # the numerics are in the kernel, the rest is overhead
+        kernel = stats["pitot.raw.aero.cas2tas"]
+        self.assertEqual(kernel["calls"], 2)
+        self.assertEqual(kernel["time"], kernel["kernel_time"])
+        self.assertEqual(public["kernel_time"], kernel["time"])
+        self.assertAlmostEqual(
+            public["overhead"], public["time"] - public["kernel_time"]
+        )
+        self.assertEqual(stats["pitot.isa.temperature"]["calls"], 1)
+
+        # nothing is recorded after the context
+        aero.cas2tas(cas, 10_000)
+        self.assertEqual(profiler.to_dict(), stats)
+        profiler.reset()
+        self.assertEqual(profiler.to_dict(), {})
+
+    def test_modules(self) -> None:
+        lat = np.array([0.0, 10.0])
+        with profile() as profiler:
+            geodesy.distance(lat, lat, lat[::-1], lat)
+            geodesy.distance_matrix(lat, lat)
+            airac.airac_cycles(np.array(["2023-01-19"], dtype="M8[ns]"))
+            isa.density(lat, method="table")
+        stats = profiler.to_dict()
+        for name in [
+            "pitot.geodesy.distance",
+            "pitot.geodesy.distance_matrix",
+            "pitot.airac.airac_cycles",
+            "pitot.isa.AtmosphereTable.density",
+        ]:
+            with self.subTest(name=name):
+                self.assertEqual(stats[name]["calls"], 1)
+                # not measured, the numerics are in the function itself
+                self.assertEqual(stats[name]["overhead"], 0)
+        self.assertEqual(stats["pitot.geodesy.distance"]["elements"], 2)
+
+    def test_export(self) -> None:
+        received: List[Dict[str, Any]] = []
+        with profile(callback=received.append) as outer:
+            with profile() as inner:
+                aero.tas2mach(250.0, 10_000)
+            aero.tas2mach(250.0, 10_000)
+        self.assertEqual(inner.to_dict()["pitot.aero.tas2mach"]["calls"], 1)
+        self.assertEqual(outer.to_dict()["pitot.aero.tas2mach"]["calls"], 2)
+        self.assertEqual(received, [outer.to_dict()])
+        self.assertEqual(json.loads(outer.to_json()), outer.to_dict())
+
+    def test_parallel(self) -> None:
+        cas = np.linspace(100, 300, 10_000)
+        with profile() as profiler, parallel(4, chunk_size=1000):
+            aero.cas2tas(cas, 10_000)
+        stats = profiler.to_dict()["pitot.raw.aero.cas2tas"]
+        self.assertEqual(stats["calls"], 1)
+        self.assertEqual(stats["elements"], 10_000)
+
+    def test_environment(self) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.json")
+            subprocess.run(
+                [
+                    sys.executable,
+                    "-c",
+                    "from pitot import aero; aero.cas2tas(1, 2)",
+                ],
+                env={**os.environ, "PITOT_PROFILE": path},
+                check=True,
+            )
+            with open(path) as file:
+                stats = json.load(file)
+        self.assertEqual(stats["pitot.aero.cas2tas"]["calls"], 1)
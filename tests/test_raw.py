@@ -0,0 +1,237 @@
+import contextlib
+import tracemalloc
+import unittest
+from functools import partial
+from typing import Any, Callable, Tuple
+from unittest import mock
+
+import numpy as np
+from pitot import aero, isa, raw
+
+altitudes = [-1000, 0, 5000.0, 11000, 11000.5, 20000, 40000.0, 85000]
+
+
+def isa_args(name: str, h: Any) -> Tuple[Tuple[Any, ...], Tuple[Any, ...]]:
+    """Arguments of the decorated function and of the kernel, for an
+    altitude (or the pressure and density at this altitude)."""
+    if name == "pressure_altitude":
+        return (raw.isa.pressure(h),), (raw.isa.pressure(h),)
+    if name == "density_altitude":
+        return (raw.isa.density(h),), (raw.isa.density(h),)
+    if name == "qnh_altitude":
+        return (h, 1020.0), (h, 102000.0)  # hPa, Pa
+    return (h,), (h,)
+
+
+class Raw(unittest.TestCase):
+    def test_isa(self) -> None:
+        h = np.linspace(-1000, 86000, 1001)
+        for name in raw.isa.__all__:
+            decorated, kernel = getattr(isa, name), getattr(raw.isa, name)
+            args, kernel_args = isa_args(name, h)
+            np.testing.assert_array_equal(
+                decorated(*args), kernel(*kernel_args)
+            )
+            for h_ in altitudes:
+                args, kernel_args = isa_args(name, h_)
+                expected = decorated(*(np.float64(arg) for arg in args))
+                result = kernel(*kernel_args)
+                # scalar path, in the math module
+                values = result if isinstance(result, tuple) else (result,)
+                for value in values:
+                    self.assertIs(type(value), float)
+                self.assertEqual(decorated(*args), result)
+                np.testing.assert_allclose(result, expected, rtol=1e-14)
+
+    def test_aero(self) -> None:
+        rng = np.random.default_rng(42)
+        speed = rng.uniform(-100, 500, 1000)
+        mach = rng.uniform(0, 0.9, 1000)
+        h = rng.uniform(0, 45000, 1000)
+        for name in raw.aero.__all__:
+            decorated, kernel = getattr(aero, name), getattr(raw.aero, name)
+            value = mach if name.startswith("mach") else speed
+            np.testing.assert_array_equal(decorated(value, h), kernel(value, h))
+            for v, h_ in zip(value[:20].tolist(), h[:20].tolist()):
+                result = kernel(v, h_)
+                self.assertIs(type(result), float)
+                self.assertEqual(decorated(v, h_), result)
+                # NumPy scalars go through the array path
+                np.testing.assert_allclose(
+                    result,
+                    kernel(np.float64(v), np.float64(h_)),
+                    rtol=1e-13,
+                    atol=1e-10,
+                )
+
+    def test_scalar_path(self) -> None:
+        calls = []
+        for name in raw.isa.__all__:
+            calls.append((getattr(raw.isa, name), isa_args(name, 5000.0)[1]))
+        for name in raw.aero.__all__:
+            value = 0.5 if name.startswith("mach") else 250.0
+            calls.append((getattr(raw.aero, name), (value, 5000)))
+        # no array, no cast, and no call to other (decorated) kernels
+        with contextlib.ExitStack() as stack:
+            mocks = [
+                stack.enter_context(
+                    mock.patch.object(module, name, wraps=getattr(module, name))
+                )
+                for module in (raw.isa, raw.aero)
+                for name in [*module.__all__, "_buffers", "_cast"]
+                if hasattr(module, name)
+            ]
+            for kernel, args in calls:
+                with self.subTest(name=kernel.__name__):
+                    result = kernel(*args)
+                    values = result if isinstance(result, tuple) else (result,)
+                    self.assertTrue(all(type(v) is float for v in values))
+        self.assertEqual([m.call_count for m in mocks], [0] * len(mocks))
+
+    def test_scalar_ulps(self) -> None:
+        # math and NumPy may round pow and exp differently, in a few ULPs
+        rng = np.random.default_rng(1)
+        h = rng.uniform(-1000, 86000, 500)
+        speed = rng.uniform(-100, 500, 500)
+        mach = rng.uniform(0, 0.9, 500)
+        ft = rng.uniform(0, 45000, 500)
+        cases = [
+            (getattr(raw.isa, name), isa_args(name, h)[1])
+            for name in raw.isa.__all__
+        ]
+        cases += [
+            (getattr(raw.aero, name), (mach if name[0] == "m" else speed, ft))
+            for name in raw.aero.__all__
+        ]
+        # cancellations near zero altitude, or in (1 + x) ** 3.5 - 1 near
+        # zero speed, amplify these differences (in m or kts)
+        amplified = ["qnh_altitude", "cas2tas", "tas2cas", "mach2cas"]
+        amplified.append("cas2mach")
+        for kernel, args in cases:
+            with self.subTest(name=kernel.__name__):
+                expected = kernel(*args)
+                floats = [a.tolist() for a in np.broadcast_arrays(*args)]
+                scalars = [kernel(*a) for a in zip(*floats)]
+                if not isinstance(expected, tuple):
+                    expected, scalars = (expected,), [(r,) for r in scalars]
+                for e, r in zip(expected, zip(*scalars)):
+                    if kernel.__name__ in amplified:
+                        np.testing.assert_allclose(r, e, rtol=1e-10, atol=1e-9)
+                    else:
+                        np.testing.assert_array_max_ulp(
+                            np.array(r), e, maxulp=4
+                        )
+
+    def test_keywords(self) -> None:
+        h = np.linspace(0, 40_000, 11)
+        self.assertEqual(raw.isa.density(h=5000.0), raw.isa.density(5000.0))
+        np.testing.assert_array_equal(
+            raw.isa.qnh_altitude(h, qnh=101_000.0),
+            raw.isa.qnh_altitude(h, 101_000.0),
+        )
+        out = np.empty_like(h)
+        result = raw.aero.cas2tas(h=h, cas=250.0, out=out)
+        self.assertIs(result, out)
+        np.testing.assert_array_equal(out, raw.aero.cas2tas(250.0, h))
+        with self.assertRaises(TypeError):
+            raw.isa.density(altitude=h)  # type: ignore[call-arg]
+        with self.assertRaises(TypeError):
+            raw.aero.cas2tas(250.0, cas=250.0)  # type: ignore[misc, call-arg]
+
+    def test_float32(self) -> None:
+        rng = np.random.default_rng(0)
+        h = rng.uniform(0, 86000, 100_000)
+        ft = rng.uniform(0, 45000, 100_000)
+        speed = rng.uniform(60, 500, 100_000)
+        mach = rng.uniform(0.1, 0.95, 100_000)
+
+        # maximum relative errors with respect to float64
+        bounds = {
+            "temperature": 2e-7,
+            "density": 2e-6,
+            "pressure": 2e-6,
+            "sound_speed": 2e-7,
+            "tas2mach": 1e-6,
+            "mach2tas": 1e-6,
+            "eas2tas": 1e-6,
+            "tas2eas": 1e-6,
+            # (1 + x) ** 3.5 - 1 cancels out at low speeds
+            "cas2tas": 1e-4,
+            "tas2cas": 2e-4,
+            "mach2cas": 2e-4,
+            "cas2mach": 1e-4,
+        }
+        for name, bound in bounds.items():
+            with self.subTest(name=name):
+                args: Tuple[np.ndarray, ...]
+                if name in raw.isa.__all__:
+                    fun, args = getattr(isa, name), (h,)
+                else:
+                    fun = getattr(aero, name)
+                    args = (mach if name.startswith("mach") else speed, ft)
+                expected = fun(*args)
+                with raw.precision("float32"):
+                    result = fun(*args)
+                    scalar = fun(*(float(arg[0]) for arg in args))
+                self.assertEqual(result.dtype, np.float32)
+                self.assertIsInstance(scalar, np.float32)
+                np.testing.assert_allclose(result, expected, rtol=bound)
+
+        with raw.precision("float32"):
+            speeds = aero.airspeeds(ft, cas=speed)
+            p, rho, temp = isa.atmosphere(h)
+            table = isa.density(h, method="table")
+            # the context can be nested, and reset
+            with raw.precision(None):
+                self.assertEqual(isa.density(h).dtype, np.float64)
+            self.assertEqual(raw.isa.density(h.tolist()).dtype, np.float32)
+        self.assertEqual(isa.density(h).dtype, np.float64)
+
+        for value in [*speeds, p, rho, temp, table]:
+            self.assertEqual(value.dtype, np.float32)
+        np.testing.assert_allclose(
+            speeds.tas, aero.cas2tas(speed, ft), rtol=1e-4
+        )
+        np.testing.assert_allclose(p, isa.pressure(h), rtol=2e-6)
+        np.testing.assert_allclose(table, isa.density(h), rtol=2e-6)
+
+    def test_workspace(self) -> None:
+        rng = np.random.default_rng(1)
+        h = rng.uniform(-1000, 86000, 100_000)
+        ft = rng.uniform(0, 45000, 100_000)
+        speed = rng.uniform(-100, 500, 100_000)
+        work = raw.Workspace()
+        out = np.empty_like(h)
+        triple = (np.empty_like(h), np.empty_like(h), np.empty_like(h))
+
+        calls: list[Callable[[], Any]] = []
+        for name in raw.isa.__all__:
+            for module, args in zip((isa, raw.isa), isa_args(name, h)):
+                fun = getattr(module, name)
+                buffer = triple if name == "atmosphere" else out
+                expected = fun(*args)
+                self.assertIs(fun(*args, out=buffer, work=work), buffer)
+                np.testing.assert_array_equal(buffer, expected)
+                calls.append(partial(fun, *args, out=buffer, work=work))
+        for name in raw.aero.__all__:
+            for module in (aero, raw.aero):
+                fun = getattr(module, name)
+                expected = fun(speed, ft)
+                self.assertIs(fun(speed, ft, out=out, work=work), out)
+                np.testing.assert_array_equal(out, expected)
+                calls.append(partial(fun, speed, ft, out=out, work=work))
+
+        # the workspace is filled now: no more allocation
+        tracemalloc.start()
+        for call in calls:
+            call()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # only a few small Python objects (tuples, views), no array
+        self.assertLess(peak, 4096)
+        self.assertLess(peak, 0.01 * h.nbytes)
+
+        # the output may also be an input
+        tas = speed.copy()
+        raw.aero.cas2tas(tas, ft, out=tas, work=work)
+        np.testing.assert_array_equal(tas, raw.aero.cas2tas(speed, ft))
@@ -0,0 +1,50 @@
+import ast
+import subprocess
+import sys
+import unittest
+from typing import List
+
+HEAVY = ["impunity", "pandas", "pint", "pyproj"]
+
+
+def loaded_modules(statement: str) -> List[str]:
+    """Runs an import statement in a fresh interpreter, then reports which
+    heavy dependencies were loaded."""
+    code = (
+        "import sys\n"
+        f"{statement}\n"
+        f"print([m for m in {HEAVY!r} if m in sys.modules])\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    return ast.literal_eval(result.stdout)  # type: ignore[no-any-return]
+
+
+class Startup(unittest.TestCase):
+    def test_import_pitot(self) -> None:
+        # a bare import used to build a pint registry (several 100 ms)
+        self.assertEqual(loaded_modules("import pitot"), [])
+
+    def test_import_submodules(self) -> None:
+        expected = {
+            "import pitot.raw": [],
+            "import pitot.airac": [],
+            "import pitot.isa": ["impunity", "pint"],
+            "import pitot.aero": ["impunity", "pint"],
+            "import pitot.geodesy": ["impunity", "pint"],
+            "import pitot.accessor": ["pandas"],
+        }
+        for statement, modules in expected.items():
+            with self.subTest(statement=statement):
+                self.assertEqual(loaded_modules(statement), modules)
+
+    def test_lazy_attributes(self) -> None:
+        modules = loaded_modules("import pitot; pitot.isa; pitot.ureg")
+        self.assertEqual(modules, ["impunity", "pint"])
+
+        import pitot
+
+        self.assertIs(pitot.Q_, pitot.ureg.Quantity)
+        with self.assertRaises(AttributeError):
+            pitot.unknown
@@ -0,0 +1,113 @@
+import unittest
+
+import numpy as np
+from pitot import raw
+from pitot.raw import ufuncs
+
+
+class Ufuncs(unittest.TestCase):
+    rng = np.random.default_rng(42)
+    altitude = rng.uniform(-1000, 86000, 20_000)
+    ft = rng.uniform(0, 45000, 20_000)
+    speed = rng.uniform(-100, 500, 20_000)
+    mach = rng.uniform(0, 0.9, 20_000)
+
+    def assert_same(
+        self, result: np.ndarray, expected: np.ndarray, numba: bool = False
+    ) -> None:
+        if ufuncs.BACKEND == "numpy" and not numba:
+            np.testing.assert_array_equal(result, expected)
+        else:
+            # other implementations of pow and exp differ by a few ULPs,
+            # (1 + x) ** 3.5 - 1 amplifies them at low speeds (in kts)
+            np.testing.assert_allclose(result, expected, rtol=1e-10, atol=1e-9)
+
+    def test_values(self) -> None:
+        for name in ["temperature", "density", "pressure", "sound_speed"]:
+            with self.subTest(name=name):
+                self.assert_same(
+                    getattr(ufuncs, name)(self.altitude),
+                    getattr(raw.isa, name)(self.altitude),
+                )
+        for name in raw.aero.__all__:
+            with self.subTest(name=name):
+                value = self.mach if name.startswith("mach") else self.speed
+                self.assert_same(
+                    getattr(ufuncs, name)(value, self.ft),
+                    getattr(raw.aero, name)(value, self.ft),
+                )
+
+    def test_numba(self) -> None:
+        try:
+            numba_ufuncs = ufuncs._numba_ufuncs()
+        except ImportError:
+            self.skipTest("numba is not installed")
+        for name in ["temperature", "density", "pressure", "sound_speed"]:
+            with self.subTest(name=name):
+                self.assert_same(
+                    numba_ufuncs[name](self.altitude),
+                    getattr(raw.isa, name)(self.altitude),
+                    numba=True,
+                )
+        for name in raw.aero.__all__:
+            with self.subTest(name=name):
+                value = self.mach if name.startswith("mach") else self.speed
+                self.assert_same(
+                    numba_ufuncs[name](value, self.ft),
+                    getattr(raw.aero, name)(value, self.ft),
+                    numba=True,
+                )
+
+    def test_broadcast(self) -> None:
+        h = np.array([[0], [10_000], [30_000]])
+        cas = np.array([150, 200, 250, 300.0])
+        result = ufuncs.cas2tas(cas, h)
+        self.assertEqual(result.shape, (3, 4))
+        self.assert_same(result, raw.aero.cas2tas(cas, h))
+
+        scalar = ufuncs.cas2tas(250.0, 10_000.0)
+        self.assertIsInstance(scalar, np.float64)
+        self.assertAlmostEqual(scalar, raw.aero.cas2tas(250.0, 10_000.0))
+
+    def test_out_where(self) -> None:
+        out = np.full(self.ft.shape, -1.0)
+        result = ufuncs.tas2cas(self.speed, self.ft, out=out)
+        self.assertIs(result, out)
+        self.assert_same(out, raw.aero.tas2cas(self.speed, self.ft))
+
+        out = np.full(self.ft.shape, -1.0)
+        mask = self.speed > 0
+        ufuncs.tas2cas(self.speed, self.ft, out=(out,), where=mask)
+        self.assert_same(out[mask], raw.aero.tas2cas(self.speed, self.ft)[mask])
+        np.testing.assert_array_equal(out[~mask], -1)
+
+        # broadcast over an output larger than the inputs
+        out = np.zeros((2, 3))
+        ufuncs.density([0, 5000, 11000], out=out)
+        np.testing.assert_array_equal(out[0], out[1])
+
+    def test_dtype(self) -> None:
+        h32 = self.altitude.astype(np.float32)
+        self.assertEqual(ufuncs.density(h32).dtype, np.float32)
+        self.assertEqual(
+            ufuncs.density(h32, dtype=np.float64).dtype, np.float64
+        )
+        self.assertEqual(ufuncs.density([0, 1000]).dtype, np.float64)
+        h16 = np.array([0, 1000], dtype=np.int16)
+        self.assertEqual(ufuncs.density(h16).dtype, np.float64)
+        self.assertEqual(raw.isa.density(h16).dtype, np.float64)
+        np.testing.assert_allclose(
+            ufuncs.density(h32),
+            raw.isa.density(h32.astype(np.float64)),
+            rtol=1e-6,
+        )
+
+        out = np.empty(h32.shape, dtype=np.float32)
+        ufuncs.pressure(self.altitude, out=out)
+        np.testing.assert_allclose(
+            out, raw.isa.pressure(self.altitude), rtol=1e-6, atol=1e-3
+        )
+        with self.assertRaises(TypeError):
+            ufuncs.pressure(self.altitude, out=out, casting="safe")
+        with self.assertRaises(TypeError):
+            ufuncs.cas2tas(self.speed)